@@ -0,0 +1,111 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from storage import Storage
+from write_queue import WriteQueue
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """
+    Асинхронная обертка над хранилищем (Database или другой реализацией Storage).
+
+    Повторяет все публичные методы хранилища, но выполняет их в отдельном пуле
+    потоков, чтобы запросы к базе не блокировали цикл событий бота
+    (а вместе с ним клиенты Pyrogram и Discord).
+
+    Пример:
+        team = await db.get_team_by_id(team_id)
+    """
+
+    # Методы, которые работают только с данными в памяти и выполняются
+    # сразу, без передачи в пул потоков
+    INLINE_METHODS = frozenset({"is_admin"})
+
+    # Частые мелкие записи: при запущенной очереди записи выполняются
+    # пачками с групповой фиксацией (см. WriteQueue)
+    QUEUED_METHODS = frozenset({"update_player_subscription", "update_players_subscription", "save_telegram_ids"})
+
+    def __init__(self, database: Storage, max_workers: Optional[int] = None,
+                 write_batch: int = 100, write_delay: float = 0.01):
+        """
+        Args:
+            database: Синхронное хранилище
+            max_workers: Количество потоков; по умолчанию - число соединений
+                         для чтения плюс один поток для записи
+            write_batch: Максимальное количество записей в одной транзакции очереди записи
+            write_delay: Время сбора пачки очереди записи, секунд
+        """
+        self.sync = database
+        if max_workers is None:
+            max_workers = database.max_readers + 1
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._methods: Dict[str, Callable[..., Any]] = {}
+        self.writes = WriteQueue(database.transaction, max_batch=write_batch, max_delay=write_delay)
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Выполнить произвольную синхронную функцию в потоке базы данных."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+
+        attr = getattr(self.sync, name)
+        if not callable(attr):
+            return attr
+
+        if name in self.INLINE_METHODS:
+            @functools.wraps(attr)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                return attr(*args, **kwargs)
+        elif name in self.QUEUED_METHODS:
+            @functools.wraps(attr)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if self.writes.running:
+                    return await self.writes.submit(attr, *args, **kwargs)
+                return await self.run(attr, *args, **kwargs)
+        else:
+            @functools.wraps(attr)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await self.run(attr, *args, **kwargs)
+
+        self._methods[name] = wrapper
+        return wrapper
+
+    def enqueue(self, name: str, *args: Any, **kwargs: Any) -> "asyncio.Future":
+        """
+        Поставить вызов метода записи хранилища в очередь без ожидания результата.
+
+        Args:
+            name: Имя метода хранилища
+
+        Returns:
+            Future с результатом метода (можно не ожидать)
+        """
+        method = getattr(self.sync, name)
+        if self.writes.running:
+            return self.writes.submit(method, *args, **kwargs)
+        return asyncio.ensure_future(self.run(method, *args, **kwargs))
+
+    def start(self) -> None:
+        """Запустить очередь записи (вызывается из работающего цикла событий)."""
+        self.writes.start()
+
+    async def stop(self) -> None:
+        """Выполнить записи, оставшиеся в очереди, и остановить ее."""
+        await self.writes.stop()
+
+    def close(self) -> None:
+        """Дождаться завершения запросов и закрыть базу данных."""
+        self._executor.shutdown(wait=True)
+        self.sync.close()
@@ -0,0 +1,154 @@
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackupService:
+    """
+    Горячее резервное копирование базы данных.
+
+    Снимок создается через online backup API SQLite по отдельному соединению:
+    страницы копируются порциями, между порциями писатели продолжают работу.
+    Готовый снимок проверяется (PRAGMA quick_check), сжимается gzip и
+    сохраняется в backup_dir; хранятся только keep последних снимков.
+    """
+
+    def __init__(self, db_file: str, backup_dir: str = "backups", keep: int = 24,
+                 pages: int = 256, step_sleep: float = 0.005, compress: bool = True):
+        """
+        Args:
+            db_file: Путь к файлу базы данных
+            backup_dir: Каталог для снимков
+            keep: Количество хранимых снимков
+            pages: Количество страниц, копируемых за один шаг
+            step_sleep: Пауза между шагами копирования, секунд
+            compress: Сжимать снимки gzip
+        """
+        self.db_file = db_file
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages = pages
+        self.step_sleep = step_sleep
+        self.compress = compress
+
+        self.prefix = os.path.splitext(os.path.basename(db_file))[0]
+        self._lock = threading.Lock()
+        self.last: Optional[Dict[str, Any]] = None
+
+    def create_snapshot(self) -> Dict[str, Any]:
+        """
+        Создать снимок базы данных.
+
+        Returns:
+            Словарь с ключами path, size (байт), compressed_size, pages,
+            duration (секунд) и created (время создания)
+
+        Raises:
+            RuntimeError: Если снимок уже создается или не прошел проверку
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Резервное копирование уже выполняется")
+
+        try:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            created = datetime.now()
+            name = f"{self.prefix}-{created:%Y%m%d-%H%M%S}-{created.microsecond // 1000:03d}.db"
+            raw_path = os.path.join(self.backup_dir, name + ".tmp")
+            started = time.perf_counter()
+
+            source = sqlite3.connect(self.db_file)
+            target = sqlite3.connect(raw_path)
+            try:
+                source.backup(target, pages=self.pages, sleep=self.step_sleep)
+                pages = target.execute("PRAGMA page_count").fetchone()[0]
+                check = target.execute("PRAGMA quick_check").fetchone()[0]
+            finally:
+                target.close()
+                source.close()
+
+            if check != "ok":
+                os.remove(raw_path)
+                raise RuntimeError(f"Снимок не прошел проверку целостности: {check}")
+
+            size = os.path.getsize(raw_path)
+            path = os.path.join(self.backup_dir, name + (".gz" if self.compress else ""))
+            if self.compress:
+                with open(raw_path, "rb") as src, gzip.open(path + ".tmp", "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(raw_path)
+                os.replace(path + ".tmp", path)
+            else:
+                os.replace(raw_path, path)
+
+            duration = time.perf_counter() - started
+            self.last = {
+                "path": path,
+                "size": size,
+                "compressed_size": os.path.getsize(path),
+                "pages": pages,
+                "duration": duration,
+                "created": created,
+            }
+            logger.info(
+                f"Резервная копия {path} создана за {duration:.2f} с "
+                f"({size / 1024:.0f} КБ, сжато до {self.last['compressed_size'] / 1024:.0f} КБ)"
+            )
+
+            self.rotate()
+            return self.last
+        finally:
+            self._lock.release()
+
+    def list_snapshots(self) -> List[str]:
+        """Снимки в каталоге резервных копий, от новых к старым."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        snapshots = [
+            os.path.join(self.backup_dir, name)
+            for name in os.listdir(self.backup_dir)
+            if name.startswith(f"{self.prefix}-") and name.endswith((".db", ".db.gz"))
+        ]
+        # Время создания входит в имя файла, поэтому сортировка по имени хронологическая
+        return sorted(snapshots, reverse=True)
+
+    def rotate(self) -> int:
+        """
+        Удалить снимки сверх keep последних.
+
+        Returns:
+            Количество удаленных снимков
+        """
+        removed = 0
+        for path in self.list_snapshots()[self.keep:]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                logger.error(f"Не удалось удалить старую резервную копию {path}: {e}")
+        return removed
+
+
+def restore_snapshot(snapshot: str, db_file: str) -> None:
+    """
+    Восстановить базу данных из снимка (бот должен быть остановлен).
+
+    Args:
+        snapshot: Путь к снимку (.db или .db.gz)
+        db_file: Путь к восстанавливаемой базе данных
+    """
+    opener = gzip.open if snapshot.endswith(".gz") else open
+    with opener(snapshot, "rb") as src, open(db_file + ".restore", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    # Журнал WAL от прежней базы к восстановленной не относится
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_file + suffix):
+            os.remove(db_file + suffix)
+    os.replace(db_file + ".restore", db_file)
@@ -0,0 +1,434 @@
+"""
+Нагрузочные замеры слоя базы данных.
+
+Запуск:
+    python benchmark.py pool [--teams 200] [--iterations 2000]
+    python benchmark.py teams [--teams 1500] [--iterations 20]
+    python benchmark.py models [--teams 5000]
+    python benchmark.py writes [--writes 5000] [--synchronous FULL]
+    python benchmark.py storage [--teams 500]
+    python benchmark.py discord [--members 50000]
+    python benchmark.py pubg [--requests 500] [--concurrency 20]
+
+Все замеры выполняются на временной копии базы, рабочий tournament.db не затрагивается.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator
+from urllib.parse import unquote
+
+from async_database import AsyncDatabase
+from database import Database
+from discord_members import DiscordMemberIndex
+from memory_storage import MemoryStorage
+from storage import Storage
+
+
+class OpenPerCallPool:
+    """Прежнее поведение: новое соединение на каждый вызов метода базы данных."""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with sqlite3.connect(self.db_file) as conn:
+            conn.row_factory = sqlite3.Row
+            yield conn
+        conn.close()
+
+    def reader(self):
+        return self._connect()
+
+    def writer(self):
+        return self._connect()
+
+    def close(self) -> None:
+        pass
+
+
+def seed(db: Storage, teams: int, players_per_team: int = 4) -> None:
+    """Заполнить базу тестовыми турнирами, командами и игроками."""
+    tournament_id = db.create_tournament("Bench Cup", "Турнир для замеров", "01.01.2030")
+    telegram_id = 1_000_000
+    for i in range(teams):
+        telegram_id += 1
+        team_id = db.create_team(f"team_{i}", {
+            "nickname": f"captain_{i}",
+            "username": f"captain_{i}",
+            "telegram_id": telegram_id,
+        })
+        for j in range(1, players_per_team):
+            telegram_id += 1
+            db.add_player_to_team(team_id, {
+                "nickname": f"player_{i}_{j}",
+                "username": f"player_{i}_{j}",
+                "telegram_id": telegram_id,
+            })
+        if i % 2 == 0:
+            db.register_team_for_tournament(team_id, tournament_id)
+
+
+def timed(label: str, func: Callable[[], None], iterations: int) -> float:
+    """Выполнить func заданное количество раз и вывести среднее время вызова."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<28} {elapsed:8.3f} с  ({elapsed / iterations * 1e6:8.1f} мкс/вызов)")
+    return elapsed
+
+
+@contextmanager
+def temp_database(**kwargs) -> Iterator[Database]:
+    """Создать Database во временном каталоге."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"), **kwargs)
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def bench_pool(args: argparse.Namespace) -> None:
+    """Сравнение пула соединений с открытием соединения на каждый вызов."""
+    with temp_database() as db:
+        seed(db, args.teams)
+        team_ids = [team["id"] for team in db.get_all_teams()]
+        pooled = db.pool
+        legacy = OpenPerCallPool(db.db_file)
+
+        def reads() -> None:
+            for team_id in team_ids[:10]:
+                db.get_team_by_id(team_id)
+            db.is_admin(123456789)
+            db.team_name_exists("team_1")
+            db.get_active_tournaments()
+
+        def writes() -> None:
+            db.update_player_subscription(1, True)
+
+        results = {}
+        for name, pool in (("open-per-call", legacy), ("pool", pooled)):
+            db.pool = pool
+            print(f"{name}:")
+            results[name] = (
+                timed("чтение (13 запросов)", reads, args.iterations),
+                timed("запись (1 UPDATE)", writes, args.iterations),
+            )
+        db.pool = pooled
+
+        for index, label in enumerate(("чтение", "запись")):
+            speedup = results["open-per-call"][index] / results["pool"][index]
+            print(f"Ускорение ({label}): x{speedup:.2f}")
+
+
+def get_all_teams_n_plus_one(db: Database) -> list:
+    """Прежняя реализация get_all_teams: два дополнительных запроса на каждую команду."""
+    with db.pool.reader() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT t.id, t.team_name, t.status, t.registration_date,
+                t.captain_contact, t.admin_comment
+            FROM teams t
+            ORDER BY t.registration_date DESC
+        ''')
+        teams = []
+        for team in cursor.fetchall():
+            team_dict = dict(team)
+            cursor.execute('''
+                SELECT id, nickname, telegram_username, telegram_id,
+                    discord_username, discord_id, is_captain
+                FROM players
+                WHERE team_id = ?
+            ''', (team['id'],))
+            team_dict['players'] = [dict(p) for p in cursor.fetchall()]
+            cursor.execute('''
+                SELECT t.id, t.name, t.event_date, tt.status as registration_status
+                FROM tournaments t
+                JOIN team_tournaments tt ON t.id = tt.tournament_id
+                WHERE tt.team_id = ?
+            ''', (team['id'],))
+            team_dict['tournaments'] = [dict(t) for t in cursor.fetchall()]
+            teams.append(team_dict)
+        return teams
+
+
+def bench_teams(args: argparse.Namespace) -> None:
+    """Загрузка списка команд: N+1 запросов против загрузки наборами."""
+    with temp_database() as db:
+        seed(db, args.teams)
+        assert get_all_teams_n_plus_one(db) == db.get_all_teams(), "результаты реализаций различаются"
+
+        print(f"get_all_teams, команд: {args.teams}")
+        legacy = timed("N+1 запросов", lambda: get_all_teams_n_plus_one(db), args.iterations)
+        batched = timed("3 запроса", db.get_all_teams, args.iterations)
+        print(f"Ускорение: x{legacy / batched:.2f}")
+
+
+def measure_memory(func: Callable[[], object]) -> tuple:
+    """Вызвать func и вернуть (результат, объем памяти, удерживаемой результатом, в байтах)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return result, retained
+
+
+def bench_models(args: argparse.Namespace) -> None:
+    """Память и доступ к полям: словари из sqlite3.Row против моделей со __slots__."""
+    with temp_database() as db:
+        seed(db, args.teams)
+        models = db.get_team_models()
+        assert [team.to_dict() for team in models] == db.get_all_teams(), "результаты API различаются"
+        del models
+
+        dicts, dict_bytes = measure_memory(db.get_all_teams)
+        models, model_bytes = measure_memory(db.get_team_models)
+
+        print(f"Команд: {args.teams}, игроков в команде: 4")
+        print(f"  {'словари':<28} {dict_bytes / 1024:8.0f} КБ  ({dict_bytes / args.teams:6.0f} Б/команда)")
+        print(f"  {'модели Team':<28} {model_bytes / 1024:8.0f} КБ  ({model_bytes / args.teams:6.0f} Б/команда)")
+        print(f"Экономия памяти: x{dict_bytes / model_bytes:.2f}")
+
+        def dict_access() -> None:
+            for team in dicts:
+                for player in team['players']:
+                    player['nickname'], player['discord_username']
+
+        def model_access() -> None:
+            for team in models:
+                for player in team.players:
+                    player.nickname, player.discord_username
+
+        print("Чтение полей всех игроков:")
+        dict_time = timed("словари", dict_access, args.iterations)
+        model_time = timed("модели", model_access, args.iterations)
+        print(f"Ускорение: x{dict_time / model_time:.2f}")
+
+
+def bench_writes(args: argparse.Namespace) -> None:
+    """Параллельные мелкие записи: фиксация на каждый вызов против очереди с групповой фиксацией."""
+    with temp_database(pragmas={"synchronous": args.synchronous}) as db:
+        seed(db, 50)
+        player_ids = [player["id"] for team in db.get_all_teams() for player in team["players"]]
+
+        async def run(queued: bool) -> float:
+            async_db = AsyncDatabase(db)
+            if queued:
+                async_db.start()
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                async_db.update_player_subscription(player_ids[i % len(player_ids)], i % 2 == 0)
+                for i in range(args.writes)
+            ))
+            elapsed = time.perf_counter() - started
+            if queued:
+                batches = async_db.writes.batches
+                await async_db.stop()
+                print(f"  транзакций очереди: {batches}")
+            return elapsed
+
+        print(f"Записей: {args.writes}, synchronous={args.synchronous}")
+        results = {}
+        for label, queued in (("фиксация на каждый вызов", False), ("очередь записи", True)):
+            elapsed = asyncio.run(run(queued))
+            results[queued] = elapsed
+            print(f"  {label:<28} {elapsed:8.3f} с  ({args.writes / elapsed:10.0f} записей/с)")
+        print(f"Ускорение: x{results[False] / results[True]:.2f}")
+
+
+def bench_storage(args: argparse.Namespace) -> None:
+    """Чтение из Database и MemoryStorage."""
+    # Одни и те же вызовы без ввода-вывода показывают собственную стоимость кода над хранилищем
+    print(f"Чтение, команд: {args.teams}")
+    with temp_database() as db:
+        for name, storage in (("SQLite", db), ("память", MemoryStorage())):
+            seed(storage, args.teams)
+            team_ids = [team["id"] for team in storage.get_all_teams()]
+            print(f"{name}:")
+            timed("get_all_teams", storage.get_all_teams, args.iterations)
+            timed("get_team_by_name", lambda: storage.get_team_by_name("team_1"), args.iterations * 50)
+            timed("get_teams_page", lambda: storage.get_teams_page(cursor=team_ids[len(team_ids) // 2]),
+                  args.iterations * 50)
+
+
+def bench_discord(args: argparse.Namespace) -> None:
+    """Поиск участника Discord по username: перебор guild.members против индекса."""
+    guild = SimpleNamespace(id=1)
+    members = [SimpleNamespace(id=10**17 + i, name=f"member_{i}", guild=guild) for i in range(args.members)]
+    index = DiscordMemberIndex(guild.id)
+    started = time.perf_counter()
+    index.rebuild(members)
+    print(f"Участников: {args.members}, построение индекса {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    # Самый дорогой для перебора случай - участник в конце списка или отсутствующий
+    username = f"Member_{args.members - 1}"
+
+    def scan() -> None:
+        for member in members:
+            if member.name.lower() == username.lower():
+                return
+
+    timed("перебор guild.members", scan, args.iterations)
+    timed("индекс", lambda: index.get_id(username), args.iterations * 1000)
+
+
+class PubgStubHandler(BaseHTTPRequestHandler):
+    """
+    Заглушка API поиска игроков PUBG: /search/<никнейм>.
+
+    Никнеймы, начинающиеся с "player", существуют (API возвращает их с
+    заглавной буквы), остальные - нет. Режим сервера (server.mode):
+    ok - обычные ответы, error - 503, slow - ответ через server.delay секунд,
+    malformed - 200 с телом, которое не является списком игроков.
+    Используется замером pubg и тестами tests/test_pubg_client.py.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят отдельными записями; без этого keep-alive упирается в задержку ACK
+    disable_nagle_algorithm = True
+
+    def handle(self) -> None:
+        # Вызывается один раз на соединение: keep-alive виден по числу соединений
+        self.server.connections += 1
+        super().handle()
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        if self.server.mode == "slow":
+            time.sleep(self.server.delay)
+        if self.server.mode == "error":
+            self._reply(503, b"Service Unavailable")
+            return
+        if self.server.mode == "malformed":
+            self._reply(200, b'["x"]')
+            return
+        nickname = unquote(self.path.rsplit("/", 1)[-1])
+        found = [{"nickname": nickname.capitalize()}] if nickname.lower().startswith("player") else []
+        self._reply(200, json.dumps(found).encode())
+
+    def _reply(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextmanager
+def pubg_stub_server() -> Iterator[ThreadingHTTPServer]:
+    """Запустить заглушку API PUBG на свободном локальном порту."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PubgStubHandler)
+    server.daemon_threads = True
+    server.mode, server.delay = "ok", 0.0
+    server.requests = server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_pubg(args: argparse.Namespace) -> None:
+    """Проверка никнеймов PUBG через заглушку API: сессия на запрос против общего клиента."""
+    # aiohttp нужен только этому замеру
+    import aiohttp
+    from pubg_client import PubgClient
+
+    async def run(server: ThreadingHTTPServer) -> None:
+        url = f"http://127.0.0.1:{server.server_port}"
+        nicknames = [f"player_{i}" for i in range(args.requests)]
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def throughput(label: str, check: Callable[[str], Any]) -> None:
+            async def limited(nickname: str) -> None:
+                async with limit:
+                    await check(nickname)
+
+            server.requests = server.connections = 0
+            started = time.perf_counter()
+            await asyncio.gather(*(limited(nickname) for nickname in nicknames))
+            elapsed = time.perf_counter() - started
+            print(f"  {label:<28} {elapsed:8.3f} с  ({len(nicknames) / elapsed:8.0f} проверок/с, "
+                  f"запросов {server.requests}, соединений {server.connections})")
+
+        async def session_per_call(nickname: str) -> None:
+            # Прежнее поведение: новая сессия (и соединение) на каждый никнейм
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{url}/search/{nickname}") as response:
+                    await response.json()
+
+        print(f"Проверок: {args.requests}, одновременно: {args.concurrency}")
+        await throughput("сессия на каждый запрос", session_per_call)
+        uncached = PubgClient(url, cache_size=0)
+        await throughput("общий клиент без кэша", uncached.check_nickname)
+        await uncached.close()
+
+    with pubg_stub_server() as server:
+        asyncio.run(run(server))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замеры производительности базы данных")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pool_parser = subparsers.add_parser("pool", help="пул соединений против открытия на каждый вызов")
+    pool_parser.add_argument("--teams", type=int, default=200)
+    pool_parser.add_argument("--iterations", type=int, default=2000)
+    pool_parser.set_defaults(func=bench_pool)
+
+    teams_parser = subparsers.add_parser("teams", help="загрузка всех команд с игроками и турнирами")
+    teams_parser.add_argument("--teams", type=int, default=1500)
+    teams_parser.add_argument("--iterations", type=int, default=20)
+    teams_parser.set_defaults(func=bench_teams)
+
+    models_parser = subparsers.add_parser("models", help="память моделей Team против словарей")
+    models_parser.add_argument("--teams", type=int, default=5000)
+    models_parser.add_argument("--iterations", type=int, default=20)
+    models_parser.set_defaults(func=bench_models)
+
+    writes_parser = subparsers.add_parser("writes", help="очередь записи с групповой фиксацией")
+    writes_parser.add_argument("--writes", type=int, default=5000)
+    writes_parser.add_argument("--synchronous", default="NORMAL", choices=("OFF", "NORMAL", "FULL"))
+    writes_parser.set_defaults(func=bench_writes)
+
+    storage_parser = subparsers.add_parser("storage", help="чтение: SQLite против хранилища в памяти")
+    storage_parser.add_argument("--teams", type=int, default=500)
+    storage_parser.add_argument("--iterations", type=int, default=20)
+    storage_parser.set_defaults(func=bench_storage)
+
+    discord_parser = subparsers.add_parser("discord", help="поиск участника Discord: перебор против индекса")
+    discord_parser.add_argument("--members", type=int, default=50000)
+    discord_parser.add_argument("--iterations", type=int, default=50)
+    discord_parser.set_defaults(func=bench_discord)
+
+    pubg_parser = subparsers.add_parser("pubg", help="клиент API PUBG на локальной заглушке")
+    pubg_parser.add_argument("--requests", type=int, default=500)
+    pubg_parser.add_argument("--concurrency", type=int, default=20)
+    pubg_parser.set_defaults(func=bench_pubg)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Ограниченный LRU-кэш с временем жизни записей.
+
+    Потокобезопасен. Значения хранятся и возвращаются как есть, поэтому
+    подходит для неизменяемых значений (строки, числа, кортежи).
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0):
+        """
+        Args:
+            maxsize: Максимальное количество записей (0 - кэш отключен)
+            ttl: Время жизни записи в секундах
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получить значение или None, если записи нет или она устарела."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Сохранить значение."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        # Вызывается под блокировкой
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _changed(self) -> None:
+        """Вызывается под блокировкой перед каждым удалением записей."""
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Удалить указанные записи."""
+        with self._lock:
+            self._changed()
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        """Удалить все записи."""
+        with self._lock:
+            self._changed()
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики для подбора размера кэша."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class TeamCache(TTLCache):
+    """
+    Кэш команд: TTLCache для изменяемых словарей команд.
+
+    Потокобезопасен: используется из потоков AsyncDatabase. Чтобы медленное
+    чтение не положило в кэш данные, устаревшие из-за параллельной записи,
+    каждая инвалидация увеличивает поколение кэша, а put() принимает только
+    значения, загруженные в текущем поколении.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0):
+        """
+        Args:
+            maxsize: Максимальное количество записей (0 - кэш отключен)
+            ttl: Время жизни записи в секундах
+        """
+        super().__init__(maxsize, ttl)
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Текущее поколение; запоминается перед загрузкой значения из базы."""
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получить копию значения или None, если записи нет или она устарела."""
+        value = super().get(key)
+        # Копия защищает кэш от изменений словаря вызывающим кодом
+        return copy.deepcopy(value) if value is not None else None
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Сохранить значение.
+
+        Args:
+            key: Ключ
+            value: Значение
+            generation: Поколение, полученное до загрузки значения
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._store(key, copy.deepcopy(value))
+
+    def _changed(self) -> None:
+        self._generation += 1
+
+
+class TournamentCatalog:
+    """
+    Каталог турниров в памяти процесса.
+
+    Загружается из базы один раз и перечитывается после каждого изменения
+    турниров (invalidate() увеличивает версию каталога). Чтение - поиск
+    в словаре без обращения к базе данных.
+    """
+
+    def __init__(self, loader: Callable[[], List[Dict[str, Any]]]):
+        """
+        Args:
+            loader: Функция, возвращающая все турниры, упорядоченные
+                    по created_date от новых к старым
+        """
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._version = 0
+        # Снимок (словарь по ID, упорядоченный кортеж) заменяется целиком
+        self._data: Optional[Tuple[Dict[int, Dict[str, Any]], Tuple[Dict[str, Any], ...]]] = None
+
+        self.loads = 0
+
+    @property
+    def version(self) -> int:
+        """Версия каталога, увеличивается при каждом изменении турниров."""
+        return self._version
+
+    def _snapshot(self) -> Tuple[Dict[int, Dict[str, Any]], Tuple[Dict[str, Any], ...]]:
+        data = self._data
+        if data is not None:
+            return data
+
+        version = self._version
+        ordered = tuple(self._loader())
+        data = ({tournament["id"]: tournament for tournament in ordered}, ordered)
+        with self._lock:
+            # Если каталог изменился во время загрузки, эти данные не сохраняем
+            if version == self._version:
+                self._data = data
+                self.loads += 1
+        return data
+
+    def get(self, tournament_id: int) -> Optional[Dict[str, Any]]:
+        """Получить турнир по ID."""
+        tournament = self._snapshot()[0].get(tournament_id)
+        return dict(tournament) if tournament is not None else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Получить все турниры."""
+        return [dict(tournament) for tournament in self._snapshot()[1]]
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Получить турниры с открытой регистрацией."""
+        return [dict(tournament) for tournament in self._snapshot()[1] if tournament["registration_open"]]
+
+    def invalidate(self) -> None:
+        """Пометить каталог устаревшим; следующее чтение загрузит его заново."""
+        with self._lock:
+            self._version += 1
+            self._data = None
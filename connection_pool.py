@@ -0,0 +1,186 @@
+import sqlite3
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Any
+
+from query_stats import InstrumentedConnection, QueryStats
+
+logger = logging.getLogger(__name__)
+
+# Настройки соединений по умолчанию
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "synchronous": "NORMAL",     # В режиме WAL это безопасно и намного быстрее FULL
+    "cache_size": -16000,        # Отрицательное значение - размер в КиБ (~16 МБ)
+    "mmap_size": 134217728,      # 128 МБ отображения файла в память
+    "busy_timeout": 5000,        # Ждать блокировку до 5 секунд вместо "database is locked"
+    "temp_store": "MEMORY",
+}
+
+
+class ConnectionPool:
+    """
+    Пул соединений SQLite: одно соединение для записи и набор соединений для чтения.
+
+    Запись сериализуется через блокировку единственного writer-соединения,
+    чтение идет параллельно через reader-соединения (режим WAL позволяет
+    читателям не ждать писателя).
+    """
+
+    def __init__(self, db_file: str, readers: int = 4, pragmas: Optional[Dict[str, Any]] = None,
+                 stats: Optional[QueryStats] = None):
+        """
+        Args:
+            db_file: Путь к файлу базы данных
+            readers: Максимальное количество соединений для чтения
+            pragmas: Дополнительные PRAGMA, переопределяющие DEFAULT_PRAGMAS
+            stats: Статистика запросов; если задана, все запросы пула измеряются
+        """
+        self.db_file = db_file
+        self.stats = stats
+        self.max_readers = max(1, readers)
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+        self._after_commit: List[Callable[[], None]] = []
+
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть новое соединение и применить к нему PRAGMA."""
+        if self.stats is not None:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False, factory=InstrumentedConnection)
+            conn.query_stats = self.stats
+        else:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = self._connect()
+            # Режим журнала сохраняется в файле, достаточно установить его один раз
+            mode = self._writer.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            if mode.lower() != "wal":
+                logger.warning(f"Не удалось включить WAL для {self.db_file}, используется режим {mode}")
+        return self._writer
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Получить соединение для записи.
+
+        Открывает транзакцию (BEGIN IMMEDIATE), фиксирует ее при успешном выходе
+        и откатывает при исключении. Вложенные вызовы в том же потоке работают
+        внутри внешней транзакции через SAVEPOINT: исключение во вложенном блоке
+        откатывает только его изменения.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Пул соединений закрыт")
+
+        with self._writer_lock:
+            conn = self._get_writer()
+            outermost = self._writer_depth == 0
+            savepoint = f"sp_{self._writer_depth}"
+            callbacks = len(self._after_commit)
+            if outermost:
+                conn.execute("BEGIN IMMEDIATE")
+            else:
+                conn.execute(f"SAVEPOINT {savepoint}")
+            self._writer_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                if outermost:
+                    self._after_commit.clear()
+                    if conn.in_transaction:
+                        conn.rollback()
+                elif conn.in_transaction:
+                    # Обработчики, зарегистрированные в откатываемом блоке, не выполняются
+                    del self._after_commit[callbacks:]
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                if outermost:
+                    if conn.in_transaction:
+                        self._commit(conn)
+                    self._run_after_commit()
+                elif conn.in_transaction:
+                    conn.execute(f"RELEASE {savepoint}")
+            finally:
+                self._writer_depth -= 1
+
+    def _commit(self, conn: sqlite3.Connection) -> None:
+        if self.stats is None:
+            conn.commit()
+            return
+        # Фиксация идет мимо курсора, поэтому измеряется отдельно
+        started = time.perf_counter()
+        conn.commit()
+        self.stats.record_statement("COMMIT", time.perf_counter() - started, 0, "()", self.stats.current_method)
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Выполнить callback после фиксации текущей транзакции записи.
+
+        Вызывается внутри блока writer(). При откате транзакции callback
+        не выполняется.
+        """
+        if self._writer_depth == 0:
+            raise sqlite3.ProgrammingError("after_commit вызван вне транзакции записи")
+        self._after_commit.append(callback)
+
+    def _run_after_commit(self) -> None:
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Ошибка в обработчике после фиксации транзакции: {e}")
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Получить соединение для чтения (блокируется, если все соединения заняты)."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Пул соединений закрыт")
+
+        conn = None
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                if len(self._all_readers) < self.max_readers:
+                    conn = self._connect()
+                    self._all_readers.append(conn)
+            if conn is None:
+                conn = self._readers.get()
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def close(self) -> None:
+        """Закрыть все соединения пула."""
+        self._closed = True
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+        logger.info("Пул соединений с базой данных закрыт")
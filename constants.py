@@ -73,6 +73,37 @@ DISCORD_INVITE_LINK = "https://discord.gg/rupubg"
 MIN_PLAYERS = 3  # Не включая капитана
 MAX_PLAYERS = 5  # Не включая капитана
 
+# Количество команд на одной странице списка в админ-панели
+TEAMS_PAGE_SIZE = 10
+
+# Максимальное количество команд, Discord-роли которых обрабатываются одновременно
+DISCORD_ROLE_CONCURRENCY = 5
+
+# Проверка подписки игроков на канал: одновременных запросов к Telegram и таймаут одного запроса (секунд)
+SUBSCRIPTION_CHECK_CONCURRENCY = 5
+SUBSCRIPTION_CHECK_TIMEOUT = 5
+
+# Срок (секунд), в течение которого сохраненный статус подписки считается актуальным,
+# и сколько игроков одобренных команд перепроверяется за один запуск фоновой задачи
+SUBSCRIPTION_CACHE_TTL = 6 * 60 * 60
+SUBSCRIPTION_REVERIFY_BATCH = 50
+
+# Справочник username -> Telegram ID: срок актуальности найденного ID и отметки
+# "username не найден" (секунд) и максимум username в одном запросе get_users
+USER_DIRECTORY_TTL = 7 * 24 * 60 * 60
+USER_DIRECTORY_NEGATIVE_TTL = 60 * 60
+USER_DIRECTORY_BATCH = 100
+
+# API поиска игроков PUBG: адрес, таймаут запроса (секунд), время жизни кэша найденных
+# и ненайденных никнеймов (секунд), ошибок подряд до размыкания предохранителя
+# и через сколько секунд после размыкания повторить запрос
+PUBG_API_URL = "https://api.pubg.report"
+PUBG_API_TIMEOUT = 5
+PUBG_CACHE_TTL = 24 * 60 * 60
+PUBG_NEGATIVE_CACHE_TTL = 10 * 60
+PUBG_CIRCUIT_FAILURES = 5
+PUBG_CIRCUIT_RESET = 30
+
 # Статусы команд
 TEAM_STATUS = {
     "draft": "📝 Черновик (не зарегистрирована)",
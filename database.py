@@ -1,119 +1,136 @@
 import sqlite3
+import json
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple, Any
+from datetime import datetime, timedelta
+from typing import List, Dict, ContextManager, FrozenSet, Optional, Tuple, Any
 from constants import MAX_PLAYERS
+from connection_pool import ConnectionPool
+from cache import TeamCache, TournamentCatalog
+from migrations import LATEST_VERSION, migrate, schema_version
+from models import Player, Team, TeamTournament, Tournament
+from query_stats import QueryStats
+from storage import Storage
 
 logger = logging.getLogger(__name__)
 
-class Database:
-    def __init__(self, db_file: str = "tournament.db"):
+class Database(Storage):
+    """Хранилище в файле SQLite (реализация Storage)."""
+
+    # Методы, время выполнения которых не измеряется: служебные и поиск в памяти
+    # (каталог турниров, администраторы), которому обертка добавила бы больше, чем он стоит
+    UNTIMED_METHODS = frozenset({
+        "close", "transaction", "get_query_stats", "reset_query_stats", "get_team_cache_stats",
+        "is_admin", "get_tournament_by_id", "get_active_tournaments",
+    })
+
+    def __init__(self, db_file: str = "tournament.db", readers: int = 4, pragmas: Optional[Dict[str, Any]] = None,
+                 team_cache_size: int = 512, team_cache_ttl: float = 60.0,
+                 query_stats: bool = False, slow_query_threshold: float = 0.1):
+        """
+        Args:
+            db_file: Путь к файлу базы данных
+            readers: Количество соединений для чтения в пуле
+            pragmas: Дополнительные PRAGMA для соединений пула
+            team_cache_size: Максимальное количество команд в кэше (0 - без кэша)
+            team_cache_ttl: Время жизни команды в кэше, секунд
+            query_stats: Измерять время методов и SQL-запросов (см. get_query_stats)
+            slow_query_threshold: Порог записи запроса в журнал медленных запросов, секунд
+        """
         self.db_file = db_file
+        self.stats = QueryStats(slow_threshold=slow_query_threshold) if query_stats else None
+        self.pool = ConnectionPool(db_file, readers=readers, pragmas=pragmas, stats=self.stats)
+        self.team_cache = TeamCache(maxsize=team_cache_size, ttl=team_cache_ttl)
+        self.tournaments = TournamentCatalog(self._load_tournaments)
+        self._admin_ids: FrozenSet[int] = frozenset()
+        if self.stats is not None:
+            self._instrument_methods()
         self.init_db()
+        self.refresh_admins()
 
-    def init_db(self) -> None:
-        """Инициализация базы данных и создание необходимых таблиц."""
-        with sqlite3.connect(self.db_file) as conn:
+    def _instrument_methods(self) -> None:
+        """Обернуть все публичные методы экземпляра измерением времени."""
+        for name in dir(type(self)):
+            if name.startswith('_') or name in self.UNTIMED_METHODS:
+                continue
+            attr = getattr(self, name)
+            if callable(attr):
+                setattr(self, name, self.stats.wrap(name, attr))
+
+    @property
+    def max_readers(self) -> int:
+        """Количество соединений для чтения в пуле."""
+        return self.pool.max_readers
+
+    def transaction(self) -> ContextManager[sqlite3.Connection]:
+        """Транзакция записи пула (вложенные блоки - SAVEPOINT)."""
+        return self.pool.writer()
+
+    def close(self) -> None:
+        """Закрыть соединения с базой данных."""
+        self.pool.close()
+
+    def get_query_stats(self, top: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Получить статистику времени выполнения методов и SQL-запросов.
+
+        Args:
+            top: Количество самых затратных методов и запросов (None - все)
+
+        Returns:
+            Словарь со списками methods и statements (count, total, mean,
+            p50, p95, p99 в секундах, rows) или None, если измерение отключено
+        """
+        return self.stats.snapshot(top) if self.stats is not None else None
+
+    def reset_query_stats(self) -> None:
+        """Сбросить статистику запросов."""
+        if self.stats is not None:
+            self.stats.reset()
+
+    def _invalidate_teams(self, *team_ids: int) -> None:
+        """Убрать команды из кэша после фиксации текущей транзакции записи."""
+        self.pool.after_commit(lambda: self.team_cache.invalidate(*team_ids))
+
+    def get_team_cache_stats(self) -> Dict[str, Any]:
+        """
+        Получить счетчики кэша команд.
+
+        Returns:
+            Словарь с размером кэша, попаданиями, промахами и вытеснениями
+        """
+        return self.team_cache.stats()
+
+    def explain(self, query: str, params: Tuple[Any, ...] = ()) -> List[str]:
+        """
+        Получить план выполнения запроса (EXPLAIN QUERY PLAN).
+
+        Args:
+            query: SQL-запрос
+            params: Параметры запроса
+
+        Returns:
+            Список строк плана
+        """
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
-            
-            # Таблица турниров
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tournaments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    description TEXT,
-                    event_date TEXT NOT NULL,
-                    registration_open BOOLEAN DEFAULT 1,
-                    created_date TIMESTAMP NOT NULL
-                )
-            ''')
-            
-            # Таблица команд (добавлено поле tournament_id)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS teams (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    team_name TEXT NOT NULL UNIQUE,
-                    captain_contact TEXT NOT NULL,
-                    registration_date TIMESTAMP NOT NULL,
-                    status TEXT DEFAULT 'pending',
-                    admin_comment TEXT,
-                )
-            ''')
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            return [row['detail'] for row in cursor.fetchall()]
 
-            # НОВАЯ ТАБЛИЦА: Связь многие-ко-многим между командами и турнирами
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS team_tournaments (
-                    team_id INTEGER,
-                    tournament_id INTEGER,
-                    status TEXT DEFAULT 'pending',
-                    PRIMARY KEY (team_id, tournament_id),
-                    FOREIGN KEY (team_id) REFERENCES teams (id),
-                    FOREIGN KEY (tournament_id) REFERENCES tournaments (id)
-                )
-            ''')
-            
-            # Таблица игроков (добавлены поля discord_username и discord_id)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS players (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    team_id INTEGER,
-                    nickname TEXT NOT NULL,
-                    telegram_username TEXT NOT NULL,
-                    telegram_id INTEGER,
-                    discord_username TEXT,
-                    discord_id TEXT,
-                    is_captain BOOLEAN DEFAULT 0,
-                    FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            # Проверяем наличие столбца sub в таблице players
-            cursor.execute("PRAGMA table_info(players)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if "sub" not in columns:
-                logger.info("Добавление столбца 'sub' в таблицу players")
-                cursor.execute("ALTER TABLE players ADD COLUMN sub TEXT DEFAULT NULL")
-            
-            # Проверяем наличие столбцов discord_username и discord_id в таблице players
-            if "discord_username" not in columns:
-                logger.info("Добавление столбца 'discord_username' в таблицу players")
-                cursor.execute("ALTER TABLE players ADD COLUMN discord_username TEXT DEFAULT NULL")
-            
-            if "discord_id" not in columns:
-                logger.info("Добавление столбца 'discord_id' в таблицу players")
-                cursor.execute("ALTER TABLE players ADD COLUMN discord_id TEXT DEFAULT NULL")
-            
-            # Таблица администраторов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS admins (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    telegram_id INTEGER UNIQUE NOT NULL,
-                    username TEXT,
-                    added_date TIMESTAMP NOT NULL
-                )
-            ''')
-            
-            # Таблица статистики
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TIMESTAMP NOT NULL,
-                    registrations_count INTEGER DEFAULT 0,
-                    approved_count INTEGER DEFAULT 0,
-                    rejected_count INTEGER DEFAULT 0
-                )
-            ''')
-            
-            # Добавляем дефолтного админа, если таблица пуста
-            cursor.execute('SELECT COUNT(*) FROM admins')
-            if cursor.fetchone()[0] == 0:
-                cursor.execute(
-                    'INSERT INTO admins (telegram_id, username, added_date) VALUES (?, ?, ?)',
-                    (123456789, 'admin', datetime.now())  # Замените на реальный ID администратора
-                )
-            
-            conn.commit()
+    def init_db(self) -> None:
+        """
+        Инициализация базы данных: применение недостающих миграций схемы.
+
+        При актуальной схеме выполняется только чтение PRAGMA user_version.
+        """
+        with self.pool.reader() as conn:
+            version = schema_version(conn)
+        if version == LATEST_VERSION:
+            return
+
+        with self.pool.writer() as conn:
+            # Версию проверяем повторно: другой процесс мог применить миграции раньше
+            version = migrate(conn)
+        logger.info(f"Схема базы данных обновлена до версии {version}")
 
     # ----- Методы для работы с турнирами -----
     
@@ -130,7 +147,7 @@ class Database:
             ID созданного турнира
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -139,7 +156,7 @@ class Database:
                 ''', (name, description, event_date, True, datetime.now()))
                 
                 tournament_id = cursor.lastrowid
-                conn.commit()
+                self.pool.after_commit(self.tournaments.invalidate)
                 return tournament_id
         except sqlite3.IntegrityError as e:
             if "UNIQUE constraint failed: tournaments.name" in str(e):
@@ -151,37 +168,31 @@ class Database:
         Получить список всех турниров.
         
         Returns:
-            Список словарей с данными турниров
+            Список словарей с данными турниров. Каждый турнир содержит количество
+            регистраций: team_count (всего), pending_count, approved_count,
+            rejected_count
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             
+            # Количество регистраций по статусам считается одним запросом для всех турниров
             cursor.execute('''
-                SELECT id, name, description, event_date, registration_open, created_date
-                FROM tournaments
-                ORDER BY created_date DESC
+                SELECT t.id, t.name, t.description, t.event_date, t.registration_open, t.created_date,
+                    COUNT(tt.team_id) AS team_count,
+                    COUNT(CASE WHEN tt.status = 'pending' THEN 1 END) AS pending_count,
+                    COUNT(CASE WHEN tt.status = 'approved' THEN 1 END) AS approved_count,
+                    COUNT(CASE WHEN tt.status = 'rejected' THEN 1 END) AS rejected_count
+                FROM tournaments t
+                LEFT JOIN team_tournaments tt ON tt.tournament_id = t.id
+                GROUP BY t.id
+                ORDER BY t.created_date DESC
             ''')
             
-            tournaments = []
-            for tournament in cursor.fetchall():
-                tournament_dict = dict(tournament)
-                
-                # Добавляем количество команд для каждого турнира
-                cursor.execute('''
-                    SELECT COUNT(*) FROM teams WHERE tournament_id = ?
-                ''', (tournament['id'],))
-                
-                team_count = cursor.fetchone()[0]
-                tournament_dict['team_count'] = team_count
-                
-                tournaments.append(tournament_dict)
-                
-            return tournaments
+            return [dict(tournament) for tournament in cursor.fetchall()]
     
     def get_tournament_by_id(self, tournament_id: int) -> Optional[Dict[str, Any]]:
         """
-        Получить информацию о турнире по ID.
+        Получить информацию о турнире по ID (из каталога турниров в памяти).
         
         Args:
             tournament_id: ID турнира
@@ -189,21 +200,7 @@ class Database:
         Returns:
             Словарь с данными турнира или None, если турнир не найден
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, name, description, event_date, registration_open, created_date
-                FROM tournaments
-                WHERE id = ?
-            ''', (tournament_id,))
-            
-            tournament = cursor.fetchone()
-            if not tournament:
-                return None
-                
-            return dict(tournament)
+        return self.tournaments.get(tournament_id)
     
     def update_tournament(self, tournament_id: int, name: str = None, description: str = None, 
                          event_date: str = None, registration_open: bool = None) -> bool:
@@ -221,7 +218,7 @@ class Database:
             True, если обновление успешно, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Формируем запрос и параметры в зависимости от переданных данных
@@ -253,7 +250,10 @@ class Database:
                 params.append(tournament_id)
                 
                 cursor.execute(sql, params)
-                conn.commit()
+                
+                self.pool.after_commit(self.tournaments.invalidate)
+                # Название и дата турнира входят в данные команд в кэше
+                self.pool.after_commit(self.team_cache.clear)
                 
                 return cursor.rowcount > 0
         except sqlite3.IntegrityError as e:
@@ -261,38 +261,27 @@ class Database:
                 raise ValueError("Турнир с таким названием уже существует")
             raise e
     
-    def close_tournament_registration(self, tournament_id: int) -> bool:
-        """
-        Закрыть регистрацию на турнир.
-        
-        Args:
-            tournament_id: ID турнира
-            
-        Returns:
-            True, если обновление успешно, иначе False
-        """
-        return self.update_tournament(tournament_id, registration_open=False)
-    
     def get_active_tournaments(self) -> List[Dict[str, Any]]:
         """
-        Получить список всех турниров с открытой регистрацией.
+        Получить список всех турниров с открытой регистрацией (из каталога турниров в памяти).
         
         Returns:
             Список словарей с данными турниров
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        return self.tournaments.active()
+    
+    def _load_tournaments(self) -> List[Dict[str, Any]]:
+        """Загрузить все турниры для каталога."""
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
                 SELECT id, name, description, event_date, registration_open, created_date
                 FROM tournaments
-                WHERE registration_open = 1
                 ORDER BY created_date DESC
             ''')
             
-            tournaments = [dict(t) for t in cursor.fetchall()]
-            return tournaments
+            return [dict(t) for t in cursor.fetchall()]
     
     def delete_tournament(self, tournament_id: int) -> bool:
         """
@@ -305,7 +294,7 @@ class Database:
             True, если удаление успешно, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Получаем список команд, зарегистрированных на турнир
@@ -316,13 +305,15 @@ class Database:
                 for team_id in team_ids:
                     cursor.execute('DELETE FROM players WHERE team_id = ?', (team_id,))
                 
-                # Удаляем команды
+                # Удаляем команды и регистрации на турнир
                 cursor.execute('DELETE FROM teams WHERE tournament_id = ?', (tournament_id,))
+                cursor.execute('DELETE FROM team_tournaments WHERE tournament_id = ?', (tournament_id,))
+                self.pool.after_commit(self.team_cache.clear)
+                self.pool.after_commit(self.tournaments.invalidate)
                 
                 # Удаляем турнир
                 cursor.execute('DELETE FROM tournaments WHERE id = ?', (tournament_id,))
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Ошибка при удалении турнира: {e}")
@@ -342,7 +333,7 @@ class Database:
             ID созданной команды
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Добавляем команду
@@ -375,132 +366,206 @@ class Database:
                     ))
                 
                 # Обновляем статистику
-                today = datetime.now().date()
-                cursor.execute(
-                    'SELECT id FROM stats WHERE date(date) = date(?)', 
-                    (today.isoformat(),)
-                )
+                self._bump_stats(cursor, registrations=1)
                 
-                stat_id = cursor.fetchone()
-                if stat_id:
-                    cursor.execute(
-                        'UPDATE stats SET registrations_count = registrations_count + 1 WHERE id = ?',
-                        (stat_id[0],)
-                    )
-                else:
-                    cursor.execute(
-                        'INSERT INTO stats (date, registrations_count) VALUES (?, 1)',
-                        (datetime.now(),)
-                    )
-                
-                conn.commit()
                 return team_id
         except sqlite3.IntegrityError as e:
             if "UNIQUE constraint failed: teams.team_name" in str(e):
                 raise ValueError("Команда с таким названием уже существует")
             raise e
         
-    def get_user_teams(self, telegram_id: int) -> List[Dict[str, Any]]:
+    def import_teams(self, teams: List[Dict[str, Any]], status: str = 'pending') -> Tuple[List[int], Dict[int, str]]:
         """
-        Получить список всех команд, в которых участвует пользователь.
+        Импортировать набор команд с игроками одной транзакцией.
+        
+        Проверяет уникальность названий команд и Telegram ID игроков по базе:
+        команды с нарушениями пропускаются, остальные вставляются. Команда,
+        название которой все же конфликтует при вставке, тоже пропускается
+        как дубликат, не отменяя остальные. Проверку формата данных выполняет
+        вызывающий код (см. team_import.py).
         
         Args:
-            telegram_id: Telegram ID пользователя
+            teams: Список команд: team_name, captain_contact, tournament_id (опционально)
+                   и players - список словарей с полями nickname, username,
+                   telegram_id, discord_username, discord_id, is_captain
+            status: Статус импортируемых команд и их регистраций на турниры
             
         Returns:
-            Список словарей с данными команд
+            Кортеж (ID добавленных команд, {индекс команды в teams: текст ошибки})
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        errors: Dict[int, str] = {}
+        
+        for index, team in enumerate(teams):
+            tournament_id = team.get('tournament_id')
+            if tournament_id and not self.tournaments.get(tournament_id):
+                errors[index] = f"Турнир {tournament_id} не найден"
+        
+        names = json.dumps([team['team_name'] for team in teams])
+        telegram_ids = json.dumps([
+            player['telegram_id'] for team in teams for player in team['players'] if player.get('telegram_id')
+        ])
+        
+        with self.pool.writer() as conn:
             cursor = conn.cursor()
             
-            # Получаем список команд, где пользователь является игроком
+            # Названия сравниваются через LOWER() в SQL, как в team_name_exists:
+            # str.lower() в Python меняет и не латинские буквы, а LOWER() - нет
             cursor.execute('''
-                SELECT DISTINCT t.id, t.team_name, t.status, t.registration_date, 
-                    t.captain_contact, t.admin_comment, t.tournament_id
-                FROM teams t
-                JOIN players p ON t.id = p.team_id
-                WHERE p.telegram_id = ?
-                ORDER BY t.registration_date DESC
-            ''', (telegram_id,))
-            
-            teams = []
+                SELECT j.key FROM json_each(?) j
+                WHERE EXISTS (SELECT 1 FROM teams WHERE LOWER(team_name) = LOWER(j.value))
+            ''', (names,))
+            name_taken = {row[0] for row in cursor.fetchall()}
             
-            for team in cursor.fetchall():
-                team_dict = dict(team)
-                
-                # Получаем игроков для каждой команды
+            cursor.execute('''
+                SELECT p.telegram_id, t.team_name FROM players p
+                JOIN teams t ON t.id = p.team_id
+                WHERE p.telegram_id IN (SELECT value FROM json_each(?))
+            ''', (telegram_ids,))
+            registered = {row[0]: row[1] for row in cursor.fetchall()}
+            
+            for index, team in enumerate(teams):
+                if index in errors:
+                    continue
+                if index in name_taken:
+                    errors[index] = "Команда с таким названием уже существует"
+                    continue
+                for player in team['players']:
+                    other_team = registered.get(player.get('telegram_id'))
+                    if other_team:
+                        errors[index] = f"Игрок {player['nickname']} уже зарегистрирован в команде '{other_team}'"
+                        break
+            
+            now = datetime.now()
+            team_ids: Dict[str, int] = {}
+            for index, team in enumerate(teams):
+                if index in errors:
+                    continue
+                # Повтор названия внутри пачки и конфликт при вставке - дубликаты, а не ошибка пачки
+                if team['team_name'] in team_ids:
+                    errors[index] = "Команда с таким названием уже существует"
+                    continue
                 cursor.execute('''
-                    SELECT id, nickname, telegram_username, telegram_id, discord_username, discord_id, is_captain
-                    FROM players
-                    WHERE team_id = ?
-                ''', (team['id'],))
-                
-                players = [dict(p) for p in cursor.fetchall()]
-                team_dict['players'] = players
-                
-                # Если у команды есть привязка к турниру, получаем информацию о турнире
-                if team_dict['tournament_id']:
-                    cursor.execute('''
-                        SELECT name, event_date
-                        FROM tournaments
-                        WHERE id = ?
-                    ''', (team_dict['tournament_id'],))
-                    
-                    tournament = cursor.fetchone()
-                    if tournament:
-                        team_dict['tournament_name'] = tournament['name']
-                        team_dict['tournament_date'] = tournament['event_date']
-                
-                teams.append(team_dict)
+                    INSERT INTO teams (team_name, captain_contact, registration_date, status)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (team_name) DO NOTHING
+                ''', (team['team_name'], team['captain_contact'], now, status))
+                if cursor.rowcount == 0:
+                    errors[index] = "Команда с таким названием уже существует"
+                    continue
+                team_ids[team['team_name']] = cursor.lastrowid
+            
+            accepted = [team for index, team in enumerate(teams) if index not in errors]
+            if not accepted:
+                return [], errors
+            
+            cursor.executemany('''
+                INSERT INTO players (team_id, nickname, telegram_username, telegram_id, discord_username, discord_id, is_captain)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    team_ids[team['team_name']],
+                    player['nickname'],
+                    player['username'],
+                    player.get('telegram_id'),
+                    player.get('discord_username'),
+                    player.get('discord_id'),
+                    player.get('is_captain', False)
+                )
+                for team in accepted for player in team['players']
+            ])
+            
+            cursor.executemany('''
+                INSERT INTO team_tournaments (team_id, tournament_id, status)
+                VALUES (?, ?, ?)
+            ''', [
+                (team_ids[team['team_name']], team['tournament_id'], status)
+                for team in accepted if team.get('tournament_id')
+            ])
+            
+            self._bump_stats(
+                cursor,
+                registrations=len(accepted),
+                approved=len(accepted) if status == 'approved' else 0
+            )
+            
+            return [team_ids[team['team_name']] for team in accepted], errors
+        
+    def get_user_teams(self, telegram_id: int) -> List[Dict[str, Any]]:
+        """
+        Получить список всех команд, в которых участвует пользователь.
+        
+        Args:
+            telegram_id: Telegram ID пользователя
             
-            return teams
+        Returns:
+            Список словарей с данными команд
+        """
+        with self.pool.reader() as conn:
+            return self._load_teams(
+                conn.cursor(),
+                't.id IN (SELECT team_id FROM players WHERE telegram_id = ?)',
+                (telegram_id,)
+            )
+
+    def _load_teams(self, cursor: sqlite3.Cursor, where: str, params: Tuple[Any, ...] = (),
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Общий загрузчик команд для всех методов поиска команд.
+
+        Выполняет не более трех запросов независимо от количества команд:
+        сами команды (вместе с устаревшей привязкой teams.tournament_id),
+        их игроки и их регистрации на турниры.
+
+        Args:
+            cursor: Курсор открытого соединения
+            where: Условие отбора по таблице teams (псевдоним t)
+            params: Параметры условия
+            limit: Максимальное количество команд
+
+        Returns:
+            Список словарей с данными команд, включая 'players' и 'tournaments'
+        """
+        query = f'''
+            SELECT t.id, t.team_name, t.status, t.registration_date,
+                t.captain_contact, t.admin_comment, t.tournament_id,
+                lt.name AS tournament_name, lt.event_date AS tournament_date
+            FROM teams t
+            LEFT JOIN tournaments lt ON lt.id = t.tournament_id
+            WHERE {where}
+            ORDER BY t.registration_date DESC
+        '''
+        if limit is not None:
+            query += f' LIMIT {int(limit)}'
+
+        cursor.execute(query, params)
+
+        teams = []
+        for row in cursor.fetchall():
+            team = dict(row)
+            # Название и дата турнира добавляются только при наличии привязки
+            if team['tournament_name'] is None:
+                del team['tournament_name']
+                del team['tournament_date']
+            teams.append(team)
+
+        return self._hydrate_teams(cursor, teams)
 
     def get_team_by_id(self, team_id: int) -> Optional[Dict[str, Any]]:
         """
         Получить данные о команде по ее ID.
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Получаем информацию о команде
-            cursor.execute('''
-                SELECT id, team_name, status, registration_date, 
-                    admin_comment, captain_contact
-                FROM teams
-                WHERE id = ?
-            ''', (team_id,))
-            
-            team = cursor.fetchone()
-            if not team:
-                return None
-            
-            # Получаем список игроков
-            cursor.execute('''
-                SELECT id, nickname, telegram_username, telegram_id, 
-                    discord_username, discord_id, is_captain
-                FROM players
-                WHERE team_id = ?
-            ''', (team_id,))
-            
-            players = cursor.fetchall()
-            
-            # Получаем все турниры, на которые зарегистрирована команда
-            cursor.execute('''
-                SELECT t.id, t.name, t.event_date, tt.status as registration_status
-                FROM tournaments t
-                JOIN team_tournaments tt ON t.id = tt.tournament_id
-                WHERE tt.team_id = ?
-            ''', (team_id,))
-            
-            tournaments = cursor.fetchall()
-            
-            team_dict = dict(team)
-            team_dict['players'] = [dict(p) for p in players]
-            team_dict['tournaments'] = [dict(t) for t in tournaments]
-            
-            return team_dict
+        team = self.team_cache.get(team_id)
+        if team is not None:
+            return team
+
+        generation = self.team_cache.generation
+        with self.pool.reader() as conn:
+            teams = self._load_teams(conn.cursor(), 't.id = ?', (team_id,))
+
+        if not teams:
+            return None
+        self.team_cache.put(team_id, teams[0], generation)
+        return teams[0]
 
     def get_team_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -512,59 +577,13 @@ class Database:
         Returns:
             Словарь с данными команды или None, если команда не найдена
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row  # Для получения словарей вместо кортежей
-            cursor = conn.cursor()
-            
-            # Находим team_id по telegram_id игрока
-            cursor.execute('''
-                SELECT team_id FROM players WHERE telegram_id = ?
-            ''', (telegram_id,))
-            
-            player = cursor.fetchone()
-            if not player:
-                return None
-            
-            team_id = player['team_id']
-            
-            # Получаем информацию о команде
-            cursor.execute('''
-                SELECT id, team_name, status, registration_date, admin_comment, captain_contact, tournament_id
-                FROM teams
-                WHERE id = ?
-            ''', (team_id,))
-            
-            team = cursor.fetchone()
-            if not team:
-                return None
-            
-            # Получаем список игроков
-            cursor.execute('''
-                SELECT id, nickname, telegram_username, telegram_id, discord_username, discord_id, is_captain
-                FROM players
-                WHERE team_id = ?
-            ''', (team_id,))
-            
-            players = cursor.fetchall()
-            
-            team_dict = dict(team)
-            
-            # Если у команды есть турнир, получаем информацию о нём
-            if team_dict['tournament_id']:
-                cursor.execute('''
-                    SELECT name, event_date
-                    FROM tournaments
-                    WHERE id = ?
-                ''', (team_dict['tournament_id'],))
-                
-                tournament = cursor.fetchone()
-                if tournament:
-                    team_dict['tournament_name'] = tournament['name']
-                    team_dict['tournament_date'] = tournament['event_date']
-            
-            # Форматируем результат
-            team_dict['players'] = [dict(p) for p in players]
-            return team_dict
+        with self.pool.reader() as conn:
+            teams = self._load_teams(
+                conn.cursor(),
+                't.id = (SELECT team_id FROM players WHERE telegram_id = ? LIMIT 1)',
+                (telegram_id,)
+            )
+            return teams[0] if teams else None
 
     def get_team_by_name(self, team_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -576,55 +595,17 @@ class Database:
         Returns:
             Словарь с данными команды или None, если команда не найдена
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
+        with self.pool.reader() as conn:
             # Ищем команду по названию (без учета регистра)
-            cursor.execute('''
-                SELECT id, team_name, status, registration_date, admin_comment, captain_contact, tournament_id
-                FROM teams
-                WHERE LOWER(team_name) = LOWER(?)
-            ''', (team_name,))
-            
-            team = cursor.fetchone()
-            if not team:
-                return None
-            
-            # Получаем список игроков
-            cursor.execute('''
-                SELECT id, nickname, telegram_username, telegram_id, discord_username, discord_id, is_captain
-                FROM players
-                WHERE team_id = ?
-            ''', (team['id'],))
-            
-            players = cursor.fetchall()
-            
-            team_dict = dict(team)
-            
-            # Если у команды есть турнир, получаем информацию о нём
-            if team_dict['tournament_id']:
-                cursor.execute('''
-                    SELECT name, event_date
-                    FROM tournaments
-                    WHERE id = ?
-                ''', (team_dict['tournament_id'],))
-                
-                tournament = cursor.fetchone()
-                if tournament:
-                    team_dict['tournament_name'] = tournament['name']
-                    team_dict['tournament_date'] = tournament['event_date']
-            
-            # Форматируем результат
-            team_dict['players'] = [dict(p) for p in players]
-            return team_dict
+            teams = self._load_teams(conn.cursor(), 'LOWER(t.team_name) = LOWER(?)', (team_name,), limit=1)
+            return teams[0] if teams else None
 
     def register_team_for_tournament(self, team_id: int, tournament_id: int) -> bool:
         """
         Регистрирует команду на турнир.
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем, существует ли команда
@@ -672,7 +653,11 @@ class Database:
                 # Обновляем статус команды
                 cursor.execute('UPDATE teams SET status = ? WHERE id = ?', ('pending', team_id))
                 
-                conn.commit()
+                # Учитываем заявку в статистике регистраций
+                self._bump_stats(cursor, registrations=1)
+                
+                self._invalidate_teams(team_id)
+                
                 return True
                 
         except Exception as e:
@@ -682,7 +667,7 @@ class Database:
     def register_team_for_multiple_tournaments(self, team_id: int, tournament_ids: List[int]) -> bool:
         """Регистрация команды на несколько турниров."""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 for tournament_id in tournament_ids:
@@ -692,7 +677,8 @@ class Database:
                         VALUES (?, ?, ?)
                     ''', (team_id, tournament_id, 'pending'))
                 
-                conn.commit()
+                self._invalidate_teams(team_id)
+                
                 return True
         except Exception as e:
             logger.error(f"Ошибка при регистрации команды на турниры: {e}")
@@ -700,8 +686,7 @@ class Database:
 
     def get_team_tournaments(self, team_id: int) -> List[Dict[str, Any]]:
         """Получить список турниров, на которые зарегистрирована команда."""
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -725,7 +710,7 @@ class Database:
             ID созданной команды
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем уникальность названия команды
@@ -755,7 +740,6 @@ class Database:
                     True
                 ))
                 
-                conn.commit()
                 return team_id
         except sqlite3.IntegrityError as e:
             raise ValueError(f"Ошибка при создании команды: {str(e)}")
@@ -772,7 +756,7 @@ class Database:
             True в случае успеха, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем, существует ли команда
@@ -830,7 +814,8 @@ class Database:
                 if team_status in ["pending", "approved", "rejected"]:
                     cursor.execute('UPDATE teams SET status = ? WHERE id = ?', ("draft", team_id))
                 
-                conn.commit()
+                self._invalidate_teams(team_id)
+                
                 return True
         except Exception as e:
             logger.error(f"Ошибка при добавлении игрока: {e}")
@@ -847,7 +832,7 @@ class Database:
         Returns:
             True, если игрок с таким username уже есть в команде, иначе False
         """
-        with sqlite3.connect(self.db_file) as conn:
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 1 FROM players 
@@ -867,7 +852,7 @@ class Database:
         Returns:
             True, если игрок с таким Discord username уже есть в команде, иначе False
         """
-        with sqlite3.connect(self.db_file) as conn:
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             
             if exclude_player_id:
@@ -894,7 +879,7 @@ class Database:
         Returns:
             True, если игрок с таким никнеймом уже есть в команде, иначе False
         """
-        with sqlite3.connect(self.db_file) as conn:
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 1 FROM players 
@@ -914,7 +899,7 @@ class Database:
             True в случае успеха, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем, существует ли команда
@@ -938,7 +923,8 @@ class Database:
                 if team_status in ["pending", "approved", "rejected"]:
                     cursor.execute('UPDATE teams SET status = ? WHERE id = ?', ("draft", team_id))
                 
-                conn.commit()
+                self._invalidate_teams(team_id)
+                
                 return True
         except Exception as e:
             logger.error(f"Ошибка при обновлении названия команды: {e}")
@@ -956,7 +942,7 @@ class Database:
             True в случае успеха, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Получаем информацию о команде игрока
@@ -990,7 +976,8 @@ class Database:
                 if team_status in ["pending", "approved", "rejected"]:
                     cursor.execute('UPDATE teams SET status = ? WHERE id = ?', ("draft", team_id))
                 
-                conn.commit()
+                self._invalidate_teams(team_id)
+                
                 return True
         except Exception as e:
             logger.error(f"Ошибка при обновлении никнейма игрока: {e}")
@@ -1008,7 +995,7 @@ class Database:
             True в случае успеха, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Получаем информацию о команде игрока
@@ -1042,7 +1029,8 @@ class Database:
                 if team_status in ["pending", "approved", "rejected"]:
                     cursor.execute('UPDATE teams SET status = ? WHERE id = ?', ("draft", team_id))
                 
-                conn.commit()
+                self._invalidate_teams(team_id)
+                
                 return True
         except Exception as e:
             logger.error(f"Ошибка при обновлении Telegram username игрока: {e}")
@@ -1061,7 +1049,7 @@ class Database:
             True в случае успеха, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Получаем информацию о команде игрока
@@ -1090,7 +1078,8 @@ class Database:
                 if team_status in ["pending", "approved", "rejected"]:
                     cursor.execute('UPDATE teams SET status = ? WHERE id = ?', ("draft", team_id))
                 
-                conn.commit()
+                self._invalidate_teams(team_id)
+                
                 return True
         except Exception as e:
             logger.error(f"Ошибка при обновлении Discord данных игрока: {e}")
@@ -1109,15 +1098,94 @@ class Database:
         """
         try:
             sub_status = "+" if is_subscribed else "-"
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
-                cursor.execute('UPDATE players SET sub = ? WHERE id = ?', (sub_status, player_id))
-                conn.commit()
+                cursor.execute(
+                    'UPDATE players SET sub = ?, sub_verified_at = ? WHERE id = ?',
+                    (sub_status, datetime.now(), player_id)
+                )
                 return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Ошибка при обновлении статуса подписки игрока: {e}")
             return False
 
+    def update_players_subscription(self, subscriptions: Dict[int, bool]) -> int:
+        """
+        Обновить статусы подписки нескольких игроков одной транзакцией.
+        
+        Args:
+            subscriptions: Словарь {ID игрока: подписан ли на канал}
+            
+        Returns:
+            Количество обновленных игроков
+        """
+        if not subscriptions:
+            return 0
+        now = datetime.now()
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    'UPDATE players SET sub = ?, sub_verified_at = ? WHERE id = ?',
+                    [
+                        ("+" if is_subscribed else "-", now, player_id)
+                        for player_id, is_subscribed in subscriptions.items()
+                    ]
+                )
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении статуса подписки игроков: {e}")
+            return 0
+
+    def get_players_subscription(self, player_ids: List[int], max_age: float) -> Dict[int, bool]:
+        """
+        Получить сохраненные статусы подписки, проверенные не раньше max_age секунд назад.
+        
+        Args:
+            player_ids: ID игроков
+            max_age: Срок жизни результата проверки, секунд
+            
+        Returns:
+            Словарь {ID игрока: подписан ли} только для игроков с актуальным статусом
+        """
+        if not player_ids:
+            return {}
+        
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, sub FROM players
+                WHERE id IN (SELECT value FROM json_each(?))
+                    AND sub IS NOT NULL AND sub_verified_at >= ?
+            ''', (json.dumps(list(player_ids)), datetime.now() - timedelta(seconds=max_age)))
+            return {row[0]: row[1] == "+" for row in cursor.fetchall()}
+
+    def get_stale_subscriptions(self, max_age: float, limit: int = 50, status: str = 'approved') -> List[Dict[str, Any]]:
+        """
+        Получить игроков, статус подписки которых не проверялся дольше max_age секунд.
+        
+        Args:
+            max_age: Срок жизни результата проверки, секунд
+            limit: Максимальное количество игроков
+            status: Статус команд, игроков которых нужно перепроверять
+            
+        Returns:
+            Список словарей (id, nickname, telegram_id): сначала никогда не
+            проверенные, затем проверенные раньше всех
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT p.id, p.nickname, p.telegram_id
+                FROM players p
+                JOIN teams t ON t.id = p.team_id
+                WHERE t.status = ? AND p.telegram_id IS NOT NULL
+                    AND (p.sub_verified_at IS NULL OR p.sub_verified_at < ?)
+                ORDER BY p.sub_verified_at IS NOT NULL, p.sub_verified_at, p.id
+                LIMIT ?
+            ''', (status, datetime.now() - timedelta(seconds=max_age), limit))
+            return [dict(row) for row in cursor.fetchall()]
+
     def delete_player(self, player_id: int) -> bool:
         """
         Удалить игрока из команды.
@@ -1129,7 +1197,7 @@ class Database:
             True в случае успеха, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Получаем информацию о команде игрока
@@ -1159,12 +1227,101 @@ class Database:
                 if team_status in ["pending", "approved", "rejected"]:
                     cursor.execute('UPDATE teams SET status = ? WHERE id = ?', ("draft", team_id))
                 
-                conn.commit()
+                self._invalidate_teams(team_id)
+                
                 return True
         except Exception as e:
             logger.error(f"Ошибка при удалении игрока: {e}")
             raise ValueError(str(e))
 
+    def save_telegram_ids(self, entries: Dict[str, Optional[int]]) -> int:
+        """
+        Сохранить результаты разрешения username в справочник telegram_users.
+        
+        Args:
+            entries: Словарь {username: Telegram ID или None, если username
+                     никому не принадлежит}
+            
+        Returns:
+            Количество сохраненных записей
+        """
+        if not entries:
+            return 0
+        entries = {username.lstrip("@").lower(): telegram_id for username, telegram_id in entries.items()}
+        now = datetime.now()
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                # Прежние username пользователя (он сменил username) ему больше не принадлежат
+                cursor.executemany(
+                    'DELETE FROM telegram_users WHERE telegram_id = ? AND username != ?',
+                    [(telegram_id, username) for username, telegram_id in entries.items() if telegram_id is not None]
+                )
+                cursor.executemany('''
+                    INSERT INTO telegram_users (username, telegram_id, resolved_at) VALUES (?, ?, ?)
+                    ON CONFLICT(username) DO UPDATE SET
+                        telegram_id = excluded.telegram_id, resolved_at = excluded.resolved_at
+                ''', [(username, telegram_id, now) for username, telegram_id in entries.items()])
+                return len(entries)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении справочника Telegram ID: {e}")
+            return 0
+
+    def get_telegram_ids(self, usernames: List[str], max_age: float,
+                         negative_max_age: float) -> Dict[str, Optional[int]]:
+        """
+        Получить Telegram ID из справочника telegram_users.
+        
+        Args:
+            usernames: Список username (без учета регистра, @ необязателен)
+            max_age: Срок жизни найденного Telegram ID, секунд
+            negative_max_age: Срок жизни записи "username никому не принадлежит", секунд
+            
+        Returns:
+            Словарь {username в нижнем регистре: Telegram ID или None} только
+            для актуальных записей; отсутствующие username нужно запросить у Telegram
+        """
+        if not usernames:
+            return {}
+        now = datetime.now()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT username, telegram_id FROM telegram_users
+                WHERE username IN (SELECT value FROM json_each(?))
+                    AND resolved_at >= CASE WHEN telegram_id IS NULL THEN ? ELSE ? END
+            ''', (
+                json.dumps([username.lstrip("@").lower() for username in usernames]),
+                now - timedelta(seconds=negative_max_age),
+                now - timedelta(seconds=max_age),
+            ))
+            return {row['username']: row['telegram_id'] for row in cursor.fetchall()}
+
+    def get_stale_usernames(self, max_age: float, limit: int = 100) -> List[str]:
+        """
+        Получить username игроков, которых нет в справочнике или запись о которых старше max_age секунд.
+        
+        Args:
+            max_age: Срок жизни записи справочника, секунд
+            limit: Максимальное количество username
+            
+        Returns:
+            Username в нижнем регистре: сначала отсутствующие в справочнике,
+            затем разрешенные раньше всех
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT LOWER(p.telegram_username) AS username
+                FROM players p
+                LEFT JOIN telegram_users u ON u.username = LOWER(p.telegram_username)
+                WHERE p.telegram_username != '' AND (u.username IS NULL OR u.resolved_at < ?)
+                GROUP BY LOWER(p.telegram_username)
+                ORDER BY MAX(u.resolved_at IS NOT NULL), MAX(u.resolved_at), username
+                LIMIT ?
+            ''', (datetime.now() - timedelta(seconds=max_age), limit))
+            return [row['username'] for row in cursor.fetchall()]
+
     def team_name_exists(self, team_name: str) -> bool:
         """
         Проверить, существует ли команда с указанным названием.
@@ -1175,7 +1332,7 @@ class Database:
         Returns:
             True, если команда существует, иначе False
         """
-        with sqlite3.connect(self.db_file) as conn:
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 1 FROM teams WHERE LOWER(team_name) = LOWER(?)
@@ -1195,7 +1352,7 @@ class Database:
             True, если обновление успешно, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
                 # Получаем текущий статус, чтобы обновить статистику
@@ -1203,6 +1360,8 @@ class Database:
                 current_status = cursor.fetchone()
                 
                 if current_status:
+                    self._invalidate_teams(team_id)
+                    
                     # Обновляем статус и комментарий
                     if comment is not None:
                         cursor.execute('''
@@ -1219,35 +1378,12 @@ class Database:
                     
                     # Обновляем статистику только если статус изменился
                     if current_status[0] != status:
-                        today = datetime.now().date()
-                        cursor.execute(
-                            'SELECT id FROM stats WHERE date(date) = date(?)', 
-                            (today.isoformat(),)
+                        self._bump_stats(
+                            cursor,
+                            approved=int(status == 'approved'),
+                            rejected=int(status == 'rejected')
                         )
-                        
-                        stat_id = cursor.fetchone()
-                        if stat_id:
-                            if status == 'approved':
-                                cursor.execute(
-                                    'UPDATE stats SET approved_count = approved_count + 1 WHERE id = ?',
-                                    (stat_id[0],)
-                                )
-                            elif status == 'rejected':
-                                cursor.execute(
-                                    'UPDATE stats SET rejected_count = rejected_count + 1 WHERE id = ?',
-                                    (stat_id[0],)
-                                )
-                        else:
-                            # Создаем новую запись в статистике
-                            approved_count = 1 if status == 'approved' else 0
-                            rejected_count = 1 if status == 'rejected' else 0
-                            
-                            cursor.execute('''
-                                INSERT INTO stats (date, approved_count, rejected_count)
-                                VALUES (?, ?, ?)
-                            ''', (datetime.now(), approved_count, rejected_count))
                     
-                    conn.commit()
                     return True
                 
                 return False
@@ -1255,86 +1391,429 @@ class Database:
             print(f"Ошибка при обновлении статуса команды: {e}")
             return False
 
+    def update_registrations_status(self, tournament_id: int, status: str,
+                                    team_ids: Optional[List[int]] = None,
+                                    current_status: Optional[str] = None) -> Dict[int, str]:
+        """
+        Массово изменить статус регистраций на турнир в одной транзакции.
+        
+        Статус регистрации (team_tournaments) и общий статус команды (teams)
+        обновляются через executemany, статистика - одним UPSERT на весь набор.
+        
+        Args:
+            tournament_id: ID турнира
+            status: Новый статус ('pending', 'approved', 'rejected')
+            team_ids: ID команд; None - все команды турнира
+            current_status: Обновлять только регистрации с этим статусом
+                            (например, 'pending' - "одобрить все ожидающие")
+            
+        Returns:
+            Словарь {ID команды: прежний статус} для всех найденных регистраций.
+            Регистрации, уже имевшие статус status, не изменяются
+        """
+        if status not in ('pending', 'approved', 'rejected'):
+            raise ValueError(f"Неверный статус регистрации: {status}")
+        
+        query = 'SELECT team_id, status FROM team_tournaments WHERE tournament_id = ?'
+        params: List[Any] = [tournament_id]
+        if team_ids is not None:
+            if not team_ids:
+                return {}
+            query += ' AND team_id IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(list(team_ids)))
+        if current_status:
+            query += ' AND status = ?'
+            params.append(current_status)
+        
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            previous = {row[0]: row[1] for row in cursor.fetchall()}
+            
+            changed = [team_id for team_id, old_status in previous.items() if old_status != status]
+            if not changed:
+                return previous
+            
+            cursor.executemany(
+                'UPDATE team_tournaments SET status = ? WHERE team_id = ? AND tournament_id = ?',
+                [(status, team_id, tournament_id) for team_id in changed]
+            )
+            cursor.executemany(
+                'UPDATE teams SET status = ? WHERE id = ?',
+                [(status, team_id) for team_id in changed]
+            )
+            
+            self._bump_stats(
+                cursor,
+                approved=len(changed) if status == 'approved' else 0,
+                rejected=len(changed) if status == 'rejected' else 0
+            )
+            self._invalidate_teams(*changed)
+            
+            return previous
+
+    def _teams_filter(self, status: Optional[str], tournament_id: Optional[int]) -> Tuple[str, List[Any]]:
+        """
+        Условие отбора команд для get_all_teams и get_team_models.
+
+        Returns:
+            Кортеж (JOIN/WHERE-часть запроса по таблице teams с псевдонимом t, параметры)
+        """
+        clause = ''
+        params: List[Any] = []
+
+        # Если указан турнир, добавляем JOIN с team_tournaments
+        if tournament_id:
+            clause += '''
+                JOIN team_tournaments tt ON t.id = tt.team_id
+                WHERE tt.tournament_id = ?
+            '''
+            params.append(tournament_id)
+
+            # Если указан статус, проверяем его в team_tournaments
+            if status:
+                clause += ' AND tt.status = ?'
+                params.append(status)
+        else:
+            # Если турнир не указан, проверяем общий статус команды
+            if status:
+                clause += ' WHERE t.status = ?'
+                params.append(status)
+
+        return clause, params
+
     def get_all_teams(self, status: Optional[str] = None, tournament_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Получить список всех команд с опциональной фильтрацией по статусу и турниру.
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             
-            query = '''
+            clause, params = self._teams_filter(status, tournament_id)
+            cursor.execute(f'''
                 SELECT DISTINCT t.id, t.team_name, t.status, t.registration_date, 
                     t.captain_contact, t.admin_comment
                 FROM teams t
-            '''
-            
-            params = []
-            
-            # Если указан турнир, добавляем JOIN с team_tournaments
-            if tournament_id:
-                query += '''
-                    JOIN team_tournaments tt ON t.id = tt.team_id
+                {clause}
+                ORDER BY t.registration_date DESC
+            ''', params)
+            teams = [dict(team) for team in cursor.fetchall()]
+
+            return self._hydrate_teams(cursor, teams)
+
+    # ----- Типизированный API (модели из models.py) -----
+
+    def get_team_models(self, status: Optional[str] = None, tournament_id: Optional[int] = None) -> List[Team]:
+        """
+        Получить команды в виде неизменяемых моделей Team.
+
+        Фильтрация и порядок такие же, как у get_all_teams, но вместо
+        вложенных словарей возвращаются компактные объекты со __slots__ -
+        для экспорта и списков из тысяч команд.
+
+        Args:
+            status: Фильтр по статусу
+            tournament_id: Фильтр по турниру
+
+        Returns:
+            Список моделей Team с игроками и регистрациями на турниры
+        """
+        clause, params = self._teams_filter(status, tournament_id)
+        with self.pool.reader() as conn:
+            return self._load_team_models(conn.cursor(), clause, params)
+
+    def get_team_model(self, team_id: int) -> Optional[Team]:
+        """
+        Получить команду по ID в виде модели Team.
+
+        Args:
+            team_id: ID команды
+
+        Returns:
+            Модель Team или None, если команда не найдена
+        """
+        with self.pool.reader() as conn:
+            teams = self._load_team_models(conn.cursor(), 'WHERE t.id = ?', [team_id])
+            return teams[0] if teams else None
+
+    def get_tournament_models(self) -> List[Tournament]:
+        """
+        Получить все турниры в виде моделей Tournament.
+
+        Returns:
+            Список турниров от новых к старым
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(f'''
+                SELECT {Tournament.COLUMNS}
+                FROM tournaments
+                ORDER BY created_date DESC
+            ''')
+            return [Tournament.from_row(row) for row in cursor.fetchall()]
+
+    def _load_team_models(self, cursor: sqlite3.Cursor, clause: str, params: List[Any]) -> List[Team]:
+        """
+        Загрузить модели команд тремя запросами (команды, игроки, турниры).
+
+        Args:
+            cursor: Курсор открытого соединения
+            clause: JOIN/WHERE-часть запроса по таблице teams (псевдоним t)
+            params: Параметры условия
+
+        Returns:
+            Список моделей Team
+        """
+        # Строки-кортежи вместо sqlite3.Row: модели строятся по позициям столбцов
+        cursor.row_factory = None
+        cursor.execute(f'''
+            SELECT DISTINCT {Team.COLUMNS}
+            FROM teams t
+            {clause}
+            ORDER BY t.registration_date DESC
+        ''', params)
+        rows = cursor.fetchall()
+        if not rows:
+            return []
+
+        players: Dict[int, List[Player]] = {row[0]: [] for row in rows}
+        tournaments: Dict[int, List[TeamTournament]] = {row[0]: [] for row in rows}
+        team_ids = json.dumps(list(players))
+
+        cursor.execute(f'''
+            SELECT team_id, {Player.COLUMNS}
+            FROM players
+            WHERE team_id IN (SELECT value FROM json_each(?))
+            ORDER BY team_id, id
+        ''', (team_ids,))
+        for row in cursor.fetchall():
+            players[row[0]].append(Player.from_row(row[1:]))
+
+        cursor.execute(f'''
+            SELECT tt.team_id, {TeamTournament.COLUMNS}
+            FROM team_tournaments tt
+            JOIN tournaments t ON t.id = tt.tournament_id
+            WHERE tt.team_id IN (SELECT value FROM json_each(?))
+            ORDER BY tt.team_id, tt.rowid
+        ''', (team_ids,))
+        for row in cursor.fetchall():
+            tournaments[row[0]].append(TeamTournament.from_row(row[1:]))
+
+        return [
+            Team.from_row(row, tuple(players[row[0]]), tuple(tournaments[row[0]]))
+            for row in rows
+        ]
+
+    def _hydrate_teams(self, cursor: sqlite3.Cursor, teams: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Добавить к командам списки игроков ('players') и турниров ('tournaments').
+
+        Игроки и турниры загружаются двумя запросами для всего набора команд,
+        независимо от их количества.
+
+        Args:
+            cursor: Курсор открытого соединения
+            teams: Список словарей команд (должны содержать ключ 'id')
+
+        Returns:
+            Тот же список команд с заполненными 'players' и 'tournaments'
+        """
+        if not teams:
+            return teams
+
+        by_id = {}
+        for team in teams:
+            team['players'] = []
+            team['tournaments'] = []
+            by_id[team['id']] = team
+
+        # Список ID передается одним параметром в виде JSON-массива,
+        # чтобы не упираться в ограничение SQLite на количество параметров
+        team_ids = json.dumps(list(by_id))
+
+        cursor.execute('''
+            SELECT team_id, id, nickname, telegram_username, telegram_id,
+                discord_username, discord_id, is_captain
+            FROM players
+            WHERE team_id IN (SELECT value FROM json_each(?))
+            ORDER BY team_id, id
+        ''', (team_ids,))
+
+        for row in cursor.fetchall():
+            player = dict(row)
+            by_id[player.pop('team_id')]['players'].append(player)
+
+        cursor.execute('''
+            SELECT tt.team_id, t.id, t.name, t.event_date, tt.status as registration_status
+            FROM team_tournaments tt
+            JOIN tournaments t ON t.id = tt.tournament_id
+            WHERE tt.team_id IN (SELECT value FROM json_each(?))
+            ORDER BY tt.team_id, tt.rowid
+        ''', (team_ids,))
+
+        for row in cursor.fetchall():
+            tournament = dict(row)
+            by_id[tournament.pop('team_id')]['tournaments'].append(tournament)
+
+        return teams
+
+    def get_teams_page(self, status: Optional[str] = None, tournament_id: Optional[int] = None,
+                       cursor: Optional[int] = None, direction: str = "next",
+                       limit: int = 10) -> Dict[str, Any]:
+        """
+        Получить страницу списка команд (keyset-пагинация).
+
+        Команды упорядочены по (registration_date, id) от новых к старым.
+        Курсором служит ID команды на границе страницы, поэтому загружаются
+        только строки текущей страницы, без игроков и турниров.
+
+        Args:
+            status: Фильтр по статусу (статус регистрации, если указан турнир)
+            tournament_id: Фильтр по турниру
+            cursor: ID команды, от которой отсчитывается страница; None - первая страница
+            direction: "next" - команды после курсора, "prev" - перед курсором
+            limit: Размер страницы
+
+        Returns:
+            Словарь с ключами:
+            - teams: список команд (id, team_name, status, registration_date)
+            - next_cursor: курсор следующей страницы или None
+            - prev_cursor: курсор предыдущей страницы или None
+        """
+        if direction not in ("next", "prev"):
+            raise ValueError(f"Неверное направление пагинации: {direction}")
+
+        with self.pool.reader() as conn:
+            db_cursor = conn.cursor()
+
+            # Если команда-курсор была удалена, начинаем с первой страницы
+            if cursor is not None:
+                db_cursor.execute('SELECT 1 FROM teams WHERE id = ?', (cursor,))
+                if not db_cursor.fetchone():
+                    cursor, direction = None, "next"
+
+            if tournament_id is not None:
+                query = '''
+                    SELECT t.id, t.team_name, tt.status, t.registration_date
+                    FROM team_tournaments tt
+                    JOIN teams t ON t.id = tt.team_id
                     WHERE tt.tournament_id = ?
                 '''
-                params.append(tournament_id)
-                
-                # Если указан статус, проверяем его в team_tournaments
+                params: List[Any] = [tournament_id]
                 if status:
                     query += ' AND tt.status = ?'
                     params.append(status)
             else:
-                # Если турнир не указан, проверяем общий статус команды
+                query = '''
+                    SELECT t.id, t.team_name, t.status, t.registration_date
+                    FROM teams t
+                    WHERE 1 = 1
+                '''
+                params = []
                 if status:
-                    query += ' WHERE t.status = ?'
+                    query += ' AND t.status = ?'
                     params.append(status)
-                    
-            query += ' ORDER BY t.registration_date DESC'
-            
-            cursor.execute(query, params)
-            teams = []
-            
-            for team in cursor.fetchall():
-                team_dict = dict(team)
-                
-                # Получаем игроков для каждой команды
-                cursor.execute('''
-                    SELECT id, nickname, telegram_username, telegram_id, 
-                        discord_username, discord_id, is_captain
-                    FROM players
-                    WHERE team_id = ?
-                ''', (team['id'],))
-                
-                team_dict['players'] = [dict(p) for p in cursor.fetchall()]
-                
-                # Получаем турниры для команды
-                cursor.execute('''
-                    SELECT t.id, t.name, t.event_date, tt.status as registration_status
-                    FROM tournaments t
-                    JOIN team_tournaments tt ON t.id = tt.tournament_id
-                    WHERE tt.team_id = ?
-                ''', (team['id'],))
-                
-                team_dict['tournaments'] = [dict(t) for t in cursor.fetchall()]
-                
-                teams.append(team_dict)
-                
-            return teams
+
+            backwards = direction == "prev"
+            if cursor is not None:
+                query += f'''
+                    AND (t.registration_date, t.id) {'>' if backwards else '<'}
+                        (SELECT registration_date, id FROM teams WHERE id = ?)
+                '''
+                params.append(cursor)
+
+            order = 'ASC' if backwards else 'DESC'
+            query += f' ORDER BY t.registration_date {order}, t.id {order} LIMIT ?'
+            # Лишняя строка показывает, есть ли команды дальше в этом направлении
+            params.append(limit + 1)
+
+            db_cursor.execute(query, params)
+            teams = [dict(row) for row in db_cursor.fetchall()]
+
+        return self._page(teams, limit, cursor, backwards)
+
+    def count_teams(self, group_by: Tuple[str, ...] = ('status',), status: Optional[str] = None,
+                    tournament_id: Optional[int] = None) -> Dict[Any, int]:
+        """
+        Подсчитать команды одним запросом с группировкой.
+
+        Если в группировке или фильтре участвует турнир, считаются регистрации
+        из team_tournaments (статус регистрации на турнир), иначе - команды
+        по общему статусу из teams, как в get_all_teams.
+
+        Args:
+            group_by: Поля группировки: 'status' и/или 'tournament'
+            status: Учитывать только команды с указанным статусом
+            tournament_id: Учитывать только регистрации на указанный турнир
+
+        Returns:
+            Словарь {ключ: количество}. Ключ - значение поля при группировке
+            по одному полю или кортеж значений в порядке group_by
+        """
+        columns = {'status': 'status', 'tournament': 'tournament_id'}
+        unknown = set(group_by) - columns.keys()
+        if not group_by or unknown:
+            raise ValueError(f"Неверные поля группировки: {', '.join(unknown) or 'не указаны'}")
+
+        by_tournament = 'tournament' in group_by or tournament_id is not None
+        table = 'team_tournaments' if by_tournament else 'teams'
+        group_columns = ', '.join(columns[field] for field in group_by)
+
+        conditions = []
+        params = []
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if tournament_id is not None:
+            conditions.append('tournament_id = ?')
+            params.append(tournament_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {group_columns}, COUNT(*)
+                FROM {table}
+                {where}
+                GROUP BY {group_columns}
+            ''', params)
+
+            counts = {}
+            for row in cursor.fetchall():
+                key = row[0] if len(group_by) == 1 else tuple(row[:len(group_by)])
+                counts[key] = row[len(group_by)]
+            return counts
 
     def is_admin(self, telegram_id: int) -> bool:
         """
         Проверить, является ли пользователь администратором.
         
+        Проверка выполняется по множеству администраторов в памяти,
+        без обращения к базе данных.
+        
         Args:
             telegram_id: Telegram ID пользователя
             
         Returns:
             True, если пользователь администратор, иначе False
         """
-        with sqlite3.connect(self.db_file) as conn:
+        return telegram_id in self._admin_ids
+
+    def refresh_admins(self) -> int:
+        """
+        Перечитать список администраторов из базы данных.
+        
+        Нужен, если таблица admins изменяется в обход бота.
+        
+        Returns:
+            Количество администраторов
+        """
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT 1 FROM admins WHERE telegram_id = ?', (telegram_id,))
-            return cursor.fetchone() is not None
+            cursor.execute('SELECT telegram_id FROM admins')
+            self._admin_ids = frozenset(row[0] for row in cursor.fetchall())
+        return len(self._admin_ids)
 
     def add_admin(self, telegram_id: int, username: str) -> bool:
         """
@@ -1348,13 +1827,13 @@ class Database:
             True, если добавление успешно, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO admins (telegram_id, username, added_date)
                     VALUES (?, ?, ?)
                 ''', (telegram_id, username, datetime.now()))
-                conn.commit()
+                self.pool.after_commit(self.refresh_admins)
                 return True
         except sqlite3.IntegrityError:
             return False
@@ -1369,10 +1848,10 @@ class Database:
         Returns:
             True, если удаление успешно, иначе False
         """
-        with sqlite3.connect(self.db_file) as conn:
+        with self.pool.writer() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM admins WHERE telegram_id = ?', (telegram_id,))
-            conn.commit()
+            self.pool.after_commit(self.refresh_admins)
             return cursor.rowcount > 0
 
     def get_all_admins(self) -> List[Dict[str, Any]]:
@@ -1382,8 +1861,7 @@ class Database:
         Returns:
             Список словарей с данными администраторов
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT telegram_id, username, added_date FROM admins')
             return [dict(admin) for admin in cursor.fetchall()]
@@ -1398,23 +1876,46 @@ class Database:
         Returns:
             Список словарей со статистикой по дням
         """
-        with sqlite3.connect(self.db_file) as conn:
-            conn.row_factory = sqlite3.Row
+        since = (datetime.now().date() - timedelta(days=days)).isoformat()
+        
+        with self.pool.reader() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT date(date) as day, 
-                       SUM(registrations_count) as registrations,
-                       SUM(approved_count) as approved,
-                       SUM(rejected_count) as rejected
+                SELECT day,
+                       registrations_count as registrations,
+                       approved_count as approved,
+                       rejected_count as rejected
                 FROM stats
-                WHERE date(date) >= date('now', ?)
-                GROUP BY day
+                WHERE day >= ?
                 ORDER BY day DESC
-            ''', (f'-{days} days',))
+            ''', (since,))
             
             return [dict(day) for day in cursor.fetchall()]
 
+    def _bump_stats(self, cursor: sqlite3.Cursor, registrations: int = 0,
+                    approved: int = 0, rejected: int = 0) -> None:
+        """
+        Увеличить счетчики статистики за сегодня одним UPSERT-запросом.
+        
+        Args:
+            cursor: Курсор транзакции записи
+            registrations: Прирост количества регистраций
+            approved: Прирост количества одобренных заявок
+            rejected: Прирост количества отклоненных заявок
+        """
+        if not (registrations or approved or rejected):
+            return
+        
+        cursor.execute('''
+            INSERT INTO stats (day, registrations_count, approved_count, rejected_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                registrations_count = registrations_count + excluded.registrations_count,
+                approved_count = approved_count + excluded.approved_count,
+                rejected_count = rejected_count + excluded.rejected_count
+        ''', (datetime.now().date().isoformat(), registrations, approved, rejected))
+
     def delete_team(self, team_id: int) -> bool:
         """
         Удалить команду из базы данных.
@@ -1426,16 +1927,17 @@ class Database:
             True, если удаление успешно, иначе False
         """
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 
-                # Сначала удаляем игроков
+                # Сначала удаляем игроков и регистрации на турниры
                 cursor.execute('DELETE FROM players WHERE team_id = ?', (team_id,))
+                cursor.execute('DELETE FROM team_tournaments WHERE team_id = ?', (team_id,))
                 
                 # Затем удаляем команду
                 cursor.execute('DELETE FROM teams WHERE id = ?', (team_id,))
+                self._invalidate_teams(team_id)
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"Ошибка при удалении команды: {e}")
@@ -0,0 +1,105 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DiscordMemberIndex:
+    """
+    Индекс участников сервера Discord: username -> ID участника.
+
+    Строится целиком, когда бот Discord готов (on_ready, в том числе после
+    переподключения), и поддерживается событиями on_member_join,
+    on_member_update, on_member_remove и on_user_update (смена username
+    приходит в discord.py как изменение пользователя, а не участника).
+    Поиск по username и проверка членства - обращения к словарям, без
+    перебора guild.members и запросов к Discord.
+    """
+
+    def __init__(self, guild_id: Optional[int]):
+        """
+        Args:
+            guild_id: ID сервера Discord, участников которого нужно индексировать
+        """
+        self.guild_id = guild_id
+        self.ready = False
+        self._bot: Any = None
+        # username -> ID участников с этим username в порядке guild.members
+        self._ids: Dict[str, List[int]] = {}
+        self._names: Dict[int, str] = {}
+
+    def attach(self, bot: Any) -> None:
+        """Подписать индекс на события бота Discord (до его запуска)."""
+        self._bot = bot
+        bot.add_listener(self.on_ready, "on_ready")
+        bot.add_listener(self.on_member_join, "on_member_join")
+        bot.add_listener(self.on_member_update, "on_member_update")
+        bot.add_listener(self.on_member_remove, "on_member_remove")
+        bot.add_listener(self.on_user_update, "on_user_update")
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, member_id: Any) -> bool:
+        return int(member_id) in self._names
+
+    def get_id(self, username: str) -> Optional[int]:
+        """ID участника сервера по username (без учета регистра) или None."""
+        ids = self._ids.get(username.lower())
+        return ids[0] if ids else None
+
+    def rebuild(self, members: Iterable[Any]) -> None:
+        """Построить индекс заново по списку участников сервера."""
+        ids: Dict[str, List[int]] = {}
+        names: Dict[int, str] = {}
+        for member in members:
+            name = member.name.lower()
+            # При совпадении username находится первый участник, как при переборе guild.members
+            ids.setdefault(name, []).append(member.id)
+            names[member.id] = name
+        self._ids, self._names = ids, names
+        self.ready = True
+
+    def _add(self, member_id: int, username: str) -> None:
+        self._remove(member_id)
+        name = username.lower()
+        self._ids.setdefault(name, []).append(member_id)
+        self._names[member_id] = name
+
+    def _remove(self, member_id: int) -> None:
+        name = self._names.pop(member_id, None)
+        if name is None:
+            return
+        # Username остается за следующим участником с тем же username, как после rebuild()
+        ids = self._ids[name]
+        ids.remove(member_id)
+        if not ids:
+            del self._ids[name]
+
+    def _in_guild(self, member: Any) -> bool:
+        return member.guild.id == self.guild_id
+
+    async def on_ready(self) -> None:
+        guild = self._bot.get_guild(self.guild_id) if self.guild_id else None
+        if not guild:
+            logger.error(f"Сервер Discord с ID {self.guild_id} не найден, индекс участников не построен")
+            return
+        self.rebuild(guild.members)
+        logger.info(f"Индекс участников Discord построен: {len(self)} участников")
+
+    async def on_member_join(self, member: Any) -> None:
+        if self._in_guild(member):
+            self._add(member.id, member.name)
+
+    async def on_member_update(self, before: Any, after: Any) -> None:
+        if self._in_guild(after) and self._names.get(after.id) != after.name.lower():
+            self._add(after.id, after.name)
+
+    async def on_member_remove(self, member: Any) -> None:
+        if self._in_guild(member):
+            self._remove(member.id)
+
+    async def on_user_update(self, before: Any, after: Any) -> None:
+        # Событие приходит для пользователей всех серверов бота - обновляем только участников нашего
+        if after.id in self._names and self._names[after.id] != after.name.lower():
+            self._add(after.id, after.name)
@@ -1,4 +1,6 @@
 import re
+import html
+import asyncio
 import logging
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
@@ -7,7 +9,8 @@ from telegram.ext import (
     ConversationHandler, MessageHandler, filters, Application
 )
 
-from handlers.utils import process_team_roles
+from handlers.utils import process_team_roles, queue_team_roles
+from team_import import detect_format, import_bytes
 from constants import *
 
 logger = logging.getLogger(__name__)
@@ -22,23 +25,24 @@ logger = logging.getLogger(__name__)
     ADMIN_EDIT_TOURNAMENT_NAME,
     ADMIN_EDIT_TOURNAMENT_DESCRIPTION,
     ADMIN_EDIT_TOURNAMENT_DATE,
-) = range(ADMIN_TEAM_FILTER + 1, ADMIN_TEAM_FILTER + 9)
+    ADMIN_IMPORTING,
+) = range(ADMIN_TEAM_FILTER + 1, ADMIN_TEAM_FILTER + 10)
 
 async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Показать админ-панель."""
     db = context.bot_data["db"]
     user_id = update.effective_user.id
     
-    if not db.is_admin(user_id):
+    if not await db.is_admin(user_id):
         await update.message.reply_text("У вас нет доступа к админ-панели.")
         return ConversationHandler.END
 
     # Получаем статистику по командам
-    all_teams = db.get_all_teams()
-    pending_count = len([t for t in all_teams if t["status"] == "pending"])
-    approved_count = len([t for t in all_teams if t["status"] == "approved"])
-    rejected_count = len([t for t in all_teams if t["status"] == "rejected"])
-    total_count = len(all_teams)
+    status_counts = await db.count_teams(group_by=("status",))
+    pending_count = status_counts.get("pending", 0)
+    approved_count = status_counts.get("approved", 0)
+    rejected_count = status_counts.get("rejected", 0)
+    total_count = sum(status_counts.values())
 
     keyboard = [
         [InlineKeyboardButton(f"📋 Список команд ({total_count})", callback_data="admin_teams_list")],
@@ -50,6 +54,7 @@ async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
         [InlineKeyboardButton("🏆 Управление турнирами", callback_data="admin_tournaments")],
         [InlineKeyboardButton("➕ Добавить админа", callback_data="admin_add_admin")],
         [InlineKeyboardButton("👥 Список админов", callback_data="admin_admins_list")],
+        [InlineKeyboardButton("📥 Импорт команд", callback_data="admin_import_teams")],
         [InlineKeyboardButton("📊 Статистика", callback_data="admin_stats")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -66,7 +71,7 @@ async def admin_teams_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
 
@@ -83,47 +88,13 @@ async def admin_teams_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         status_map = {"approved": "approved", "rejected": "rejected", "pending": "pending"}
         filter_status = status_map.get(command_parts[2])
     
-    # Если фильтр не выбран, показываем все команды без группировки по турнирам
+    # Если фильтр не выбран, показываем все команды постранично без группировки по турнирам
     if not filter_status:
-        teams = db.get_all_teams()
-        
-        if not teams:
-            back_button = InlineKeyboardMarkup([[
-                InlineKeyboardButton("◀️ Назад", callback_data="admin_back")
-            ]])
-            
-            await query.edit_message_text(
-                "Зарегистрированных команд пока нет.",
-                reply_markup=back_button
-            )
-            return
-
-        # Формируем список всех команд с кнопками
-        keyboard = []
-        message = "<b>📋 Все команды</b>\n\n"
-        message += f"Найдено команд: {len(teams)}\n\n"
-        message += "Выберите команду для просмотра подробной информации:\n"
-        
-        for team in teams:
-            status_emoji = "⏳" if team["status"] == "pending" else "✅" if team["status"] == "approved" else "❌"
-            keyboard.append([
-                InlineKeyboardButton(
-                    f"{status_emoji} {team['team_name']}",
-                    callback_data=f"admin_teams_team_{team['id']}"
-                )
-            ])
-        
-        keyboard.append([InlineKeyboardButton("◀️ Назад", callback_data="admin_back")])
-        
-        await query.edit_message_text(
-            message,
-            reply_markup=InlineKeyboardMarkup(keyboard),
-            parse_mode="HTML"
-        )
+        await show_teams_page(update, context)
         return
     
     # Если выбран фильтр по статусу, показываем список турниров
-    tournaments = db.get_all_tournaments()
+    tournaments = await db.get_all_tournaments()
     
     if not tournaments:
         back_button = InlineKeyboardMarkup([[
@@ -144,9 +115,8 @@ async def admin_teams_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     keyboard = []
     
     for tournament in tournaments:
-        # Получаем количество команд для этого турнира с указанным статусом
-        tournament_teams = db.get_all_teams(status=filter_status, tournament_id=tournament['id'])
-        teams_count = len(tournament_teams)
+        # Количество регистраций по статусам приходит вместе со списком турниров
+        teams_count = tournament[f"{filter_status}_count"]
         
         keyboard.append([
             InlineKeyboardButton(
@@ -156,8 +126,7 @@ async def admin_teams_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         ])
     
     # Добавляем опцию "Все турниры"
-    all_teams = db.get_all_teams(status=filter_status)
-    all_teams_count = len(all_teams)
+    all_teams_count = sum((await db.count_teams(status=filter_status)).values())
     
     keyboard.append([
         InlineKeyboardButton(
@@ -182,68 +151,136 @@ async def admin_tournament_status_teams(update: Update, context: ContextTypes.DE
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
     
     # Разбираем данные callback
     parts = query.data.split("_")
-    tournament_id = parts[4]
+    tournament_id = None if parts[4] == "all" else int(parts[4])
     status = parts[5]
     
-    # Если выбрано "Все турниры"
-    if tournament_id == "all":
-        tournament_id = None
-        tournament_name = "Все турниры"
-    else:
-        tournament_id = int(tournament_id)
-        tournament = db.get_tournament_by_id(tournament_id)
+    await show_teams_page(update, context, status=status, tournament_id=tournament_id)
+
+async def admin_teams_page(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Переход на следующую или предыдущую страницу списка команд."""
+    query = update.callback_query
+    await query.answer()
+    
+    db = context.bot_data["db"]
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return
+    
+    # Формат: admin_page_{status|all}_{tournament_id|all}_{n|p}_{cursor}
+    _, _, status, tournament_id, direction, cursor = query.data.split("_")
+    
+    await show_teams_page(
+        update,
+        context,
+        status=None if status == "all" else status,
+        tournament_id=None if tournament_id == "all" else int(tournament_id),
+        cursor=int(cursor),
+        direction="prev" if direction == "p" else "next"
+    )
+
+async def show_teams_page(update: Update, context: ContextTypes.DEFAULT_TYPE, status: str = None,
+                          tournament_id: int = None, cursor: int = None, direction: str = "next") -> None:
+    """
+    Показать страницу списка команд с кнопками навигации.
+    
+    Args:
+        status: Фильтр по статусу команды
+        tournament_id: Фильтр по турниру
+        cursor: ID команды на границе страницы (из callback_data)
+        direction: Направление от курсора: "next" или "prev"
+    """
+    query = update.callback_query
+    db = context.bot_data["db"]
+    
+    if tournament_id:
+        tournament = await db.get_tournament_by_id(tournament_id)
         tournament_name = tournament['name'] if tournament else "Неизвестный турнир"
+    else:
+        tournament_name = "Все турниры"
     
-    # Получаем команды с указанным статусом для выбранного турнира
-    teams = db.get_all_teams(status=status, tournament_id=tournament_id)
+    # Кнопка "Назад" ведет туда, откуда открыт список
+    if status:
+        back_callback = f"admin_teams_{status}"
+    elif tournament_id:
+        back_callback = f"admin_tournament_{tournament_id}"
+    else:
+        back_callback = "admin_back"
+    
+    page = await db.get_teams_page(
+        status=status,
+        tournament_id=tournament_id,
+        cursor=cursor,
+        direction=direction,
+        limit=TEAMS_PAGE_SIZE
+    )
+    teams = page["teams"]
     
     if not teams:
+        if status:
+            text = f"В турнире \"{tournament_name}\" нет {TEAM_STATUS.get(status, 'зарегистрированных')} команд."
+        elif tournament_id:
+            text = "На этот турнир пока не зарегистрировано ни одной команды."
+        else:
+            text = "Зарегистрированных команд пока нет."
         await query.edit_message_text(
-            f"В турнире \"{tournament_name}\" нет {TEAM_STATUS.get(status, 'зарегистрированных')} команд.",
+            text,
             reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("◀️ Назад", callback_data=f"admin_teams_{status}")
+                InlineKeyboardButton("◀️ Назад", callback_data=back_callback)
             ]])
         )
         return
     
-    # Выбираем правильный emoji и текст для статуса
-    status_emoji = "⏳" if status == "pending" else "✅" if status == "approved" else "❌"
-    status_text = "ожидающие" if status == "pending" else "одобренные" if status == "approved" else "отклоненные"
-    
-    # Формируем список команд с кнопками
-    keyboard = []
+    total_count = sum((await db.count_teams(status=status, tournament_id=tournament_id)).values())
     
-    message = f"{status_emoji} <b>{status_text.capitalize()} команды</b> - {tournament_name}\n\n"
-    message += f"Найдено команд: {len(teams)}\n\n"
+    # Заголовок списка
+    if status:
+        status_emoji = "⏳" if status == "pending" else "✅" if status == "approved" else "❌"
+        status_text = "ожидающие" if status == "pending" else "одобренные" if status == "approved" else "отклоненные"
+        message = f"{status_emoji} <b>{status_text.capitalize()} команды</b> - {tournament_name}\n\n"
+    elif tournament_id:
+        message = f"👥 <b>Команды, зарегистрированные на турнир:</b> {tournament_name}\n\n"
+    else:
+        message = "<b>📋 Все команды</b>\n\n"
+    message += f"Найдено команд: {total_count}\n\n"
     message += "Выберите команду для просмотра подробной информации:\n"
     
-    # Добавляем кнопки для каждой команды
+    # Кнопки команд текущей страницы
+    keyboard = []
     for team in teams:
+        team_emoji = "⏳" if team["status"] == "pending" else "✅" if team["status"] == "approved" else "❌"
         keyboard.append([
             InlineKeyboardButton(
-                f"{team['team_name']}",
+                f"{team_emoji} {team['team_name']}",
                 callback_data=f"admin_teams_team_{team['id']}"
             )
         ])
     
-    # Добавляем кнопку экспорта
-    export_text = f"📝 Экспортировать {status_emoji} {status_text} команды в файл"
-    
-    keyboard.append([
-        InlineKeyboardButton(
-            export_text,
-            callback_data=f"admin_export_teams_{status}_{tournament_id if tournament_id else 'all'}"
-        )
-    ])
+    # Кнопки навигации несут курсор в callback_data
+    page_prefix = f"admin_page_{status or 'all'}_{tournament_id or 'all'}"
+    navigation = []
+    if page["prev_cursor"]:
+        navigation.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"{page_prefix}_p_{page['prev_cursor']}"))
+    if page["next_cursor"]:
+        navigation.append(InlineKeyboardButton("Далее ➡️", callback_data=f"{page_prefix}_n_{page['next_cursor']}"))
+    if navigation:
+        keyboard.append(navigation)
+    
+    # Добавляем кнопку экспорта для списков по статусу
+    if status:
+        keyboard.append([
+            InlineKeyboardButton(
+                f"📝 Экспортировать {status_emoji} {status_text} команды в файл",
+                callback_data=f"admin_export_teams_{status}_{tournament_id if tournament_id else 'all'}"
+            )
+        ])
     
-    # Добавляем кнопку "Назад"
-    keyboard.append([InlineKeyboardButton("◀️ Назад", callback_data=f"admin_teams_{status}")])
+    keyboard.append([InlineKeyboardButton("◀️ Назад", callback_data=back_callback)])
     
     await query.edit_message_text(
         message,
@@ -251,28 +288,17 @@ async def admin_tournament_status_teams(update: Update, context: ContextTypes.DE
         parse_mode="HTML"
     )
 
-    # Добавляем кнопку "Назад"
-    keyboard.append([InlineKeyboardButton("◀️ Назад", callback_data="admin_back")])
-    
-    await query.edit_message_text(
-        f"{status_emoji} <b>{status_text.capitalize()} команды</b>\n\n"
-        f"Выберите турнир для просмотра команд:",
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode="HTML"
-    )
-
 async def show_team_info(update: Update, context: ContextTypes.DEFAULT_TYPE, team_id: int) -> None:
    """Показать информацию о конкретной команде."""
    query = update.callback_query
    
    db = context.bot_data["db"]
-   if not db.is_admin(query.from_user.id):
+   if not await db.is_admin(query.from_user.id):
        await query.edit_message_text("У вас нет доступа к этой функции.")
        return
    
    # Получаем информацию о команде
-   teams = db.get_all_teams()
-   team = next((t for t in teams if t["id"] == team_id), None)
+   team = await db.get_team_by_id(team_id)
    
    if not team:
        await query.edit_message_text(
@@ -425,7 +451,7 @@ async def handle_team_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
    discord_role_id = context.bot_data.get("discord_role_id")
    discord_captain_role_id = context.bot_data.get("discord_captain_role_id")
    
-   if not db.is_admin(query.from_user.id):
+   if not await db.is_admin(query.from_user.id):
        await query.edit_message_text("У вас нет доступа к этой функции.")
        return
 
@@ -439,7 +465,7 @@ async def handle_team_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
    if entity_type == "team":
        if action == "approve":
            # Получаем текущий статус команды и турнира
-           team = db.get_team_by_id(team_id)
+           team = await db.get_team_by_id(team_id)
            old_status = None
            
            if tournament_id:
@@ -451,9 +477,9 @@ async def handle_team_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
            try:
                # Обновляем статус в team_tournaments
                if tournament_id:
-                   success = db.update_team_tournament_status(team_id, tournament_id, "approved")
+                   success = await db.update_team_tournament_status(team_id, tournament_id, "approved")
                else:
-                   success = db.update_team_status(team_id, "approved")
+                   success = await db.update_team_status(team_id, "approved")
                
                if success:
                    # После успешного обновления статуса, выдаем роли игрокам
@@ -474,7 +500,7 @@ async def handle_team_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
        
        elif action == "reject":
            # Получаем текущий статус команды и турнира
-           team = db.get_team_by_id(team_id)
+           team = await db.get_team_by_id(team_id)
            old_status = None
            
            if tournament_id:
@@ -486,9 +512,9 @@ async def handle_team_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
            try:
                # Обновляем статус в team_tournaments
                if tournament_id:
-                   success = db.update_team_tournament_status(team_id, tournament_id, "rejected")
+                   success = await db.update_team_tournament_status(team_id, tournament_id, "rejected")
                else:
-                   success = db.update_team_status(team_id, "rejected")
+                   success = await db.update_team_status(team_id, "rejected")
                
                if success:
                    # После успешного обновления статуса, удаляем роли у игроков
@@ -531,9 +557,9 @@ async def handle_team_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
        
        elif action == "view_tournament":
            # Показываем информацию о турнире
-           tournament = db.get_tournament_by_id(tournament_id)
+           tournament = await db.get_tournament_by_id(tournament_id)
            if tournament:
-               teams = db.get_all_teams(tournament_id=tournament_id)
+               teams = await db.get_all_teams(tournament_id=tournament_id)
                message = (
                    f"🏆 <b>{tournament['name']}</b>\n\n"
                    f"📅 Дата проведения: {tournament['event_date']}\n"
@@ -569,7 +595,7 @@ async def confirm_delete_team(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
     
@@ -577,8 +603,7 @@ async def confirm_delete_team(update: Update, context: ContextTypes.DEFAULT_TYPE
     team_id = int(query.data.split("_")[2])
     
     # Узнаем статус команды перед удалением для возврата к правильному списку
-    teams = db.get_all_teams()
-    team = next((t for t in teams if t["id"] == team_id), None)
+    team = await db.get_team_by_id(team_id)
     
     if team:
         # Если команда была одобрена, нужно снять Discord роли
@@ -624,7 +649,7 @@ async def confirm_delete_team(update: Update, context: ContextTypes.DEFAULT_TYPE
                 return
         
         # Удаляем команду только после успешного снятия ролей
-        if db.delete_team(team_id):
+        if await db.delete_team(team_id):
             # Определяем, к какому списку вернуться
             if team["status"] == "pending":
                 callback_data = "admin_teams_pending"
@@ -680,7 +705,7 @@ async def handle_admin_comment(update: Update, context: ContextTypes.DEFAULT_TYP
     comment = update.message.text
     
     # Обновляем комментарий в базе данных
-    if db.update_team_status(team_id, status=None, comment=comment):
+    if await db.update_team_status(team_id, status=None, comment=comment):
         await update.message.reply_text("💬 Комментарий успешно добавлен!")
         
         # Показываем обновленную информацию о команде
@@ -706,7 +731,7 @@ async def admin_add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ConversationHandler.END
     
@@ -763,13 +788,13 @@ async def process_add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return ADMIN_ADDING
     
     # Проверяем, является ли пользователь уже администратором
-    if db.is_admin(admin_id):
+    if await db.is_admin(admin_id):
         await update.message.reply_text(
             f"❌ Пользователь {admin_username} (ID: {admin_id}) уже является администратором."
         )
     else:
         # Добавляем нового администратора
-        if db.add_admin(admin_id, admin_username):
+        if await db.add_admin(admin_id, admin_username):
             await update.message.reply_text(
                 f"✅ Пользователь {admin_username} (ID: {admin_id}) успешно добавлен как администратор!"
             )
@@ -789,18 +814,87 @@ async def process_add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     return ConversationHandler.END
 
+async def admin_import_teams(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Запросить файл для массового импорта команд."""
+    query = update.callback_query
+    await query.answer()
+    
+    db = context.bot_data["db"]
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return ConversationHandler.END
+    
+    await query.message.reply_text(
+        "📥 Отправьте файл с командами (.csv, .json или .jsonl).\n\n"
+        "CSV: одна строка на игрока, столбцы team_name, player (\"Никнейм - @username\"), "
+        "telegram_id, discord_username, is_captain, tournament_id.\n"
+        "JSON/JSONL: объекты {\"team_name\": ..., \"tournament_id\": ..., \"players\": [...]}.",
+        reply_markup=InlineKeyboardMarkup([[
+            InlineKeyboardButton("Отмена", callback_data="admin_import_cancel")
+        ]])
+    )
+    return ADMIN_IMPORTING
+
+async def admin_import_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Отменить импорт команд и завершить диалог."""
+    query = update.callback_query
+    await query.answer()
+    
+    await query.edit_message_text(
+        "❌ Импорт команд отменен.",
+        reply_markup=InlineKeyboardMarkup([[
+            InlineKeyboardButton("🔐 Вернуться в админ-панель", callback_data="admin_back")
+        ]])
+    )
+    return ConversationHandler.END
+
+async def admin_process_import(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Импортировать команды из загруженного администратором файла."""
+    db = context.bot_data["db"]
+    if not await db.is_admin(update.effective_user.id):
+        await update.message.reply_text("У вас нет доступа к этой функции.")
+        return ConversationHandler.END
+    
+    document = update.message.document
+    try:
+        detect_format(document.file_name or "")
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return ADMIN_IMPORTING
+    
+    telegram_file = await document.get_file()
+    data = await telegram_file.download_as_bytearray()
+    
+    await update.message.reply_text("⏳ Импортируем команды...")
+    
+    try:
+        # Импорт читает файл и пишет в базу синхронно - выполняем его в потоке базы данных
+        report = await db.run(import_bytes, db.sync, bytes(data), document.file_name)
+    except Exception as e:
+        logger.error(f"Ошибка при импорте команд: {e}")
+        await update.message.reply_text(f"❌ Ошибка при импорте команд: {e}")
+        return ConversationHandler.END
+    
+    await update.message.reply_text(
+        f"📥 Импорт завершен\n\n{report.summary()}",
+        reply_markup=InlineKeyboardMarkup([[
+            InlineKeyboardButton("🔐 Вернуться в админ-панель", callback_data="admin_back")
+        ]])
+    )
+    return ConversationHandler.END
+
 async def admin_admins_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать список всех администраторов."""
     query = update.callback_query
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
     
     # Получаем список всех администраторов
-    admins = db.get_all_admins()
+    admins = await db.get_all_admins()
     
     if not admins:
         await query.edit_message_text(
@@ -834,19 +928,19 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
     
     # Получаем статистику за последние 7 дней
-    stats = db.get_stats(7)
+    stats = await db.get_stats(7)
     
     # Получаем общую статистику по командам
-    all_teams = db.get_all_teams()
-    pending_count = len([t for t in all_teams if t["status"] == "pending"])
-    approved_count = len([t for t in all_teams if t["status"] == "approved"])
-    rejected_count = len([t for t in all_teams if t["status"] == "rejected"])
-    total_count = len(all_teams)
+    status_counts = await db.count_teams(group_by=("status",))
+    pending_count = status_counts.get("pending", 0)
+    approved_count = status_counts.get("approved", 0)
+    rejected_count = status_counts.get("rejected", 0)
+    total_count = sum(status_counts.values())
     
     # Формируем сообщение со статистикой
     message = "📊 <b>Статистика турнира</b>\n\n"
@@ -870,6 +964,14 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     else:
         message += "За последние 7 дней нет данных о регистрациях."
     
+    # Счетчики кэша команд (для подбора его размера)
+    cache_stats = await db.get_team_cache_stats()
+    message += (
+        f"\n\n🗄 <b>Кэш команд:</b> {cache_stats['size']}/{cache_stats['maxsize']}, "
+        f"попаданий {cache_stats['hits']}, промахов {cache_stats['misses']} "
+        f"({cache_stats['hit_rate']:.0%})"
+    )
+    
     # Добавляем кнопку "Назад"
     await query.edit_message_text(
         message,
@@ -879,13 +981,80 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         parse_mode="HTML"
     )
 
+async def admin_backup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Создать резервную копию базы данных по команде /backup."""
+    db = context.bot_data["db"]
+    if not await db.is_admin(update.effective_user.id):
+        await update.message.reply_text("У вас нет доступа к этой функции.")
+        return
+    
+    backup_service = context.bot_data.get("backup")
+    if not backup_service:
+        await update.message.reply_text("❌ Резервное копирование не настроено.")
+        return
+    
+    await update.message.reply_text("⏳ Создаем резервную копию базы данных...")
+    
+    try:
+        # Копирование идет в отдельном потоке и не блокирует запись в базу
+        snapshot = await asyncio.to_thread(backup_service.create_snapshot)
+    except Exception as e:
+        logger.error(f"Ошибка при резервном копировании базы данных: {e}")
+        await update.message.reply_text(f"❌ Ошибка при резервном копировании: {e}")
+        return
+    
+    await update.message.reply_text(
+        f"✅ Резервная копия создана за {snapshot['duration']:.2f} с\n\n"
+        f"📁 {snapshot['path']}\n"
+        f"📦 {snapshot['size'] / 1024:.0f} КБ, сжато до {snapshot['compressed_size'] / 1024:.0f} КБ\n"
+        f"🗂 Хранится снимков: {len(backup_service.list_snapshots())}"
+    )
+
+async def admin_db_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показать статистику времени запросов к базе данных по команде /dbstats."""
+    db = context.bot_data["db"]
+    if not await db.is_admin(update.effective_user.id):
+        await update.message.reply_text("У вас нет доступа к этой функции.")
+        return
+    
+    if context.args and context.args[0] == "reset":
+        await db.reset_query_stats()
+        await update.message.reply_text("✅ Статистика запросов сброшена.")
+        return
+    
+    stats = await db.get_query_stats(top=10)
+    if stats is None:
+        await update.message.reply_text("❌ Измерение запросов отключено (DB_QUERY_STATS=0).")
+        return
+    
+    def ms(seconds: float) -> str:
+        return f"{seconds * 1000:.1f}"
+    
+    message = "⏱ <b>Методы базы данных</b> (вызовы, p50/p95/p99 мс, всего мс):\n"
+    for item in stats["methods"]:
+        message += (
+            f"• <code>{item['method']}</code>: {item['count']}, "
+            f"{ms(item['p50'])}/{ms(item['p95'])}/{ms(item['p99'])}, {ms(item['total'])}\n"
+        )
+    
+    message += "\n🧾 <b>SQL-запросы</b> (вызовы, строк, p95 мс, всего мс):\n"
+    for item in stats["statements"][:5]:
+        message += (
+            f"• {item['count']}, {item['rows']}, {ms(item['p95'])}, {ms(item['total'])}\n"
+            f"<code>{html.escape(item['sql'][:150])}</code>\n"
+        )
+    
+    message += f"\n🐢 Медленных запросов (≥ {ms(stats['slow_threshold'])} мс): {stats['slow_count']}"
+    
+    await update.message.reply_text(message, parse_mode="HTML")
+
 async def admin_select_tournament_for_export(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Выбор турнира для экспорта команд."""
     query = update.callback_query
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
     
@@ -894,7 +1063,7 @@ async def admin_select_tournament_for_export(update: Update, context: ContextTyp
     status = command_parts[3] if len(command_parts) > 3 else None
     
     # Получаем список турниров
-    tournaments = db.get_all_tournaments()
+    tournaments = await db.get_all_tournaments()
     
     if not tournaments:
         await query.edit_message_text(
@@ -909,7 +1078,7 @@ async def admin_select_tournament_for_export(update: Update, context: ContextTyp
     keyboard = []
     
     for tournament in tournaments:
-        teams_count = len(db.get_all_teams(status=status, tournament_id=tournament['id']))
+        teams_count = tournament.get(f"{status}_count", 0) if status else tournament["team_count"]
         keyboard.append([
             InlineKeyboardButton(
                 f"{tournament['name']} ({teams_count} команд)",
@@ -918,7 +1087,7 @@ async def admin_select_tournament_for_export(update: Update, context: ContextTyp
         ])
     
     # Кнопка экспорта всех команд
-    all_teams_count = len(db.get_all_teams(status=status))
+    all_teams_count = sum((await db.count_teams(status=status)).values())
     keyboard.append([
         InlineKeyboardButton(
             f"Все турниры ({all_teams_count} команд)",
@@ -950,7 +1119,7 @@ async def admin_export_teams(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return
     
@@ -961,13 +1130,13 @@ async def admin_export_teams(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     if tournament_id:
         tournament_id = int(tournament_id)
-        tournament = db.get_tournament_by_id(tournament_id)
+        tournament = await db.get_tournament_by_id(tournament_id)
         tournament_name = tournament['name'] if tournament else "Неизвестный турнир"
     else:
         tournament_name = "Все турниры"
     
-    # Получаем команды
-    teams = db.get_all_teams(status=status, tournament_id=tournament_id)
+    # Получаем команды (компактные модели Team - экспорт может содержать тысячи команд)
+    teams = await db.get_team_models(status=status, tournament_id=tournament_id)
     
     if not teams:
         await query.answer("⚠️ Нет команд для экспорта.")
@@ -995,31 +1164,25 @@ async def admin_export_teams(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     for team in teams:
         # Добавляем название команды
-        file_content += f"{team['team_name']}\n"
+        file_content += f"{team.team_name}\n"
         
         # Сортируем игроков: сначала капитан, потом остальные
-        captain = None
-        other_players = []
-        
-        for player in team["players"]:
-            if player.get("is_captain", False):
-                captain = player
-            else:
-                other_players.append(player)
+        captain = team.captain
+        other_players = [player for player in team.players if not player.is_captain]
         
         # Добавляем игроков в список
         player_index = 1
         
         if captain:
             # Добавляем информацию о Discord капитана
-            discord_info = f" Discord: {captain.get('discord_username', 'Не указан')}" if captain.get('discord_username') else ""
-            file_content += f"{player_index}) {captain['nickname']}{discord_info}\n"
+            discord_info = f" Discord: {captain.discord_username}" if captain.discord_username else ""
+            file_content += f"{player_index}) {captain.nickname}{discord_info}\n"
             player_index += 1
         
         for player in other_players:
             # Добавляем информацию о Discord игрока
-            discord_info = f" Discord: {player.get('discord_username', 'Не указан')}" if player.get('discord_username') else ""
-            file_content += f"{player_index}) {player['nickname']}{discord_info}\n"
+            discord_info = f" Discord: {player.discord_username}" if player.discord_username else ""
+            file_content += f"{player_index}) {player.nickname}{discord_info}\n"
             player_index += 1
         
         file_content += "\n"  # Пустая строка между командами
@@ -1055,11 +1218,11 @@ async def admin_back(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     
     # Получаем статистику по командам
     db = context.bot_data["db"]
-    all_teams = db.get_all_teams()
-    pending_count = len([t for t in all_teams if t["status"] == "pending"])
-    approved_count = len([t for t in all_teams if t["status"] == "approved"])
-    rejected_count = len([t for t in all_teams if t["status"] == "rejected"])
-    total_count = len(all_teams)
+    status_counts = await db.count_teams(group_by=("status",))
+    pending_count = status_counts.get("pending", 0)
+    approved_count = status_counts.get("approved", 0)
+    rejected_count = status_counts.get("rejected", 0)
+    total_count = sum(status_counts.values())
     
     keyboard = [
         [InlineKeyboardButton(f"📋 Список команд ({total_count})", callback_data="admin_teams_list")],
@@ -1071,6 +1234,7 @@ async def admin_back(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         [InlineKeyboardButton("🏆 Управление турнирами", callback_data="admin_tournaments")],
         [InlineKeyboardButton("➕ Добавить админа", callback_data="admin_add_admin")],
         [InlineKeyboardButton("👥 Список админов", callback_data="admin_admins_list")],
+        [InlineKeyboardButton("📥 Импорт команд", callback_data="admin_import_teams")],
         [InlineKeyboardButton("📊 Статистика", callback_data="admin_stats")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -1089,12 +1253,12 @@ async def admin_tournaments(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
     # Получаем список турниров
-    tournaments = db.get_all_tournaments()
+    tournaments = await db.get_all_tournaments()
     
     keyboard = [
         [InlineKeyboardButton("➕ Создать новый турнир", callback_data="admin_create_tournament")]
@@ -1124,7 +1288,10 @@ async def admin_tournaments(update: Update, context: ContextTypes.DEFAULT_TYPE)
             message += f"{idx}. <b>{tournament['name']}</b>\n"
             message += f"   Дата: {tournament['event_date']}\n"
             message += f"   Статус: {status}\n"
-            message += f"   Команд: {team_count}\n\n"
+            message += (
+                f"   Команд: {team_count} (⏳ {tournament['pending_count']} / "
+                f"✅ {tournament['approved_count']} / ❌ {tournament['rejected_count']})\n\n"
+            )
     else:
         message += "На данный момент нет созданных турниров. Создайте первый турнир!"
     
@@ -1143,7 +1310,7 @@ async def admin_create_tournament(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
@@ -1249,7 +1416,7 @@ async def admin_process_tournament_date(update: Update, context: ContextTypes.DE
     # Создаем турнир в базе данных
     db = context.bot_data["db"]
     try:
-        tournament_id = db.create_tournament(
+        tournament_id = await db.create_tournament(
             name=tournament_name,
             description=tournament_description,
             event_date=tournament_date
@@ -1297,7 +1464,7 @@ async def admin_show_tournament(update: Update, context: ContextTypes.DEFAULT_TY
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
@@ -1306,7 +1473,7 @@ async def admin_show_tournament(update: Update, context: ContextTypes.DEFAULT_TY
     context.user_data["current_tournament_id"] = tournament_id
     
     # Получаем информацию о турнире
-    tournament = db.get_tournament_by_id(tournament_id)
+    tournament = await db.get_tournament_by_id(tournament_id)
     
     if not tournament:
         await query.edit_message_text(
@@ -1317,9 +1484,10 @@ async def admin_show_tournament(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return ADMIN_TOURNAMENT_MENU
     
-    # Получаем список команд, зарегистрированных на этот турнир
-    teams = db.get_all_teams()
-    tournament_teams = [t for t in teams if t.get("tournament_id") == tournament_id]
+    # Получаем количество регистраций на этот турнир по статусам
+    registrations = await db.count_teams(group_by=("status",), tournament_id=tournament_id)
+    teams_count = sum(registrations.values())
+    pending_count = registrations.get("pending", 0)
     
     # Формируем сообщение с информацией о турнире
     message = (
@@ -1327,7 +1495,7 @@ async def admin_show_tournament(update: Update, context: ContextTypes.DEFAULT_TY
         f"📝 <b>Описание:</b>\n{tournament['description']}\n\n"
         f"📅 <b>Дата проведения:</b> {tournament['event_date']}\n"
         f"🔐 <b>Статус регистрации:</b> {'Открыта' if tournament['registration_open'] else 'Закрыта'}\n"
-        f"📊 <b>Команд зарегистрировано:</b> {len(tournament_teams)}\n\n"
+        f"📊 <b>Команд зарегистрировано:</b> {teams_count}\n\n"
     )
     
     # Формируем кнопки действий
@@ -1353,7 +1521,14 @@ async def admin_show_tournament(update: Update, context: ContextTypes.DEFAULT_TY
     keyboard.append([InlineKeyboardButton("🗑️ Удалить турнир", callback_data=f"admin_delete_tournament_{tournament_id}")])
     
     # Кнопка показа команд
-    keyboard.append([InlineKeyboardButton(f"👥 Команды ({len(tournament_teams)})", callback_data=f"admin_tournament_teams_{tournament_id}")])
+    keyboard.append([InlineKeyboardButton(f"👥 Команды ({teams_count})", callback_data=f"admin_tournament_teams_{tournament_id}")])
+    
+    # Массовая модерация ожидающих заявок
+    if pending_count:
+        keyboard.append([
+            InlineKeyboardButton(f"✅ Одобрить ожидающие ({pending_count})", callback_data=f"admin_bulk_approve_{tournament_id}"),
+            InlineKeyboardButton(f"❌ Отклонить ожидающие ({pending_count})", callback_data=f"admin_bulk_reject_{tournament_id}")
+        ])
     
     # Кнопка назад
     keyboard.append([InlineKeyboardButton("◀️ Назад", callback_data="admin_tournaments")])
@@ -1372,7 +1547,7 @@ async def admin_close_tournament_registration(update: Update, context: ContextTy
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
@@ -1380,7 +1555,7 @@ async def admin_close_tournament_registration(update: Update, context: ContextTy
     tournament_id = int(query.data.split("_")[3])
     
     # Закрываем регистрацию
-    success = db.close_tournament_registration(tournament_id)
+    success = await db.close_tournament_registration(tournament_id)
     
     if success:
         await query.answer("✅ Регистрация на турнир закрыта!")
@@ -1396,7 +1571,7 @@ async def admin_open_tournament_registration(update: Update, context: ContextTyp
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
@@ -1404,7 +1579,7 @@ async def admin_open_tournament_registration(update: Update, context: ContextTyp
     tournament_id = int(query.data.split("_")[3])
     
     # Открываем регистрацию
-    success = db.update_tournament(tournament_id, registration_open=True)
+    success = await db.update_tournament(tournament_id, registration_open=True)
     
     if success:
         await query.answer("✅ Регистрация на турнир открыта!")
@@ -1425,7 +1600,7 @@ async def admin_edit_tournament_name(update: Update, context: ContextTypes.DEFAU
     
     # Получаем информацию о турнире
     db = context.bot_data["db"]
-    tournament = db.get_tournament_by_id(tournament_id)
+    tournament = await db.get_tournament_by_id(tournament_id)
     
     if not tournament:
         await query.edit_message_text(
@@ -1469,7 +1644,7 @@ async def admin_process_edit_tournament_name(update: Update, context: ContextTyp
     
     try:
         # Обновляем название турнира
-        success = db.update_tournament(tournament_id, name=new_name)
+        success = await db.update_tournament(tournament_id, name=new_name)
         
         if success:
             # Создаем кнопку для возврата к просмотру турнира
@@ -1520,7 +1695,7 @@ async def admin_edit_tournament_description(update: Update, context: ContextType
     
     # Получаем информацию о турнире
     db = context.bot_data["db"]
-    tournament = db.get_tournament_by_id(tournament_id)
+    tournament = await db.get_tournament_by_id(tournament_id)
     
     if not tournament:
         await query.edit_message_text(
@@ -1564,7 +1739,7 @@ async def admin_process_edit_tournament_description(update: Update, context: Con
     
     try:
         # Обновляем описание турнира
-        success = db.update_tournament(tournament_id, description=new_description)
+        success = await db.update_tournament(tournament_id, description=new_description)
         
         if success:
             # Создаем кнопку для возврата к просмотру турнира
@@ -1615,7 +1790,7 @@ async def admin_edit_tournament_date(update: Update, context: ContextTypes.DEFAU
     
     # Получаем информацию о турнире
     db = context.bot_data["db"]
-    tournament = db.get_tournament_by_id(tournament_id)
+    tournament = await db.get_tournament_by_id(tournament_id)
     
     if not tournament:
         await query.edit_message_text(
@@ -1659,7 +1834,7 @@ async def admin_process_edit_tournament_date(update: Update, context: ContextTyp
     
     try:
         # Обновляем дату проведения турнира
-        success = db.update_tournament(tournament_id, event_date=new_date)
+        success = await db.update_tournament(tournament_id, event_date=new_date)
         
         if success:
             # Создаем кнопку для возврата к просмотру турнира
@@ -1705,7 +1880,7 @@ async def admin_delete_tournament(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
@@ -1713,7 +1888,7 @@ async def admin_delete_tournament(update: Update, context: ContextTypes.DEFAULT_
     tournament_id = int(query.data.split("_")[3])
     
     # Получаем информацию о турнире
-    tournament = db.get_tournament_by_id(tournament_id)
+    tournament = await db.get_tournament_by_id(tournament_id)
     
     if not tournament:
         await query.edit_message_text(
@@ -1748,7 +1923,7 @@ async def admin_confirm_delete_tournament(update: Update, context: ContextTypes.
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
@@ -1756,7 +1931,7 @@ async def admin_confirm_delete_tournament(update: Update, context: ContextTypes.
     tournament_id = int(query.data.split("_")[4])
     
     # Удаляем турнир
-    success = db.delete_tournament(tournament_id)
+    success = await db.delete_tournament(tournament_id)
     
     if success:
         await query.edit_message_text(
@@ -1775,22 +1950,22 @@ async def admin_confirm_delete_tournament(update: Update, context: ContextTypes.
         )
         return ADMIN_TOURNAMENT_MENU
 
-async def admin_tournament_teams(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """Показать список команд, зарегистрированных на турнир."""
+async def admin_bulk_moderation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Запрос подтверждения массового одобрения или отклонения ожидающих заявок турнира."""
     query = update.callback_query
     await query.answer()
     
     db = context.bot_data["db"]
-    if not db.is_admin(query.from_user.id):
+    if not await db.is_admin(query.from_user.id):
         await query.edit_message_text("У вас нет доступа к этой функции.")
         return ADMIN_MENU
     
-    # Получаем ID турнира из callback_data
-    tournament_id = int(query.data.split("_")[3])
-    
-    # Получаем информацию о турнире
-    tournament = db.get_tournament_by_id(tournament_id)
+    # Получаем действие и ID турнира из callback_data (admin_bulk_{approve|reject}_{id})
+    parts = query.data.split("_")
+    action = parts[2]
+    tournament_id = int(parts[3])
     
+    tournament = await db.get_tournament_by_id(tournament_id)
     if not tournament:
         await query.edit_message_text(
             "❌ Турнир не найден.",
@@ -1800,53 +1975,97 @@ async def admin_tournament_teams(update: Update, context: ContextTypes.DEFAULT_T
         )
         return ADMIN_TOURNAMENT_MENU
     
-    # Получаем список команд, зарегистрированных на турнир
-    teams = db.get_all_teams()
-    tournament_teams = [t for t in teams if t.get("tournament_id") == tournament_id]
+    pending_count = sum((await db.count_teams(status="pending", tournament_id=tournament_id)).values())
+    action_text = "одобрить" if action == "approve" else "отклонить"
     
-    # Формируем сообщение со списком команд
-    message = f"👥 <b>Команды, зарегистрированные на турнир:</b> {tournament['name']}\n\n"
+    await query.edit_message_text(
+        f"⚠️ <b>Вы уверены, что хотите {action_text} все ожидающие заявки?</b>\n\n"
+        f"Турнир: <b>{tournament['name']}</b>\n"
+        f"Ожидающих заявок: {pending_count}",
+        parse_mode="HTML",
+        reply_markup=InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton(f"✅ Да, {action_text}", callback_data=f"admin_bulk_confirm_{action}_{tournament_id}"),
+                InlineKeyboardButton("❌ Нет, отмена", callback_data=f"admin_tournament_{tournament_id}")
+            ]
+        ])
+    )
     
-    if tournament_teams:
-        for idx, team in enumerate(tournament_teams, 1):
-            status_emoji = "⏳" if team["status"] == "pending" else "✅" if team["status"] == "approved" else "❌"
-            message += f"{idx}. {status_emoji} <b>{team['team_name']}</b>\n"
-            message += f"   Статус: {TEAM_STATUS.get(team['status'], 'Неизвестно')}\n"
-            
-            # Добавляем информацию о капитане
-            captain = next((p for p in team["players"] if p.get("is_captain", False)), None)
-            if captain:
-                discord_info = f" Discord: {captain.get('discord_username', 'Не указан')}" if captain.get('discord_username') else ""
-                message += f"   Капитан: {captain['nickname']} (@{captain['telegram_username']}){discord_info}\n"
-            
-            message += f"   Дата регистрации: {team['registration_date']}\n\n"
-    else:
-        message += "На этот турнир пока не зарегистрировано ни одной команды."
+    return ADMIN_TOURNAMENT_MENU
+
+async def admin_confirm_bulk_moderation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Массовое одобрение или отклонение ожидающих заявок турнира."""
+    query = update.callback_query
+    await query.answer()
     
-    # Формируем кнопки
-    keyboard = []
+    db = context.bot_data["db"]
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return ADMIN_MENU
     
-    # Добавляем кнопки для каждой команды
-    for team in tournament_teams:
-        status_emoji = "⏳" if team["status"] == "pending" else "✅" if team["status"] == "approved" else "❌"
-        keyboard.append([
-            InlineKeyboardButton(
-                f"{status_emoji} {team['team_name']}",
-                callback_data=f"admin_teams_team_{team['id']}"
-            )
-        ])
+    # Получаем действие и ID турнира из callback_data (admin_bulk_confirm_{approve|reject}_{id})
+    parts = query.data.split("_")
+    action = parts[3]
+    tournament_id = int(parts[4])
+    new_status = "approved" if action == "approve" else "rejected"
     
-    # Добавляем кнопку "Назад"
-    keyboard.append([InlineKeyboardButton("◀️ Назад к турниру", callback_data=f"admin_tournament_{tournament_id}")])
+    try:
+        # Все статусы меняются одной транзакцией
+        changes = await db.update_registrations_status(tournament_id, new_status, current_status="pending")
+    except Exception as e:
+        logger.error(f"Ошибка при массовой модерации заявок турнира {tournament_id}: {e}")
+        await query.edit_message_text(
+            "❌ Ошибка при обновлении статусов заявок.",
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("◀️ Назад", callback_data=f"admin_tournament_{tournament_id}")
+            ]])
+        )
+        return ADMIN_TOURNAMENT_MENU
     
+    # Discord-роли обрабатываются в фоне после сохранения статусов
+    queue_team_roles(context, changes, new_status, tournament_id=tournament_id)
+    
+    result_text = "одобрено" if action == "approve" else "отклонено"
     await query.edit_message_text(
-        message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode="HTML"
+        f"✅ Заявок {result_text}: {len(changes)}.\n"
+        f"Роли в Discord обновляются в фоне.",
+        reply_markup=InlineKeyboardMarkup([[
+            InlineKeyboardButton("◀️ К турниру", callback_data=f"admin_tournament_{tournament_id}")
+        ]])
     )
     
     return ADMIN_TOURNAMENT_MENU
 
+async def admin_tournament_teams(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Показать список команд, зарегистрированных на турнир."""
+    query = update.callback_query
+    await query.answer()
+    
+    db = context.bot_data["db"]
+    if not await db.is_admin(query.from_user.id):
+        await query.edit_message_text("У вас нет доступа к этой функции.")
+        return ADMIN_MENU
+    
+    # Получаем ID турнира из callback_data
+    tournament_id = int(query.data.split("_")[3])
+    
+    # Получаем информацию о турнире
+    tournament = await db.get_tournament_by_id(tournament_id)
+    
+    if not tournament:
+        await query.edit_message_text(
+            "❌ Турнир не найден.",
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("◀️ Назад", callback_data="admin_tournaments")
+            ]])
+        )
+        return ADMIN_TOURNAMENT_MENU
+    
+    # Показываем команды турнира постранично
+    await show_teams_page(update, context, tournament_id=tournament_id)
+    
+    return ADMIN_TOURNAMENT_MENU
+
 def register_admin_handlers(application: Application) -> None:
     """Регистрация всех обработчиков для админ-панели."""
     
@@ -1856,10 +2075,13 @@ def register_admin_handlers(application: Application) -> None:
     # Обработчики для callback-запросов
     application.add_handler(CallbackQueryHandler(admin_teams_list, pattern="^admin_teams_"))
     application.add_handler(CallbackQueryHandler(admin_tournament_status_teams, pattern="^admin_tournament_teams_status_"))
+    application.add_handler(CallbackQueryHandler(admin_teams_page, pattern="^admin_page_"))
     application.add_handler(CallbackQueryHandler(admin_export_teams, pattern="^admin_export_teams_"))
     application.add_handler(CallbackQueryHandler(admin_add_admin, pattern="^admin_add_admin$"))
     application.add_handler(CallbackQueryHandler(admin_admins_list, pattern="^admin_admins_list$"))
     application.add_handler(CallbackQueryHandler(admin_stats, pattern="^admin_stats$"))
+    application.add_handler(CommandHandler("backup", admin_backup))
+    application.add_handler(CommandHandler("dbstats", admin_db_stats))
     application.add_handler(CallbackQueryHandler(admin_back, pattern="^admin_back$"))
     application.add_handler(CallbackQueryHandler(handle_team_action, pattern="^(approve|reject|comment|delete)_team_"))
     application.add_handler(CallbackQueryHandler(confirm_delete_team, pattern="^confirm_delete_"))
@@ -1872,6 +2094,8 @@ def register_admin_handlers(application: Application) -> None:
     application.add_handler(CallbackQueryHandler(admin_open_tournament_registration, pattern="^admin_open_tournament_\\d+$"))
     application.add_handler(CallbackQueryHandler(admin_delete_tournament, pattern="^admin_delete_tournament_\\d+$"))
     application.add_handler(CallbackQueryHandler(admin_confirm_delete_tournament, pattern="^admin_confirm_delete_tournament_\\d+$"))
+    application.add_handler(CallbackQueryHandler(admin_bulk_moderation, pattern="^admin_bulk_(approve|reject)_\\d+$"))
+    application.add_handler(CallbackQueryHandler(admin_confirm_bulk_moderation, pattern="^admin_bulk_confirm_(approve|reject)_\\d+$"))
 
     # ConversationHandler для создания турнира
     create_tournament_handler = ConversationHandler(
@@ -1948,3 +2172,19 @@ def register_admin_handlers(application: Application) -> None:
         per_message=True
     )
     application.add_handler(add_admin_handler)
+    
+    # Обработчик массового импорта команд
+    import_teams_handler = ConversationHandler(
+        entry_points=[CallbackQueryHandler(admin_import_teams, pattern="^admin_import_teams$")],
+        states={
+            ADMIN_IMPORTING: [
+                MessageHandler(filters.Document.ALL, admin_process_import),
+                CallbackQueryHandler(admin_import_cancel, pattern="^admin_import_cancel$")
+            ],
+        },
+        fallbacks=[
+            CommandHandler("admin", admin_command),
+            CallbackQueryHandler(admin_import_cancel, pattern="^admin_import_cancel$")
+        ]
+    )
+    application.add_handler(import_teams_handler)
@@ -1,6 +1,6 @@
+import asyncio
 import logging
 import re
-import aiohttp
 from typing import Dict, List, Any, Optional
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
@@ -11,6 +11,9 @@ from telegram.ext import (
 
 from handlers.utils import process_team_roles
 from constants import *
+from discord_members import DiscordMemberIndex
+from pubg_client import PubgClient
+from user_directory import UserDirectory
 
 logger = logging.getLogger(__name__)
 
@@ -106,7 +109,7 @@ async def show_my_teams(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     user_id = query.from_user.id
     
     # Получаем команды пользователя
-    teams = db.get_user_teams(user_id)
+    teams = await db.get_user_teams(user_id)
     
     if not teams:
         await query.edit_message_text(
@@ -159,7 +162,7 @@ async def view_team(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     team_id = int(query.data.split("_")[2])
     
     # Получаем информацию о команде
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     if not team:
         await query.edit_message_text(
@@ -354,7 +357,7 @@ async def start_create_team(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Проверяем, есть ли у пользователя уже созданные команды
     user_id = query.from_user.id
     db = context.bot_data["db"]
-    user_teams = db.get_user_teams(user_id)
+    user_teams = await db.get_user_teams(user_id)
     
     # Если у пользователя уже есть команды, блокируем создание новой
     if user_teams:
@@ -420,7 +423,7 @@ async def process_team_name(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # Проверка на уникальность названия команды
     db = context.bot_data["db"]
-    if db.team_name_exists(team_name):
+    if await db.team_name_exists(team_name):
         await update.message.reply_text(
             "⚠️ Команда с таким названием уже зарегистрирована. "
             "Пожалуйста, выберите другое название.",
@@ -455,7 +458,7 @@ async def process_captain_nickname(update: Update, context: ContextTypes.DEFAULT
         return TEAM_CREATE_CAPTAIN
     
     # Проверяем существование никнейма в PUBG
-    nickname_exists, correct_nickname = await check_pubg_nickname(captain_nickname)
+    nickname_exists, correct_nickname = await check_pubg_nickname(captain_nickname, context.bot_data["pubg"])
     
     if not nickname_exists:
         await update.message.reply_text(
@@ -499,8 +502,8 @@ async def process_captain_discord(update: Update, context: ContextTypes.DEFAULT_
         return TEAM_CREATE_CAPTAIN_DISCORD
     
     # Получаем Discord ID и проверяем наличие на сервере
-    discord_bot = context.bot_data.get("discord_bot")
-    discord_id = await get_discord_id_by_username(discord_username, discord_bot)
+    discord_members = context.bot_data.get("discord_members")
+    discord_id = await get_discord_id_by_username(discord_username, discord_members)
     
     if not discord_id:
         await update.message.reply_text(
@@ -514,7 +517,7 @@ async def process_captain_discord(update: Update, context: ContextTypes.DEFAULT_
         return TEAM_CREATE_CAPTAIN_DISCORD
     
     # Проверяем, состоит ли пользователь в нужном Discord сервере
-    is_member = await check_discord_membership(discord_id, discord_bot)
+    is_member = await check_discord_membership(discord_id, discord_members)
     
     if not is_member:
         await update.message.reply_text(
@@ -543,7 +546,7 @@ async def process_captain_discord(update: Update, context: ContextTypes.DEFAULT_
         "is_captain": True
     }
     
-    team_id = db.create_team(
+    team_id = await db.create_team(
         team_name=team_name,
         captain=captain_data
     )
@@ -552,7 +555,7 @@ async def process_captain_discord(update: Update, context: ContextTypes.DEFAULT_
     context.user_data["current_team_id"] = team_id
     
     # Получаем созданную команду
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     # Формируем сообщение с информацией о команде
     message = await format_team_info(team, is_captain=True)
@@ -599,7 +602,7 @@ async def add_player_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     
     # Проверяем количество игроков в команде
     db = context.bot_data["db"]
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     if len(team["players"]) > MAX_PLAYERS:
         if update.callback_query:
@@ -662,7 +665,7 @@ async def process_player_username(update: Update, context: ContextTypes.DEFAULT_
     db = context.bot_data["db"]
     
     # Проверяем, существует ли уже игрок с таким username в команде
-    if db.check_username_exists_in_team(team_id, username):
+    if await db.check_username_exists_in_team(team_id, username):
         await update.message.reply_text(
             f"❌ Произошла ошибка при добавлении игрока: Игрок с таким Telegram username уже есть в команде.\n"
             "Пожалуйста, введите другой Telegram username:",
@@ -674,7 +677,7 @@ async def process_player_username(update: Update, context: ContextTypes.DEFAULT_
     userbot = context.bot_data.get("userbot")
     if userbot:
         try:
-            telegram_id = await get_tg_id_by_username(username, userbot)
+            telegram_id = await get_tg_id_by_username(username, userbot, context.bot_data["user_directory"])
             
             if not telegram_id:
                 await update.message.reply_text(
@@ -720,7 +723,7 @@ async def process_player_nickname(update: Update, context: ContextTypes.DEFAULT_
         return TEAM_ADD_PLAYER_NICKNAME
     
     # Проверяем существование никнейма в PUBG
-    nickname_exists, correct_nickname = await check_pubg_nickname(nickname)
+    nickname_exists, correct_nickname = await check_pubg_nickname(nickname, context.bot_data["pubg"])
     
     if not nickname_exists:
         await update.message.reply_text(
@@ -764,8 +767,8 @@ async def process_player_discord(update: Update, context: ContextTypes.DEFAULT_T
         return TEAM_ADD_PLAYER_DISCORD
     
     # Получаем Discord ID и проверяем наличие на сервере
-    discord_bot = context.bot_data.get("discord_bot")
-    discord_id = await get_discord_id_by_username(discord_username, discord_bot)
+    discord_members = context.bot_data.get("discord_members")
+    discord_id = await get_discord_id_by_username(discord_username, discord_members)
     
     if not discord_id:
         await update.message.reply_text(
@@ -779,7 +782,7 @@ async def process_player_discord(update: Update, context: ContextTypes.DEFAULT_T
         return TEAM_ADD_PLAYER_DISCORD
     
     # Проверяем, состоит ли пользователь в нужном Discord сервере
-    is_member = await check_discord_membership(discord_id, discord_bot)
+    is_member = await check_discord_membership(discord_id, discord_members)
     
     if not is_member:
         await update.message.reply_text(
@@ -807,7 +810,7 @@ async def process_player_discord(update: Update, context: ContextTypes.DEFAULT_T
     db = context.bot_data["db"]
     
     # Проверяем, существует ли уже игрок с таким никнеймом в команде
-    if db.check_nickname_exists_in_team(team_id, nickname):
+    if await db.check_nickname_exists_in_team(team_id, nickname):
         await update.message.reply_text(
             f"❌ Произошла ошибка при добавлении игрока: Игрок с таким никнеймом уже есть в команде.\n"
             "Пожалуйста, введите другой игровой никнейм:",
@@ -816,7 +819,7 @@ async def process_player_discord(update: Update, context: ContextTypes.DEFAULT_T
         return TEAM_ADD_PLAYER_NICKNAME
     
     # Проверяем, существует ли уже игрок с таким Discord username в команде
-    if db.check_discord_exists_in_team(team_id, discord_username):
+    if await db.check_discord_exists_in_team(team_id, discord_username):
         await update.message.reply_text(
             f"❌ Произошла ошибка при добавлении игрока: Игрок с таким Discord username уже есть в команде.\n"
             "Каждый игрок должен иметь уникальный Discord аккаунт.\n"
@@ -837,14 +840,14 @@ async def process_player_discord(update: Update, context: ContextTypes.DEFAULT_T
     
     try:
         # Получаем предыдущий статус команды
-        team_before = db.get_team_by_id(team_id)
+        team_before = await db.get_team_by_id(team_id)
         was_pending_approved_or_rejected = team_before["status"] in ["pending", "approved", "rejected"]
         
         # Добавляем игрока в команду
-        db.add_player_to_team(team_id, player_data)
+        await db.add_player_to_team(team_id, player_data)
         
         # Получаем обновленную команду
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем, изменился ли статус команды
         status_changed = was_pending_approved_or_rejected and team["status"] == "draft"
@@ -913,7 +916,7 @@ async def register_team_for_tournament(update: Update, context: ContextTypes.DEF
     db = context.bot_data["db"]
     
     # Получаем все турниры с открытой регистрацией
-    active_tournaments = db.get_active_tournaments()
+    active_tournaments = await db.get_active_tournaments()
     
     if not active_tournaments:
         await query.edit_message_text(
@@ -926,7 +929,7 @@ async def register_team_for_tournament(update: Update, context: ContextTypes.DEF
         return PROFILE_MENU
     
     # Проверяем количество игроков в команде
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     if len(team["players"]) < 4:  # Минимум 4 игрока (3 + капитан)
         await query.edit_message_text(
             f"⚠️ Для регистрации на турнир необходимо минимум 4 игрока (включая капитана).\n\n"
@@ -1021,7 +1024,7 @@ async def confirm_tournaments_registration(update: Update, context: ContextTypes
     # Получаем информацию о выбранных турнирах
     tournaments_info = []
     for tournament_id in selected_tournaments:
-        tournament = db.get_tournament_by_id(tournament_id)
+        tournament = await db.get_tournament_by_id(tournament_id)
         if tournament:
             tournaments_info.append(tournament)
     
@@ -1075,10 +1078,10 @@ async def complete_tournaments_registration(update: Update, context: ContextType
     try:
         # Регистрируем команду на все выбранные турниры
         for tournament_id in selected_tournaments:
-            db.register_team_for_tournament(team_id, tournament_id)
+            await db.register_team_for_tournament(team_id, tournament_id)
         
         # Получаем обновленную информацию о команде
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Формируем сообщение об успешной регистрации
         message = "✅ <b>Регистрация успешно завершена!</b>\n\n"
@@ -1131,8 +1134,8 @@ async def confirm_tournament_registration(update: Update, context: ContextTypes.
     db = context.bot_data["db"]
     
     # Получаем информацию о команде и турнире
-    team = db.get_team_by_id(team_id)
-    tournament = db.get_tournament_by_id(tournament_id)
+    team = await db.get_team_by_id(team_id)
+    tournament = await db.get_tournament_by_id(tournament_id)
     
     if not team or not tournament:
         await query.edit_message_text(
@@ -1183,7 +1186,7 @@ async def complete_tournament_registration(update: Update, context: ContextTypes
     
     try:
         # Получаем информацию о команде
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем подписку игроков на канал
         userbot = context.bot_data.get("userbot")
@@ -1193,21 +1196,19 @@ async def complete_tournament_registration(update: Update, context: ContextTypes
         
         logger.info(f"Проверка подписки на канал {CHANNEL_ID} для команды {team['team_name']}")
         
+        # Недавно проверенных игроков берем из базы, остальных проверяем параллельно
+        subscriptions = await get_players_subscriptions(
+            db, userbot, team["players"], CHANNEL_ID,
+            max_age=context.bot_data.get("subscription_cache_ttl", SUBSCRIPTION_CACHE_TTL)
+        )
+        
         for player in team["players"]:
-            logger.info(f"Проверка игрока {player['nickname']} (@{player.get('telegram_username', 'нет')}) с ID {player.get('telegram_id', 'не указан')}")
-            
             # Проверяем подписку только если есть telegram_id
-            if player.get("telegram_id"):
-                is_subscribed = await check_channel_subscription(userbot, player["telegram_id"], CHANNEL_ID)
-                
-                # Сохраняем статус подписки в БД
-                db.update_player_subscription(player["id"], is_subscribed)
-                
-                if not is_subscribed:
-                    logger.info(f"Игрок {player['nickname']} (@{player.get('telegram_username', 'нет')}) не подписан на канал")
-                    unsubscribed_players.append(player)
-            else:
+            if not player.get("telegram_id"):
                 logger.warning(f"У игрока {player['nickname']} (@{player.get('telegram_username', 'нет')}) не указан telegram_id, пропускаем проверку подписки")
+            elif subscriptions.get(player["id"]) is False:
+                logger.info(f"Игрок {player['nickname']} (@{player.get('telegram_username', 'нет')}) не подписан на канал")
+                unsubscribed_players.append(player)
         
         # Если есть игроки без подписки, выводим предупреждение
         if unsubscribed_players:
@@ -1237,11 +1238,11 @@ async def complete_tournament_registration(update: Update, context: ContextTypes
         
         # Если все игроки подписаны, продолжаем регистрацию
         # Регистрируем команду на турнир
-        db.register_team_for_tournament(team_id, tournament_id)
+        await db.register_team_for_tournament(team_id, tournament_id)
         
         # Получаем обновленную информацию о команде и турнире
-        team = db.get_team_by_id(team_id)
-        tournament = db.get_tournament_by_id(tournament_id)
+        team = await db.get_team_by_id(team_id)
+        tournament = await db.get_tournament_by_id(tournament_id)
         
         # Формируем сообщение с информацией о команде
         message = await format_team_info(team, is_captain=True)
@@ -1324,23 +1325,23 @@ async def complete_registration_anyway(update: Update, context: ContextTypes.DEF
     
     try:
         # Получаем информацию о команде
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем подписку игроков на канал еще раз (возможно кто-то успел подписаться)
         userbot = context.bot_data.get("userbot")
         
-        for player in team["players"]:
-            if player.get("telegram_id"):
-                is_subscribed = await check_channel_subscription(userbot, player["telegram_id"], CHANNEL_ID)
-                # Сохраняем статус подписки в БД
-                db.update_player_subscription(player["id"], is_subscribed)
+        await get_players_subscriptions(
+            db, userbot, team["players"], CHANNEL_ID,
+            max_age=context.bot_data.get("subscription_cache_ttl", SUBSCRIPTION_CACHE_TTL),
+            refresh_unsubscribed=True
+        )
         
         # Регистрируем команду на турнир
-        db.register_team_for_tournament(team_id, tournament_id)
+        await db.register_team_for_tournament(team_id, tournament_id)
         
         # Получаем обновленную информацию о команде и турнире
-        team = db.get_team_by_id(team_id)
-        tournament = db.get_tournament_by_id(tournament_id)
+        team = await db.get_team_by_id(team_id)
+        tournament = await db.get_tournament_by_id(tournament_id)
         
         # Формируем сообщение с информацией о команде
         message = await format_team_info(team, is_captain=True)
@@ -1425,7 +1426,7 @@ async def start_edit_team_name(update: Update, context: ContextTypes.DEFAULT_TYP
         return PROFILE_MENU
     
     db = context.bot_data["db"]
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     await query.message.reply_text(
         f"🎮 <b>Редактирование названия команды</b>\n\n"
@@ -1471,15 +1472,15 @@ async def process_edit_team_name(update: Update, context: ContextTypes.DEFAULT_T
     
     try:
         # Получаем предыдущий статус команды
-        team_before = db.get_team_by_id(team_id)
+        team_before = await db.get_team_by_id(team_id)
         old_status = team_before["status"]
         was_pending_approved_or_rejected = old_status in ["pending", "approved", "rejected"]
         
         # Обновляем название команды
-        db.update_team_name(team_id, new_name)
+        await db.update_team_name(team_id, new_name)
         
         # Получаем обновленную команду
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем, изменился ли статус команды
         status_changed = was_pending_approved_or_rejected and team["status"] == "draft"
@@ -1579,7 +1580,7 @@ async def view_player(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         return PROFILE_MENU
     
     db = context.bot_data["db"]
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     # Находим игрока по ID
     player = next((p for p in team["players"] if p["id"] == player_id), None)
@@ -1656,7 +1657,7 @@ async def start_edit_player_nickname(update: Update, context: ContextTypes.DEFAU
     # Получаем информацию о команде и игроке
     team_id = context.user_data.get("current_team_id")
     db = context.bot_data["db"]
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     # Находим игрока по ID
     player = next((p for p in team["players"] if p["id"] == player_id), None)
@@ -1695,7 +1696,7 @@ async def process_edit_player_nickname(update: Update, context: ContextTypes.DEF
         return TEAM_EDIT_PLAYER_NICKNAME
     
     # Проверяем существование никнейма в PUBG
-    nickname_exists, correct_nickname = await check_pubg_nickname(new_nickname)
+    nickname_exists, correct_nickname = await check_pubg_nickname(new_nickname, context.bot_data["pubg"])
     
     if not nickname_exists:
         await update.message.reply_text(
@@ -1726,14 +1727,14 @@ async def process_edit_player_nickname(update: Update, context: ContextTypes.DEF
     
     try:
         # Получаем предыдущий статус команды
-        team_before = db.get_team_by_id(team_id)
+        team_before = await db.get_team_by_id(team_id)
         was_pending_approved_or_rejected = team_before["status"] in ["pending", "approved", "rejected"]
         
         # Обновляем никнейм игрока
-        db.update_player_nickname(player_id, new_nickname)
+        await db.update_player_nickname(player_id, new_nickname)
         
         # Получаем обновленную команду
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем, изменился ли статус команды
         status_changed = was_pending_approved_or_rejected and team["status"] == "draft"
@@ -1812,7 +1813,7 @@ async def start_edit_player_username(update: Update, context: ContextTypes.DEFAU
     # Получаем информацию о команде и игроке
     team_id = context.user_data.get("current_team_id")
     db = context.bot_data["db"]
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     # Находим игрока по ID
     player = next((p for p in team["players"] if p["id"] == player_id), None)
@@ -1869,7 +1870,7 @@ async def process_edit_player_username(update: Update, context: ContextTypes.DEF
     telegram_id = None
     if userbot:
         try:
-            telegram_id = await get_tg_id_by_username(username, userbot)
+            telegram_id = await get_tg_id_by_username(username, userbot, context.bot_data["user_directory"])
             
             if not telegram_id:
                 await update.message.reply_text(
@@ -1891,14 +1892,14 @@ async def process_edit_player_username(update: Update, context: ContextTypes.DEF
     
     try:
         # Получаем предыдущий статус команды
-        team_before = db.get_team_by_id(team_id)
+        team_before = await db.get_team_by_id(team_id)
         was_pending_approved_or_rejected = team_before["status"] in ["pending", "approved", "rejected"]
         
         # Обновляем Telegram username игрока
-        db.update_player_username(player_id, username)
+        await db.update_player_username(player_id, username)
         
         # Получаем обновленную команду
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем, изменился ли статус команды
         status_changed = was_pending_approved_or_rejected and team["status"] == "draft"
@@ -1977,7 +1978,7 @@ async def start_edit_player_discord(update: Update, context: ContextTypes.DEFAUL
     # Получаем информацию о команде и игроке
     team_id = context.user_data.get("current_team_id")
     db = context.bot_data["db"]
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     # Находим игрока по ID
     player = next((p for p in team["players"] if p["id"] == player_id), None)
@@ -2018,8 +2019,8 @@ async def process_edit_player_discord(update: Update, context: ContextTypes.DEFA
         return TEAM_EDIT_PLAYER_DISCORD
     
     # Получаем Discord ID и проверяем наличие на сервере
-    discord_bot = context.bot_data.get("discord_bot")
-    discord_id = await get_discord_id_by_username(discord_username, discord_bot)
+    discord_members = context.bot_data.get("discord_members")
+    discord_id = await get_discord_id_by_username(discord_username, discord_members)
     
     if not discord_id:
         await update.message.reply_text(
@@ -2033,7 +2034,7 @@ async def process_edit_player_discord(update: Update, context: ContextTypes.DEFA
         return TEAM_EDIT_PLAYER_DISCORD
     
     # Проверяем, состоит ли пользователь в нужном Discord сервере
-    is_member = await check_discord_membership(discord_id, discord_bot)
+    is_member = await check_discord_membership(discord_id, discord_members)
     
     if not is_member:
         await update.message.reply_text(
@@ -2057,7 +2058,7 @@ async def process_edit_player_discord(update: Update, context: ContextTypes.DEFA
     db = context.bot_data["db"]
     
     # Проверяем, существует ли уже игрок с таким Discord username в команде (исключая текущего игрока)
-    if db.check_discord_exists_in_team(team_id, discord_username, exclude_player_id=player_id):
+    if await db.check_discord_exists_in_team(team_id, discord_username, exclude_player_id=player_id):
         await update.message.reply_text(
             f"❌ Произошла ошибка при обновлении: Игрок с таким Discord username уже есть в команде.\n"
             "Каждый игрок должен иметь уникальный Discord аккаунт.\n"
@@ -2068,14 +2069,14 @@ async def process_edit_player_discord(update: Update, context: ContextTypes.DEFA
     
     try:
         # Получаем предыдущий статус команды
-        team_before = db.get_team_by_id(team_id)
+        team_before = await db.get_team_by_id(team_id)
         was_pending_approved_or_rejected = team_before["status"] in ["pending", "approved", "rejected"]
         
         # Обновляем Discord данные игрока
-        db.update_player_discord(player_id, discord_username, discord_id)
+        await db.update_player_discord(player_id, discord_username, discord_id)
         
         # Получаем обновленную команду
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем, изменился ли статус команды
         status_changed = was_pending_approved_or_rejected and team["status"] == "draft"
@@ -2160,14 +2161,14 @@ async def process_delete_player(update: Update, context: ContextTypes.DEFAULT_TY
     
     try:
         # Получаем предыдущий статус команды
-        team_before = db.get_team_by_id(team_id)
+        team_before = await db.get_team_by_id(team_id)
         was_pending_approved_or_rejected = team_before["status"] in ["pending", "approved", "rejected"]
         
         # Удаляем игрока
-        db.delete_player(player_id)
+        await db.delete_player(player_id)
         
         # Получаем обновленную команду
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         # Проверяем, изменился ли статус команды
         status_changed = was_pending_approved_or_rejected and team["status"] == "draft"
@@ -2247,7 +2248,7 @@ async def confirm_delete_player(update: Update, context: ContextTypes.DEFAULT_TY
     # Получаем информацию о команде и игроке
     team_id = context.user_data.get("current_team_id")
     db = context.bot_data["db"]
-    team = db.get_team_by_id(team_id)
+    team = await db.get_team_by_id(team_id)
     
     # Находим игрока по ID
     player = next((p for p in team["players"] if p["id"] == player_id), None)
@@ -2325,7 +2326,7 @@ async def confirm_cancel_team(update: Update, context: ContextTypes.DEFAULT_TYPE
         db = context.bot_data["db"]
         
         # Получаем информацию о команде перед удалением
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         if team:
             # Если команда была одобрена, нужно снять Discord роли
@@ -2367,7 +2368,7 @@ async def confirm_cancel_team(update: Update, context: ContextTypes.DEFAULT_TYPE
                     return PROFILE_MENU
             
             # Удаляем команду только после успешного снятия ролей
-            if db.delete_team(team_id):
+            if await db.delete_team(team_id):
                 await query.edit_message_text(
                     "✅ Команда успешно удалена.\n\n"
                     "Вы можете создать новую команду, выбрав пункт \"Создать команду\" в личном кабинете.",
@@ -2395,7 +2396,7 @@ async def confirm_cancel_team(update: Update, context: ContextTypes.DEFAULT_TYPE
         # Возвращаемся к информации о команде
         team_id = context.user_data.get("current_team_id")
         db = context.bot_data["db"]
-        team = db.get_team_by_id(team_id)
+        team = await db.get_team_by_id(team_id)
         
         is_captain = any(p.get("is_captain", False) and p.get("telegram_id") == query.from_user.id for p in team["players"])
         
@@ -2517,65 +2518,42 @@ async def handle_profile_action(update: Update, context: ContextTypes.DEFAULT_TY
     return PROFILE_MENU
 
 # Вспомогательные функции
-async def get_tg_id_by_username(username: str, userbot):
+async def get_tg_id_by_username(username: str, userbot, directory: UserDirectory):
     """
-    Получает Telegram ID пользователя по его username с помощью Pyrogram.
+    Получает Telegram ID пользователя по его username.
+    
+    Сначала используется справочник username -> Telegram ID, и только если
+    username в нем нет или запись устарела, выполняется запрос через Pyrogram.
     
     Args:
         username: Username пользователя (без @)
         userbot: Экземпляр клиента Pyrogram
+        directory: Справочник username -> Telegram ID
         
     Returns:
         ID пользователя или None, если пользователь не найден
+        
+    Raises:
+        LookupError: Если проверить username не удалось (например, FLOOD_WAIT)
     """
     if not userbot:
         logger.warning(f"Pyrogram не инициализирован. Невозможно проверить username @{username}")
         return None
     
-    try:
-        users = await userbot.get_users(username)
-        if users:
-            if isinstance(users, list):
-                if users:
-                    return users[0].id
-                else:
-                    return None
-            else:
-                return users.id
-        else:
-            return None
-    except Exception as e:
-        logger.error(f"Ошибка при получении Telegram ID для @{username}: {e}")
-        return None
+    return await directory.resolve(username, userbot)
     
-async def check_pubg_nickname(nickname: str) -> tuple[bool, str]:
+async def check_pubg_nickname(nickname: str, pubg: PubgClient) -> tuple[bool, str]:
     """
     Проверяет существование игрового никнейма PUBG через API и возвращает его в правильном регистре.
     
     Args:
         nickname: Игровой никнейм для проверки
+        pubg: Общий клиент API PUBG (кэш результатов, предохранитель)
         
     Returns:
-        Кортеж (существует, правильный_никнейм)
+        Кортеж (существует, правильный_никнейм); при недоступности API никнейм считается действительным
     """
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"https://api.pubg.report/search/{nickname}") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Если найден хотя бы один игрок
-                    if data and len(data) > 0:
-                        # Берем первый результат и его никнейм в правильном регистре
-                        correct_nickname = data[0].get("nickname", nickname)
-                        return True, correct_nickname
-                
-                # Если пустой список или ошибка
-                return False, nickname
-    except Exception as e:
-        logger.error(f"Ошибка при проверке никнейма PUBG: {e}")
-        # В случае ошибки запроса считаем никнейм действительным
-        return True, nickname
+    return await pubg.check_nickname(nickname)
     
 async def check_channel_subscription(userbot, telegram_id: int, channel_id: str) -> bool:
     """
@@ -2614,79 +2592,149 @@ async def check_channel_subscription(userbot, telegram_id: int, channel_id: str)
             logger.error(f"Ошибка при проверке подписки на канал для пользователя {telegram_id}: {e}")
             return True
 
-async def get_discord_id_by_username(username: str, discord_bot) -> Optional[str]:
+async def check_players_subscriptions(userbot, players: List[Dict[str, Any]], channel_id: str,
+                                      concurrency: int = SUBSCRIPTION_CHECK_CONCURRENCY,
+                                      timeout: float = SUBSCRIPTION_CHECK_TIMEOUT) -> Dict[int, bool]:
     """
-    Получает Discord ID пользователя по его username.
+    Проверяет подписку нескольких игроков на канал параллельно.
+    
+    Одновременно выполняется не более concurrency запросов к Telegram, каждый
+    ограничен timeout секундами, поэтому проверка команды занимает столько же,
+    сколько самая долгая из проверок, а не их сумму.
     
     Args:
-        username: Discord username пользователя
-        discord_bot: Экземпляр бота Discord
+        userbot: Экземпляр клиента Pyrogram
+        players: Игроки команды (словари с id и telegram_id)
+        channel_id: ID канала для проверки
+        concurrency: Максимальное количество одновременных запросов
+        timeout: Таймаут проверки одного игрока, секунд
         
     Returns:
-        Discord ID пользователя или None, если пользователь не найден
+        Словарь {ID игрока: подписан ли на канал}. Игроки без telegram_id
+        и игроки, проверка которых не уложилась в таймаут, не включаются
     """
-    if not discord_bot or not discord_bot.is_ready():
-        logger.warning(f"Discord бот не готов. Невозможно проверить username {username}")
-        return None
+    semaphore = asyncio.Semaphore(concurrency)
     
-    try:
-        # Получаем server_id напрямую из глобальной переменной
-        from main import DISCORD_SERVER_ID
-        
-        if not DISCORD_SERVER_ID:
-            logger.error("Discord Server ID не найден")
-            return None
-            
-        server_id = int(DISCORD_SERVER_ID)
-        guild = discord_bot.get_guild(server_id)
+    async def check(player: Dict[str, Any]) -> tuple:
+        async with semaphore:
+            try:
+                is_subscribed = await asyncio.wait_for(
+                    check_channel_subscription(userbot, player["telegram_id"], channel_id), timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Проверка подписки игрока {player['nickname']} не уложилась в {timeout} с")
+                is_subscribed = None
+        return player["id"], is_subscribed
+    
+    results = await asyncio.gather(*(check(player) for player in players if player.get("telegram_id")))
+    return {player_id: is_subscribed for player_id, is_subscribed in results if is_subscribed is not None}
+
+async def get_players_subscriptions(db, userbot, players: List[Dict[str, Any]], channel_id: str,
+                                    max_age: float = SUBSCRIPTION_CACHE_TTL,
+                                    refresh_unsubscribed: bool = False) -> Dict[int, bool]:
+    """
+    Получает статусы подписки игроков на канал с учетом сохраненных результатов.
+    
+    Игроки, проверенные не раньше max_age секунд назад, через userbot
+    не проверяются. Остальные проверяются параллельно, а результаты
+    сохраняются в базе одной записью (через очередь записи, без ожидания).
+    
+    Args:
+        db: Асинхронная обертка базы данных
+        userbot: Экземпляр клиента Pyrogram
+        players: Игроки команды
+        channel_id: ID канала для проверки
+        max_age: Срок актуальности сохраненного статуса, секунд (0 - всегда проверять)
+        refresh_unsubscribed: Перепроверять игроков, сохраненных как неподписанные
         
-        if not guild:
-            logger.error(f"Сервер Discord с ID {server_id} не найден")
-            return None
+    Returns:
+        Словарь {ID игрока: подписан ли на канал}
+    """
+    players = [player for player in players if player.get("telegram_id")]
+    
+    cached = {}
+    # Без userbot проверка не выполняется, поэтому и сохраненные статусы не нужны
+    if userbot and max_age > 0 and players:
+        cached = await db.get_players_subscription([player["id"] for player in players], max_age)
+        if refresh_unsubscribed:
+            cached = {player_id: is_subscribed for player_id, is_subscribed in cached.items() if is_subscribed}
+    
+    to_check = [player for player in players if player["id"] not in cached]
+    checked = await check_players_subscriptions(userbot, to_check, channel_id)
+    logger.info(f"Подписка игроков: {len(cached)} из сохраненных статусов, {len(to_check)} проверено через userbot")
+    
+    # Без userbot все игроки считаются подписанными - такой результат не сохраняем
+    if checked and userbot:
+        db.enqueue("update_players_subscription", checked)
+    
+    return {**cached, **checked}
+
+async def reverify_subscriptions(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Перепроверяет устаревшие статусы подписки игроков одобренных команд (задача JobQueue).
+    
+    За один запуск проверяется не более subscription_reverify_batch игроков,
+    начиная с никогда не проверенных, поэтому нагрузка на userbot ограничена
+    размером пачки и периодом задачи.
+    """
+    userbot = context.bot_data.get("userbot")
+    if not userbot:
+        return
+    
+    db = context.bot_data["db"]
+    max_age = context.bot_data.get("subscription_cache_ttl", SUBSCRIPTION_CACHE_TTL)
+    batch = context.bot_data.get("subscription_reverify_batch", SUBSCRIPTION_REVERIFY_BATCH)
+    
+    try:
+        players = await db.get_stale_subscriptions(max_age, limit=batch)
+        if not players:
+            return
         
-        # Ищем пользователя по имени в указанном сервере
-        for member in guild.members:
-            if member.name.lower() == username.lower():
-                return str(member.id)
+        checked = await check_players_subscriptions(userbot, players, CHANNEL_ID)
+        if checked:
+            await db.update_players_subscription(checked)
         
-        return None
+        unsubscribed = sum(1 for is_subscribed in checked.values() if not is_subscribed)
+        logger.info(f"Перепроверена подписка {len(checked)} из {len(players)} игроков, не подписаны: {unsubscribed}")
     except Exception as e:
-        logger.error(f"Ошибка при получении Discord ID для {username}: {e}")
+        logger.error(f"Ошибка при перепроверке подписки игроков: {e}")
+
+async def get_discord_id_by_username(username: str, discord_members: Optional[DiscordMemberIndex]) -> Optional[str]:
+    """
+    Получает Discord ID пользователя по его username.
+    
+    Args:
+        username: Discord username пользователя
+        discord_members: Индекс участников сервера Discord
+        
+    Returns:
+        Discord ID пользователя или None, если пользователь не найден
+    """
+    if not discord_members or not discord_members.ready:
+        logger.warning(f"Discord бот не готов. Невозможно проверить username {username}")
         return None
+    
+    member_id = discord_members.get_id(username)
+    return str(member_id) if member_id is not None else None
 
-async def check_discord_membership(discord_id: str, discord_bot) -> bool:
+async def check_discord_membership(discord_id: str, discord_members: Optional[DiscordMemberIndex]) -> bool:
     """
     Проверяет, является ли пользователь участником Discord сервера.
     
     Args:
         discord_id: Discord ID пользователя
-        discord_bot: Экземпляр бота Discord
+        discord_members: Индекс участников сервера Discord
         
     Returns:
         True, если пользователь состоит в сервере, иначе False
     """
-    if not discord_bot or not discord_bot.is_ready():
+    if not discord_members or not discord_members.ready:
         logger.warning("Discord бот не готов. Невозможно проверить членство")
         return False
     
     try:
-        # Получаем server_id напрямую из глобальной переменной
-        from main import DISCORD_SERVER_ID
-        
-        if not DISCORD_SERVER_ID:
-            logger.error("Discord Server ID не найден")
-            return False
-            
-        server_id = int(DISCORD_SERVER_ID)
-        guild = discord_bot.get_guild(server_id)
-        
-        if not guild:
-            logger.error(f"Сервер Discord с ID {server_id} не найден")
-            return False
-        
-        member = guild.get_member(int(discord_id))
-        return member is not None
-    except Exception as e:
+        return int(discord_id) in discord_members
+    except (TypeError, ValueError) as e:
         logger.error(f"Ошибка при проверке Discord-членства для ID {discord_id}: {e}")
         return False
 
@@ -65,7 +65,7 @@ async def show_my_team(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     db = context.bot_data["db"]
     
     # Пытаемся найти команду пользователя по его Telegram ID
-    team = db.get_team_by_telegram_id(user_id)
+    team = await db.get_team_by_telegram_id(user_id)
     
     if team:
         # Формируем сообщение с информацией о команде
@@ -126,7 +126,7 @@ async def search_team_by_name(update: Update, context: ContextTypes.DEFAULT_TYPE
         return STATUS_SEARCH_TEAM
     
     # Ищем команду по названию
-    team = db.get_team_by_name(team_name)
+    team = await db.get_team_by_name(team_name)
     
     if team:
         # Формируем сообщение с информацией о команде (публичная версия)
@@ -274,7 +274,7 @@ async def confirm_cancel_registration(update: Update, context: ContextTypes.DEFA
         
         # Удаляем команду из базы данных
         db = context.bot_data["db"]
-        if db.delete_team(team_id):
+        if await db.delete_team(team_id):
             await update.message.reply_text(
                 "✅ Регистрация вашей команды успешно отменена.\n\n"
                 "Вы можете создать новую команду в личном кабинете.",
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import re
+from typing import Dict, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from telegram.ext import (
     ContextTypes, CommandHandler, MessageHandler, CallbackQueryHandler,
@@ -65,7 +67,7 @@ async def show_my_team(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     db = context.bot_data["db"]
     
     # Пытаемся найти команду пользователя по его Telegram ID
-    team = db.get_team_by_telegram_id(user_id)
+    team = await db.get_team_by_telegram_id(user_id)
     
     if team:
         # Формируем сообщение с информацией о команде
@@ -126,7 +128,7 @@ async def search_team_by_name(update: Update, context: ContextTypes.DEFAULT_TYPE
         return STATUS_SEARCH_TEAM
     
     # Ищем команду по названию
-    team = db.get_team_by_name(team_name)
+    team = await db.get_team_by_name(team_name)
     
     if team:
         # Формируем сообщение с информацией о команде (публичная версия)
@@ -285,7 +287,7 @@ async def confirm_cancel_registration(update: Update, context: ContextTypes.DEFA
         
         # Удаляем команду из базы данных
         db = context.bot_data["db"]
-        if db.delete_team(team_id):
+        if await db.delete_team(team_id):
             await update.message.reply_text(
                 "✅ Регистрация вашей команды успешно отменена.\n\n"
                 "Вы можете создать новую команду в личном кабинете.",
@@ -340,6 +342,138 @@ async def back_to_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     from handlers.profile import profile_menu
     return await profile_menu(update, context)
 
+async def process_team_roles(db, discord_bot, discord_server_id, discord_role_id, discord_captain_role_id,
+                             team_id: int, old_status: Optional[str], new_status: str,
+                             tournament_id: Optional[int] = None) -> bool:
+    """
+    Выдать или снять Discord-роли игрокам команды при смене статуса.
+    
+    Роли выдаются при переходе в статус 'approved' и снимаются при выходе из него.
+    
+    Args:
+        db: Экземпляр базы данных
+        discord_bot: Экземпляр бота Discord
+        discord_server_id: ID сервера Discord
+        discord_role_id: ID роли участника
+        discord_captain_role_id: ID роли капитана (опционально)
+        team_id: ID команды
+        old_status: Прежний статус команды
+        new_status: Новый статус команды
+        tournament_id: ID турнира, к которому относится смена статуса
+        
+    Returns:
+        True, если роли обработаны или менять их не нужно, иначе False
+    """
+    grant = new_status == "approved" and old_status != "approved"
+    revoke = old_status == "approved" and new_status != "approved"
+    if not (grant or revoke):
+        return True
+    
+    if not discord_bot or not discord_server_id or not discord_role_id:
+        logger.warning(f"Discord не настроен, роли команды {team_id} не изменены")
+        return True
+    
+    if not discord_bot.is_ready():
+        logger.warning(f"Discord бот не готов. Невозможно изменить роли команды {team_id}")
+        return False
+    
+    guild = discord_bot.get_guild(int(discord_server_id))
+    if not guild:
+        logger.error(f"Сервер Discord с ID {discord_server_id} не найден")
+        return False
+    
+    role = guild.get_role(int(discord_role_id))
+    captain_role = guild.get_role(int(discord_captain_role_id)) if discord_captain_role_id else None
+    if not role:
+        logger.error(f"Роль Discord с ID {discord_role_id} не найдена")
+        return False
+    
+    team = await db.get_team_by_id(team_id)
+    if not team:
+        logger.error(f"Команда {team_id} не найдена, роли не изменены")
+        return False
+    
+    reason = f"Команда {team['team_name']}: {old_status} -> {new_status}"
+    if tournament_id:
+        reason += f" (турнир {tournament_id})"
+    
+    success = True
+    for player in team["players"]:
+        if not player.get("discord_id"):
+            continue
+        
+        member = guild.get_member(int(player["discord_id"]))
+        if member is None:
+            # Игрок покинул сервер - менять роли некому
+            continue
+        
+        roles = [role]
+        if player.get("is_captain") and captain_role:
+            roles.append(captain_role)
+        
+        try:
+            if grant:
+                await member.add_roles(*roles, reason=reason)
+            else:
+                await member.remove_roles(*roles, reason=reason)
+        except Exception as e:
+            logger.error(f"Ошибка при изменении ролей Discord для {player['discord_username']}: {e}")
+            success = False
+    
+    return success
+
+async def process_roles_batch(db, bot_data: dict, changes: Dict[int, Optional[str]], new_status: str,
+                              tournament_id: Optional[int] = None,
+                              concurrency: int = DISCORD_ROLE_CONCURRENCY) -> int:
+    """
+    Обработать Discord-роли для набора команд с ограниченным параллелизмом.
+    
+    Args:
+        db: Экземпляр базы данных
+        bot_data: bot_data приложения с настройками Discord
+        changes: Словарь {ID команды: прежний статус}
+        new_status: Новый статус команд
+        tournament_id: ID турнира
+        concurrency: Максимальное количество команд, обрабатываемых одновременно
+        
+    Returns:
+        Количество команд, роли которых обработать не удалось
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def process(team_id: int, old_status: Optional[str]) -> bool:
+        async with semaphore:
+            try:
+                return await process_team_roles(
+                    db, bot_data.get("discord_bot"), bot_data.get("discord_server_id"),
+                    bot_data.get("discord_role_id"), bot_data.get("discord_captain_role_id"),
+                    team_id, old_status, new_status, tournament_id=tournament_id
+                )
+            except Exception as e:
+                logger.error(f"Ошибка при обработке ролей команды {team_id}: {e}")
+                return False
+    
+    results = await asyncio.gather(*(process(team_id, old_status) for team_id, old_status in changes.items()))
+    failed = results.count(False)
+    
+    logger.info(f"Роли Discord обработаны для {len(results)} команд, с ошибками: {failed}")
+    return failed
+
+def queue_team_roles(context: ContextTypes.DEFAULT_TYPE, changes: Dict[int, Optional[str]], new_status: str,
+                     tournament_id: Optional[int] = None) -> None:
+    """
+    Поставить обработку Discord-ролей набора команд в фоновую задачу.
+    
+    Вызывается после сохранения статусов, чтобы администратор получил ответ,
+    не дожидаясь запросов к Discord.
+    """
+    if not changes:
+        return
+    
+    context.application.create_task(
+        process_roles_batch(context.bot_data["db"], context.bot_data, changes, new_status, tournament_id)
+    )
+
 def register_status_handlers(application: Application) -> None:
     """Регистрация всех обработчиков для проверки статуса."""
     
@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, CallbackQueryHandler,
-    ConversationHandler, filters, ContextTypes
+    ConversationHandler, TypeHandler, filters, ContextTypes
 )
 from pyrogram import Client
 from pyrogram.enums import ParseMode
@@ -16,6 +16,12 @@ from discord.ext import commands
 from discord.errors import NotFound
 
 from database import Database
+from memory_storage import MemoryStorage
+from async_database import AsyncDatabase
+from backup import BackupService
+from discord_members import DiscordMemberIndex
+from pubg_client import PubgClient
+from user_directory import UserDirectory
 from constants import *
 from handlers.admin import register_admin_handlers
 from handlers.status import register_status_handlers
@@ -37,6 +43,34 @@ DISCORD_SERVER_ID = os.environ.get("DISCORD_SERVER_ID")
 DISCORD_ROLE_ID = os.environ.get("DISCORD_ROLE_ID")
 DISCORD_CAPTAIN_ROLE_ID = os.environ.get("DISCORD_CAPTAIN_ROLE_ID")
 USERBOT_TOKEN = os.environ.get("USERBOT_TOKEN")
+# Хранилище данных: sqlite (файл tournament.db) или memory (в памяти процесса, данные не сохраняются)
+DB_BACKEND = os.environ.get("DB_BACKEND", "sqlite")
+DB_READERS = int(os.environ.get("DB_READERS", "4"))
+# Измерение времени запросов к базе (/dbstats, по умолчанию отключено) и порог журнала медленных запросов (мс)
+DB_QUERY_STATS = os.environ.get("DB_QUERY_STATS", "0") == "1"
+DB_SLOW_QUERY_MS = int(os.environ.get("DB_SLOW_QUERY_MS", "100"))
+# Очередь записи: максимум записей в одной транзакции и время сбора пачки (мс)
+DB_WRITE_BATCH = int(os.environ.get("DB_WRITE_BATCH", "100"))
+DB_WRITE_DELAY_MS = int(os.environ.get("DB_WRITE_DELAY_MS", "10"))
+# Период (в секундах) перечитывания списка администраторов из базы; 0 - отключено
+ADMIN_RESYNC_INTERVAL = int(os.environ.get("ADMIN_RESYNC_INTERVAL", "0"))
+# Резервные копии базы: период (в секундах, 0 - только по команде /backup), каталог и количество хранимых снимков
+BACKUP_INTERVAL = int(os.environ.get("BACKUP_INTERVAL", "3600"))
+BACKUP_DIR = os.environ.get("BACKUP_DIR", "backups")
+BACKUP_KEEP = int(os.environ.get("BACKUP_KEEP", "24"))
+# Кэш статусов подписки на канал: срок актуальности (секунд), период фоновой перепроверки
+# игроков одобренных команд (секунд, 0 - отключена) и количество игроков за один запуск
+SUBSCRIPTION_CACHE_TTL = int(os.environ.get("SUBSCRIPTION_CACHE_TTL", str(SUBSCRIPTION_CACHE_TTL)))
+SUBSCRIPTION_REVERIFY_INTERVAL = int(os.environ.get("SUBSCRIPTION_REVERIFY_INTERVAL", "600"))
+SUBSCRIPTION_REVERIFY_BATCH = int(os.environ.get("SUBSCRIPTION_REVERIFY_BATCH", str(SUBSCRIPTION_REVERIFY_BATCH)))
+# Справочник username -> Telegram ID: сроки актуальности записей (секунд) и период (секунд, 0 - отключено)
+# фонового разрешения username игроков, которых нет в справочнике
+USER_DIRECTORY_TTL = int(os.environ.get("USER_DIRECTORY_TTL", str(USER_DIRECTORY_TTL)))
+USER_DIRECTORY_NEGATIVE_TTL = int(os.environ.get("USER_DIRECTORY_NEGATIVE_TTL", str(USER_DIRECTORY_NEGATIVE_TTL)))
+USER_DIRECTORY_REFRESH_INTERVAL = int(os.environ.get("USER_DIRECTORY_REFRESH_INTERVAL", "3600"))
+# API поиска игроков PUBG (адрес можно заменить, например, на локальную заглушку) и таймаут запроса (секунд)
+PUBG_API_URL = os.environ.get("PUBG_API_URL", PUBG_API_URL)
+PUBG_API_TIMEOUT = float(os.environ.get("PUBG_API_TIMEOUT", str(PUBG_API_TIMEOUT)))
 
 if not BOT_TOKEN:
     logger.error("Не установлен BOT_TOKEN в .env файле!")
@@ -47,8 +81,27 @@ if BOT_TOKEN == USERBOT_TOKEN:
     logger.error("Ошибка: BOT_TOKEN и USERBOT_TOKEN должны быть разными!")
     exit(1)
 
-# Инициализация базы данных
-db = Database()
+if DB_BACKEND == "memory":
+    logger.warning("Используется хранилище в памяти: данные будут потеряны при остановке бота")
+    db = MemoryStorage()
+    backup_service = None
+else:
+    # Инициализация базы данных (пул: одно соединение для записи и DB_READERS для чтения)
+    db = Database(readers=DB_READERS, query_stats=DB_QUERY_STATS, slow_query_threshold=DB_SLOW_QUERY_MS / 1000)
+    # Горячее резервное копирование без остановки бота
+    backup_service = BackupService(db.db_file, backup_dir=BACKUP_DIR, keep=BACKUP_KEEP)
+# Обработчики работают с базой через асинхронную обертку, чтобы не блокировать цикл событий
+async_db = AsyncDatabase(db, write_batch=DB_WRITE_BATCH, write_delay=DB_WRITE_DELAY_MS / 1000)
+# Справочник username -> Telegram ID, чтобы не запрашивать одни и те же username через userbot
+user_directory = UserDirectory(
+    async_db, ttl=USER_DIRECTORY_TTL, negative_ttl=USER_DIRECTORY_NEGATIVE_TTL, batch_size=USER_DIRECTORY_BATCH
+)
+
+# Общий клиент API PUBG: соединения, кэш результатов и предохранитель на все время работы бота
+pubg_client = PubgClient(
+    PUBG_API_URL, timeout=PUBG_API_TIMEOUT, ttl=PUBG_CACHE_TTL, negative_ttl=PUBG_NEGATIVE_CACHE_TTL,
+    failure_threshold=PUBG_CIRCUIT_FAILURES, reset_timeout=PUBG_CIRCUIT_RESET
+)
 
 # Инициализация Pyrogram клиента (без запуска)
 userbot = None
@@ -65,10 +118,13 @@ else:
 
 # Инициализация Discord клиента (без запуска)
 discord_bot = None
+# Индекс участников сервера Discord (username -> ID), поддерживается событиями бота
+discord_members = DiscordMemberIndex(int(DISCORD_SERVER_ID) if DISCORD_SERVER_ID else None)
 if DISCORD_TOKEN and DISCORD_SERVER_ID:
     intents = discord.Intents.default()
-    intents.members = True  # Нужно для получения списка участников сервера
+    intents.members = True  # Нужно для получения списка участников сервера и событий участников
     discord_bot = commands.Bot(command_prefix='!', intents=intents)
+    discord_members.attach(discord_bot)
 else:
     logger.warning("DISCORD_TOKEN или DISCORD_SERVER_ID не установлены. Проверка Discord будет ограничена.")
 
@@ -220,11 +276,47 @@ async def back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     )
     return ConversationHandler.END
 
+async def resync_admins(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Периодически перечитывать администраторов, измененных в обход бота."""
+    try:
+        count = await context.bot_data["db"].refresh_admins()
+        logger.debug(f"Список администраторов обновлен: {count}")
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении списка администраторов: {e}")
+
+async def backup_database(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Периодически создавать резервную копию базы данных."""
+    try:
+        await asyncio.to_thread(context.bot_data["backup"].create_snapshot)
+    except Exception as e:
+        logger.error(f"Ошибка при резервном копировании базы данных: {e}")
+
+async def remember_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Пополнять справочник username -> Telegram ID отправителями всех обновлений."""
+    context.bot_data["user_directory"].observe(update.effective_user)
+
+async def refresh_user_directory(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Периодически разрешать одним запросом username игроков, которых нет в справочнике."""
+    userbot = context.bot_data.get("userbot")
+    if not userbot:
+        return
+    try:
+        directory = context.bot_data["user_directory"]
+        usernames = await context.bot_data["db"].get_stale_usernames(directory.ttl, limit=directory.batch_size)
+        if usernames:
+            resolved = await directory.resolve_many(usernames, userbot)
+            logger.info(f"Справочник Telegram ID: обновлено {len(resolved)} из {len(usernames)} username, {directory.stats()}")
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении справочника Telegram ID: {e}")
+
 async def post_init(application: Application):
     """Инициализация после запуска приложения."""
     # Упрощенная функция - только логирование
     logger.info("Основной бот запущен и готов к работе!")
     
+    # Запускаем очередь записи в базу данных
+    async_db.start()
+    
     # Запускаем дополнительные клиенты в отдельной задаче
     asyncio.create_task(start_extra_clients())
 
@@ -251,6 +343,13 @@ async def post_shutdown(application: Application):
         except Exception as e:
             logger.error(f"Ошибка при остановке Discord бота: {e}")
 
+    # Закрываем соединения с API PUBG
+    await pubg_client.close()
+
+    # Выполняем записи из очереди, дожидаемся запросов в потоках базы данных и закрываем соединения
+    await async_db.stop()
+    async_db.close()
+
 def main() -> None:
     """Запуск бота."""
     try:
@@ -260,12 +359,56 @@ def main() -> None:
         application = Application.builder().token(BOT_TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
         
         # Делаем базу данных, userbot и discord_bot доступными везде
-        application.bot_data['db'] = db
+        application.bot_data['db'] = async_db
         application.bot_data['userbot'] = userbot
         application.bot_data['discord_bot'] = discord_bot
+        application.bot_data['discord_members'] = discord_members
         application.bot_data['discord_server_id'] = DISCORD_SERVER_ID
         application.bot_data['discord_role_id'] = DISCORD_ROLE_ID
         application.bot_data['discord_captain_role_id'] = DISCORD_CAPTAIN_ROLE_ID
+        application.bot_data['backup'] = backup_service
+        application.bot_data['subscription_cache_ttl'] = SUBSCRIPTION_CACHE_TTL
+        application.bot_data['subscription_reverify_batch'] = SUBSCRIPTION_REVERIFY_BATCH
+        application.bot_data['user_directory'] = user_directory
+        application.bot_data['pubg'] = pubg_client
+        
+        # Периодическая синхронизация списка администраторов
+        if ADMIN_RESYNC_INTERVAL > 0:
+            if application.job_queue:
+                application.job_queue.run_repeating(
+                    resync_admins, interval=ADMIN_RESYNC_INTERVAL, first=ADMIN_RESYNC_INTERVAL
+                )
+            else:
+                logger.warning("JobQueue недоступна (нужен python-telegram-bot[job-queue]), синхронизация администраторов отключена")
+        
+        # Резервное копирование по расписанию
+        if backup_service and BACKUP_INTERVAL > 0:
+            if application.job_queue:
+                application.job_queue.run_repeating(backup_database, interval=BACKUP_INTERVAL, first=BACKUP_INTERVAL)
+            else:
+                logger.warning("JobQueue недоступна (нужен python-telegram-bot[job-queue]), резервное копирование по расписанию отключено")
+        
+        # Фоновая перепроверка подписки на канал игроков одобренных команд
+        if SUBSCRIPTION_REVERIFY_INTERVAL > 0:
+            if application.job_queue:
+                from handlers.profile import reverify_subscriptions
+                application.job_queue.run_repeating(
+                    reverify_subscriptions, interval=SUBSCRIPTION_REVERIFY_INTERVAL, first=SUBSCRIPTION_REVERIFY_INTERVAL
+                )
+            else:
+                logger.warning("JobQueue недоступна (нужен python-telegram-bot[job-queue]), перепроверка подписки отключена")
+        
+        # Фоновое разрешение username игроков, которых нет в справочнике Telegram ID
+        if USER_DIRECTORY_REFRESH_INTERVAL > 0:
+            if application.job_queue:
+                application.job_queue.run_repeating(
+                    refresh_user_directory, interval=USER_DIRECTORY_REFRESH_INTERVAL, first=60
+                )
+            else:
+                logger.warning("JobQueue недоступна (нужен python-telegram-bot[job-queue]), обновление справочника Telegram ID отключено")
+        
+        # Справочник Telegram ID пополняется из всех обновлений до остальных обработчиков
+        application.add_handler(TypeHandler(Update, remember_user), group=-1)
         
         # Регистрируем обработчики в главной части
         application.add_handler(CommandHandler("start", start))
@@ -0,0 +1,880 @@
+import bisect
+import itertools
+import logging
+import string
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from constants import MAX_PLAYERS
+from models import Player, Team, TeamTournament, Tournament
+from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Поля таблиц в том виде, в каком их возвращает Database
+_TEAM_FIELDS = ('id', 'team_name', 'status', 'registration_date', 'captain_contact', 'admin_comment')
+_PLAYER_FIELDS = ('id', 'nickname', 'telegram_username', 'telegram_id', 'discord_username', 'discord_id', 'is_captain')
+_TOURNAMENT_FIELDS = ('id', 'name', 'description', 'event_date', 'registration_open', 'created_date')
+
+
+def _fold(value: Any) -> Any:
+    """Нижний регистр как у LOWER() в SQLite: меняются только латинские буквы."""
+    return value.translate(_ASCII_LOWER) if isinstance(value, str) else value
+
+
+def _same(left: Any, right: Any) -> bool:
+    """Сравнение LOWER(left) = LOWER(right); NULL не равен ничему."""
+    return left is not None and right is not None and _fold(left) == _fold(right)
+
+
+def _now() -> str:
+    """Текущее время в том виде, в каком sqlite3 сохраняет datetime."""
+    return datetime.now().isoformat(" ")
+
+
+class MemoryStorage(Storage):
+    """
+    Хранилище в памяти процесса (реализация Storage).
+
+    Таблицы - словари записей по ID, поиск идет по индексам: названия
+    команд, игроки команды, игроки по Telegram ID, регистрации по команде
+    и по турниру. Поведение совпадает с Database, включая тексты ошибок
+    и порядок результатов, но без ввода-вывода: хранилище нужно для замеров
+    стоимости обработчиков отдельно от базы данных и для проверки контракта
+    Storage (tests/test_storage_contract.py). Данные не сохраняются между
+    запусками.
+
+    Все операции выполняются под одной блокировкой. Методы записи сначала
+    выполняют проверки и только затем изменяют данные, поэтому ошибка
+    не оставляет частичных изменений.
+    """
+
+    def __init__(self, admins: Iterable[Tuple[int, str]] = ((123456789, 'admin'),)):
+        """
+        Args:
+            admins: Начальные администраторы (telegram_id, username);
+                    по умолчанию - как в новой базе SQLite
+        """
+        self._lock = threading.RLock()
+        self._tournament_ids = itertools.count(1)
+        self._team_ids = itertools.count(1)
+        self._player_ids = itertools.count(1)
+
+        self._tournaments: Dict[int, Dict[str, Any]] = {}
+        self._teams: Dict[int, Dict[str, Any]] = {}
+        self._players: Dict[int, Dict[str, Any]] = {}
+        # Регистрации: (ID команды, ID турнира) -> статус, в порядке добавления
+        self._registrations: Dict[Tuple[int, int], str] = {}
+        self._admins: Dict[int, Dict[str, Any]] = {}
+        # Статистика по дням: день -> [регистрации, одобрено, отклонено]
+        self._stats: Dict[str, List[int]] = {}
+        # Справочник: username в нижнем регистре -> (Telegram ID или None, время разрешения)
+        self._telegram_users: Dict[str, Tuple[Optional[int], str]] = {}
+
+        # Индексы
+        self._team_names: Dict[str, Set[int]] = {}
+        # Ключи (registration_date, id) всех команд по возрастанию - порядок списков и пагинации
+        self._team_order: List[Tuple[str, int]] = []
+        self._team_players: Dict[int, List[int]] = {}
+        self._players_by_telegram: Dict[Any, Set[int]] = {}
+        self._team_registrations: Dict[int, Dict[int, None]] = {}
+        self._tournament_registrations: Dict[int, Dict[int, None]] = {}
+        self._usernames_by_telegram: Dict[int, Set[str]] = {}
+        self._admin_ids: frozenset = frozenset()
+
+        for telegram_id, username in admins:
+            self._admins[telegram_id] = {'telegram_id': telegram_id, 'username': username, 'added_date': _now()}
+        self.refresh_admins()
+
+    @contextmanager
+    def transaction(self) -> Iterator["MemoryStorage"]:
+        # Отката нет: каждый метод атомарен сам по себе (проверки до изменений)
+        with self._lock:
+            yield self
+
+    # ----- Внутренние операции с таблицами -----
+
+    def _insert_team(self, team_name: str, captain_contact: str, status: str = 'pending',
+                     tournament_id: Optional[int] = None, registration_date: Optional[str] = None) -> int:
+        team_id = next(self._team_ids)
+        self._teams[team_id] = {
+            'id': team_id,
+            'team_name': team_name,
+            'captain_contact': captain_contact,
+            'registration_date': registration_date or _now(),
+            'status': status,
+            'admin_comment': None,
+            'tournament_id': tournament_id,
+        }
+        self._team_names.setdefault(_fold(team_name), set()).add(team_id)
+        bisect.insort(self._team_order, (self._teams[team_id]['registration_date'], team_id))
+        self._team_players[team_id] = []
+        return team_id
+
+    @staticmethod
+    def _player_row(player: Dict[str, Any], is_captain: bool) -> Dict[str, Any]:
+        """Запись игрока без ID и команды (обязательные поля проверяются до вставки команды)."""
+        return {
+            'nickname': player['nickname'],
+            'telegram_username': player['username'],
+            'telegram_id': player.get('telegram_id'),
+            'discord_username': player.get('discord_username'),
+            'discord_id': player.get('discord_id'),
+            'is_captain': int(bool(is_captain)),
+            'sub': None,
+            'sub_verified_at': None,
+        }
+
+    def _insert_player(self, team_id: int, row: Dict[str, Any]) -> int:
+        player_id = next(self._player_ids)
+        self._players[player_id] = {'id': player_id, 'team_id': team_id, **row}
+        self._team_players[team_id].append(player_id)
+        if row['telegram_id'] is not None:
+            self._players_by_telegram.setdefault(row['telegram_id'], set()).add(player_id)
+        return player_id
+
+    def _remove_player(self, player_id: int) -> None:
+        player = self._players.pop(player_id)
+        self._team_players[player['team_id']].remove(player_id)
+        if player['telegram_id'] is not None:
+            self._players_by_telegram[player['telegram_id']].discard(player_id)
+
+    def _remove_team(self, team_id: int) -> None:
+        """Удалить команду и ее игроков (регистрации удаляет вызывающий код)."""
+        team = self._teams.pop(team_id)
+        self._team_names[_fold(team['team_name'])].discard(team_id)
+        del self._team_order[bisect.bisect_left(self._team_order, (team['registration_date'], team_id))]
+        for player_id in list(self._team_players.pop(team_id)):
+            player = self._players.pop(player_id)
+            if player['telegram_id'] is not None:
+                self._players_by_telegram[player['telegram_id']].discard(player_id)
+
+    def _add_registration(self, team_id: int, tournament_id: int, status: str) -> None:
+        self._registrations[(team_id, tournament_id)] = status
+        self._team_registrations.setdefault(team_id, {})[tournament_id] = None
+        self._tournament_registrations.setdefault(tournament_id, {})[team_id] = None
+
+    def _remove_registration(self, team_id: int, tournament_id: int) -> None:
+        del self._registrations[(team_id, tournament_id)]
+        del self._team_registrations[team_id][tournament_id]
+        del self._tournament_registrations[tournament_id][team_id]
+
+    def _bump_stats(self, registrations: int = 0, approved: int = 0, rejected: int = 0) -> None:
+        if not (registrations or approved or rejected):
+            return
+        counters = self._stats.setdefault(datetime.now().date().isoformat(), [0, 0, 0])
+        counters[0] += registrations
+        counters[1] += approved
+        counters[2] += rejected
+
+    def _teams_named(self, team_name: str) -> List[Dict[str, Any]]:
+        """Команды с названием team_name без учета регистра."""
+        return [self._teams[team_id] for team_id in self._team_names.get(_fold(team_name), ())]
+
+    def _team_player_rows(self, team_id: int) -> List[Dict[str, Any]]:
+        return [self._players[player_id] for player_id in self._team_players.get(team_id, ())]
+
+    def _player_with_team(self, player_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        player = self._players.get(player_id)
+        team = self._teams.get(player['team_id']) if player else None
+        if team is None:
+            raise ValueError("Игрок не найден")
+        return player, team
+
+    @staticmethod
+    def _make_draft(team: Dict[str, Any]) -> None:
+        # Изменение состава возвращает поданную заявку в черновик
+        if team['status'] in ["pending", "approved", "rejected"]:
+            team['status'] = "draft"
+
+    @staticmethod
+    def _newest_first(teams: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return sorted(teams, key=lambda team: (team['registration_date'], team['id']), reverse=True)
+
+    def _filtered_teams(self, status: Optional[str], tournament_id: Optional[int]) -> List[Dict[str, Any]]:
+        """Команды для get_all_teams и get_team_models (см. Database._teams_filter)."""
+        if tournament_id:
+            teams = [
+                self._teams[team_id]
+                for team_id in self._tournament_registrations.get(tournament_id, ())
+                if team_id in self._teams
+                and (not status or self._registrations[(team_id, tournament_id)] == status)
+            ]
+            return self._newest_first(teams)
+        teams = (self._teams[team_id] for _, team_id in reversed(self._team_order))
+        return [team for team in teams if not status or team['status'] == status]
+
+    def _player_dicts(self, team_id: int) -> List[Dict[str, Any]]:
+        return [{field: player[field] for field in _PLAYER_FIELDS} for player in self._team_player_rows(team_id)]
+
+    def _registration_dicts(self, team_id: int) -> List[Dict[str, Any]]:
+        registrations = []
+        for tournament_id in self._team_registrations.get(team_id, ()):
+            tournament = self._tournaments.get(tournament_id)
+            if tournament is not None:
+                registrations.append({
+                    'id': tournament_id,
+                    'name': tournament['name'],
+                    'event_date': tournament['event_date'],
+                    'registration_status': self._registrations[(team_id, tournament_id)],
+                })
+        return registrations
+
+    def _team_dict(self, team: Dict[str, Any], legacy: bool = False) -> Dict[str, Any]:
+        """
+        Команда с игроками и турнирами.
+
+        Args:
+            team: Запись команды
+            legacy: Добавить устаревшую привязку tournament_id (и название
+                    и дату турнира, если он есть), как в поиске команд Database
+        """
+        result = {field: team[field] for field in _TEAM_FIELDS}
+        if legacy:
+            result['tournament_id'] = team['tournament_id']
+            tournament = self._tournaments.get(team['tournament_id'])
+            if tournament is not None:
+                result['tournament_name'] = tournament['name']
+                result['tournament_date'] = tournament['event_date']
+        result['players'] = self._player_dicts(team['id'])
+        result['tournaments'] = self._registration_dicts(team['id'])
+        return result
+
+    def _team_model(self, team: Dict[str, Any]) -> Team:
+        players = tuple(
+            Player.from_row([player[field] for field in _PLAYER_FIELDS])
+            for player in self._team_player_rows(team['id'])
+        )
+        tournaments = tuple(
+            TeamTournament(item['id'], item['name'], item['event_date'], item['registration_status'])
+            for item in self._registration_dicts(team['id'])
+        )
+        return Team.from_row([team[field] for field in _TEAM_FIELDS], players, tournaments)
+
+    def _tournaments_newest_first(self) -> List[Dict[str, Any]]:
+        return sorted(self._tournaments.values(), key=lambda tournament: tournament['created_date'], reverse=True)
+
+    # ----- Турниры -----
+
+    def create_tournament(self, name: str, description: str, event_date: str) -> int:
+        with self._lock:
+            if any(tournament['name'] == name for tournament in self._tournaments.values()):
+                raise ValueError("Турнир с таким названием уже существует")
+            tournament_id = next(self._tournament_ids)
+            self._tournaments[tournament_id] = {
+                'id': tournament_id,
+                'name': name,
+                'description': description,
+                'event_date': event_date,
+                'registration_open': 1,
+                'created_date': _now(),
+            }
+            return tournament_id
+
+    def get_all_tournaments(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            tournaments = []
+            for tournament in self._tournaments_newest_first():
+                statuses = [
+                    self._registrations[(team_id, tournament['id'])]
+                    for team_id in self._tournament_registrations.get(tournament['id'], ())
+                ]
+                tournaments.append({
+                    **tournament,
+                    'team_count': len(statuses),
+                    'pending_count': statuses.count('pending'),
+                    'approved_count': statuses.count('approved'),
+                    'rejected_count': statuses.count('rejected'),
+                })
+            return tournaments
+
+    def get_tournament_by_id(self, tournament_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            tournament = self._tournaments.get(tournament_id)
+            return dict(tournament) if tournament is not None else None
+
+    def update_tournament(self, tournament_id: int, name: str = None, description: str = None,
+                          event_date: str = None, registration_open: bool = None) -> bool:
+        changes = {
+            field: value
+            for field, value in (('name', name), ('description', description),
+                                 ('event_date', event_date), ('registration_open', registration_open))
+            if value is not None
+        }
+        if not changes:
+            return False
+        if registration_open is not None:
+            changes['registration_open'] = int(registration_open)
+
+        with self._lock:
+            tournament = self._tournaments.get(tournament_id)
+            if tournament is None:
+                return False
+            if name is not None and any(
+                other['name'] == name and other_id != tournament_id
+                for other_id, other in self._tournaments.items()
+            ):
+                raise ValueError("Турнир с таким названием уже существует")
+            tournament.update(changes)
+            return True
+
+    def get_active_tournaments(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(tournament) for tournament in self._tournaments_newest_first() if tournament['registration_open']]
+
+    def delete_tournament(self, tournament_id: int) -> bool:
+        with self._lock:
+            # Удаляются команды с устаревшей привязкой к турниру и все регистрации на него;
+            # прочие регистрации таких команд остаются, как в Database
+            for team_id in [team['id'] for team in self._teams.values() if team['tournament_id'] == tournament_id]:
+                self._remove_team(team_id)
+            for team_id in list(self._tournament_registrations.get(tournament_id, ())):
+                self._remove_registration(team_id, tournament_id)
+            return self._tournaments.pop(tournament_id, None) is not None
+
+    def get_tournament_models(self) -> List[Tournament]:
+        with self._lock:
+            return [
+                Tournament.from_row([tournament[field] for field in _TOURNAMENT_FIELDS])
+                for tournament in self._tournaments_newest_first()
+            ]
+
+    # ----- Команды -----
+
+    def register_team(self, team_name: str, players: List[Dict[str, Any]], captain_contact: str,
+                      tournament_id: Optional[int] = None) -> int:
+        with self._lock:
+            if any(team['team_name'] == team_name for team in self._teams_named(team_name)):
+                raise ValueError("Команда с таким названием уже существует")
+            rows = [self._player_row(player, player.get('is_captain', False)) for player in players]
+            team_id = self._insert_team(team_name, captain_contact, tournament_id=tournament_id or None)
+            for row in rows:
+                self._insert_player(team_id, row)
+            self._bump_stats(registrations=1)
+            return team_id
+
+    def import_teams(self, teams: List[Dict[str, Any]], status: str = 'pending') -> Tuple[List[int], Dict[int, str]]:
+        errors: Dict[int, str] = {}
+
+        with self._lock:
+            for index, team in enumerate(teams):
+                tournament_id = team.get('tournament_id')
+                if tournament_id and tournament_id not in self._tournaments:
+                    errors[index] = f"Турнир {tournament_id} не найден"
+
+            for index, team in enumerate(teams):
+                if index in errors:
+                    continue
+                if self._teams_named(team['team_name']):
+                    errors[index] = "Команда с таким названием уже существует"
+                    continue
+                for player in team['players']:
+                    player_ids = self._players_by_telegram.get(player.get('telegram_id'))
+                    if player_ids:
+                        other_team = self._teams[self._players[max(player_ids)]['team_id']]['team_name']
+                        errors[index] = f"Игрок {player['nickname']} уже зарегистрирован в команде '{other_team}'"
+                        break
+
+            # Как ON CONFLICT (team_name) DO NOTHING в Database: совпадение названия
+            # с командой из этой же пачки пропускает команду как дубликат
+            batch_names: Set[str] = set()
+            for index, team in enumerate(teams):
+                if index in errors:
+                    continue
+                if team['team_name'] in batch_names:
+                    errors[index] = "Команда с таким названием уже существует"
+                    continue
+                batch_names.add(team['team_name'])
+
+            accepted = [team for index, team in enumerate(teams) if index not in errors]
+            rows = [
+                [self._player_row(player, player.get('is_captain', False)) for player in team['players']]
+                for team in accepted
+            ]
+            now = _now()
+            team_ids = []
+            for team, team_rows in zip(accepted, rows):
+                team_id = self._insert_team(team['team_name'], team['captain_contact'], status=status,
+                                            registration_date=now)
+                for row in team_rows:
+                    self._insert_player(team_id, row)
+                if team.get('tournament_id'):
+                    self._add_registration(team_id, team['tournament_id'], status)
+                team_ids.append(team_id)
+
+            self._bump_stats(
+                registrations=len(accepted),
+                approved=len(accepted) if status == 'approved' else 0
+            )
+            return team_ids, errors
+
+    def create_team(self, team_name: str, captain: Dict[str, Any]) -> int:
+        with self._lock:
+            if self._teams_named(team_name):
+                raise ValueError("Команда с таким названием уже существует")
+            row = self._player_row(captain, True)
+            team_id = self._insert_team(team_name, f"@{captain['username']}", status="draft")
+            self._insert_player(team_id, row)
+            return team_id
+
+    def get_user_teams(self, telegram_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            team_ids = {self._players[player_id]['team_id'] for player_id in self._players_by_telegram.get(telegram_id, ())}
+            teams = self._newest_first(self._teams[team_id] for team_id in team_ids if team_id in self._teams)
+            return [self._team_dict(team, legacy=True) for team in teams]
+
+    def get_team_by_id(self, team_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            team = self._teams.get(team_id)
+            return self._team_dict(team, legacy=True) if team is not None else None
+
+    def get_team_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            player_ids = self._players_by_telegram.get(telegram_id)
+            if not player_ids:
+                return None
+            return self.get_team_by_id(self._players[min(player_ids)]['team_id'])
+
+    def get_team_by_name(self, team_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            teams = self._newest_first(self._teams_named(team_name))
+            return self._team_dict(teams[0], legacy=True) if teams else None
+
+    def get_team_tournaments(self, team_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {**self._tournaments[tournament_id], 'registration_status': self._registrations[(team_id, tournament_id)]}
+                for tournament_id in self._team_registrations.get(team_id, ())
+                if tournament_id in self._tournaments
+            ]
+
+    def get_all_teams(self, status: Optional[str] = None, tournament_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._team_dict(team) for team in self._filtered_teams(status, tournament_id)]
+
+    def get_team_models(self, status: Optional[str] = None, tournament_id: Optional[int] = None) -> List[Team]:
+        with self._lock:
+            return [self._team_model(team) for team in self._filtered_teams(status, tournament_id)]
+
+    def get_team_model(self, team_id: int) -> Optional[Team]:
+        with self._lock:
+            team = self._teams.get(team_id)
+            return self._team_model(team) if team is not None else None
+
+    def get_teams_page(self, status: Optional[str] = None, tournament_id: Optional[int] = None,
+                       cursor: Optional[int] = None, direction: str = "next",
+                       limit: int = 10) -> Dict[str, Any]:
+        if direction not in ("next", "prev"):
+            raise ValueError(f"Неверное направление пагинации: {direction}")
+
+        with self._lock:
+            # Если команда-курсор была удалена, начинаем с первой страницы
+            if cursor is not None and cursor not in self._teams:
+                cursor, direction = None, "next"
+
+            backwards = direction == "prev"
+            key = None
+            if cursor is not None:
+                key = (self._teams[cursor]['registration_date'], cursor)
+
+            if tournament_id is not None:
+                rows = []
+                for team_id in self._tournament_registrations.get(tournament_id, ()):
+                    team = self._teams.get(team_id)
+                    registration_status = self._registrations[(team_id, tournament_id)]
+                    if team is not None and (not status or registration_status == status):
+                        rows.append({**team, 'status': registration_status})
+                if key is not None:
+                    rows = [
+                        row for row in rows
+                        if ((row['registration_date'], row['id']) > key if backwards
+                            else (row['registration_date'], row['id']) < key)
+                    ]
+                rows = self._newest_first(rows)
+                if backwards:
+                    rows.reverse()
+                rows = rows[:limit + 1]
+            else:
+                # Обход индекса порядка от курсора до limit + 1 подходящих команд
+                order = self._team_order
+                if backwards:
+                    start = bisect.bisect_right(order, key) if key is not None else 0
+                    positions = range(start, len(order))
+                else:
+                    end = bisect.bisect_left(order, key) if key is not None else len(order)
+                    positions = range(end - 1, -1, -1)
+                rows = []
+                for position in positions:
+                    team = self._teams[order[position][1]]
+                    if not status or team['status'] == status:
+                        rows.append(team)
+                        if len(rows) > limit:
+                            break
+
+            teams = [
+                {field: row[field] for field in ('id', 'team_name', 'status', 'registration_date')}
+                for row in rows
+            ]
+
+        return self._page(teams, limit, cursor, backwards)
+
+    def count_teams(self, group_by: Tuple[str, ...] = ('status',), status: Optional[str] = None,
+                    tournament_id: Optional[int] = None) -> Dict[Any, int]:
+        unknown = set(group_by) - {'status', 'tournament'}
+        if not group_by or unknown:
+            raise ValueError(f"Неверные поля группировки: {', '.join(unknown) or 'не указаны'}")
+
+        with self._lock:
+            if 'tournament' in group_by or tournament_id is not None:
+                rows = [
+                    {'status': row_status, 'tournament': row_tournament_id}
+                    for (_, row_tournament_id), row_status in self._registrations.items()
+                    if tournament_id is None or row_tournament_id == tournament_id
+                ]
+            else:
+                rows = [{'status': team['status']} for team in self._teams.values()]
+
+        counts: Dict[Any, int] = {}
+        for row in rows:
+            if status and row['status'] != status:
+                continue
+            key = row[group_by[0]] if len(group_by) == 1 else tuple(row[field] for field in group_by)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def team_name_exists(self, team_name: str) -> bool:
+        with self._lock:
+            return bool(self._teams_named(team_name))
+
+    def update_team_name(self, team_id: int, new_name: str) -> bool:
+        with self._lock:
+            team = self._teams.get(team_id)
+            if team is None:
+                raise ValueError("Команда не найдена")
+            if any(other['id'] != team_id for other in self._teams_named(new_name)):
+                raise ValueError("Команда с таким названием уже существует")
+
+            self._team_names[_fold(team['team_name'])].discard(team_id)
+            self._team_names.setdefault(_fold(new_name), set()).add(team_id)
+            team['team_name'] = new_name
+            self._make_draft(team)
+            return True
+
+    def delete_team(self, team_id: int) -> bool:
+        with self._lock:
+            for tournament_id in list(self._team_registrations.get(team_id, ())):
+                self._remove_registration(team_id, tournament_id)
+            if team_id not in self._teams:
+                return False
+            self._remove_team(team_id)
+            return True
+
+    # ----- Регистрации на турниры и статусы -----
+
+    def register_team_for_tournament(self, team_id: int, tournament_id: int) -> bool:
+        with self._lock:
+            team = self._teams.get(team_id)
+            if team is None:
+                raise ValueError("Команда не найдена")
+            if team['status'] != 'draft':
+                raise ValueError("Команда уже зарегистрирована или имеет неподходящий статус")
+
+            tournament = self._tournaments.get(tournament_id)
+            if tournament is None:
+                raise ValueError("Турнир не найден")
+            if not tournament['registration_open']:
+                raise ValueError("Регистрация на турнир закрыта")
+
+            if len(self._team_players[team_id]) < 4:  # Минимум 4 игрока (3 + капитан)
+                raise ValueError("Для регистрации необходимо минимум 4 игрока (включая капитана)")
+
+            if (team_id, tournament_id) in self._registrations:
+                raise ValueError("Команда уже зарегистрирована на этот турнир")
+
+            self._add_registration(team_id, tournament_id, 'pending')
+            team['status'] = 'pending'
+            self._bump_stats(registrations=1)
+            return True
+
+    def register_team_for_multiple_tournaments(self, team_id: int, tournament_ids: List[int]) -> bool:
+        with self._lock:
+            if len(set(tournament_ids)) != len(tournament_ids) or any(
+                (team_id, tournament_id) in self._registrations for tournament_id in tournament_ids
+            ):
+                logger.error(f"Ошибка при регистрации команды на турниры: команда {team_id} уже зарегистрирована")
+                return False
+            for tournament_id in tournament_ids:
+                self._add_registration(team_id, tournament_id, 'pending')
+            return True
+
+    def update_team_status(self, team_id: int, status: str, comment: Optional[str] = None) -> bool:
+        with self._lock:
+            team = self._teams.get(team_id)
+            if team is None:
+                return False
+            if team['status'] != status:
+                self._bump_stats(approved=int(status == 'approved'), rejected=int(status == 'rejected'))
+            team['status'] = status
+            if comment is not None:
+                team['admin_comment'] = comment
+            return True
+
+    def update_registrations_status(self, tournament_id: int, status: str,
+                                    team_ids: Optional[List[int]] = None,
+                                    current_status: Optional[str] = None) -> Dict[int, str]:
+        if status not in ('pending', 'approved', 'rejected'):
+            raise ValueError(f"Неверный статус регистрации: {status}")
+        if team_ids is not None and not team_ids:
+            return {}
+
+        with self._lock:
+            candidates = self._tournament_registrations.get(tournament_id, {})
+            if team_ids is not None:
+                candidates = [team_id for team_id in dict.fromkeys(team_ids) if team_id in candidates]
+            previous = {
+                team_id: self._registrations[(team_id, tournament_id)]
+                for team_id in candidates
+                if not current_status or self._registrations[(team_id, tournament_id)] == current_status
+            }
+
+            changed = [team_id for team_id, old_status in previous.items() if old_status != status]
+            for team_id in changed:
+                self._registrations[(team_id, tournament_id)] = status
+                if team_id in self._teams:
+                    self._teams[team_id]['status'] = status
+
+            self._bump_stats(
+                approved=len(changed) if status == 'approved' else 0,
+                rejected=len(changed) if status == 'rejected' else 0
+            )
+            return previous
+
+    # ----- Игроки -----
+
+    def add_player_to_team(self, team_id: int, player: Dict[str, Any]) -> bool:
+        with self._lock:
+            team = self._teams.get(team_id)
+            if team is None:
+                raise ValueError("Команда не найдена")
+
+            members = self._team_player_rows(team_id)
+            if len(members) > MAX_PLAYERS:
+                raise ValueError(f"Превышено максимальное количество игроков ({MAX_PLAYERS + 1}, включая капитана)")
+
+            if any(
+                _same(member['nickname'], player['nickname']) or _same(member['telegram_username'], player['username'])
+                for member in members
+            ):
+                raise ValueError("Игрок с таким никнеймом или Telegram username уже есть в команде")
+
+            if player.get('telegram_id'):
+                other_ids = sorted(
+                    player_id for player_id in self._players_by_telegram.get(player['telegram_id'], ())
+                    if self._players[player_id]['team_id'] != team_id
+                )
+                if other_ids:
+                    other_team = self._teams[self._players[other_ids[0]]['team_id']]['team_name']
+                    raise ValueError(f"Этот игрок уже зарегистрирован в команде '{other_team}'")
+
+            self._insert_player(team_id, self._player_row(player, player.get('is_captain', False)))
+            self._make_draft(team)
+            return True
+
+    def check_username_exists_in_team(self, team_id: int, username: str) -> bool:
+        with self._lock:
+            return any(_same(player['telegram_username'], username) for player in self._team_player_rows(team_id))
+
+    def check_discord_exists_in_team(self, team_id: int, discord_username: str,
+                                     exclude_player_id: Optional[int] = None) -> bool:
+        with self._lock:
+            return any(
+                _same(player['discord_username'], discord_username)
+                and not (exclude_player_id and player['id'] == exclude_player_id)
+                for player in self._team_player_rows(team_id)
+            )
+
+    def check_nickname_exists_in_team(self, team_id: int, nickname: str) -> bool:
+        with self._lock:
+            return any(_same(player['nickname'], nickname) for player in self._team_player_rows(team_id))
+
+    def update_player_nickname(self, player_id: int, new_nickname: str) -> bool:
+        with self._lock:
+            player, team = self._player_with_team(player_id)
+            if any(
+                _same(other['nickname'], new_nickname) and other['id'] != player_id
+                for other in self._team_player_rows(team['id'])
+            ):
+                raise ValueError("Игрок с таким никнеймом уже есть в команде")
+            player['nickname'] = new_nickname
+            self._make_draft(team)
+            return True
+
+    def update_player_username(self, player_id: int, new_username: str) -> bool:
+        with self._lock:
+            player, team = self._player_with_team(player_id)
+            if any(
+                _same(other['telegram_username'], new_username) and other['id'] != player_id
+                for other in self._team_player_rows(team['id'])
+            ):
+                raise ValueError("Игрок с таким Telegram username уже есть в команде")
+            player['telegram_username'] = new_username
+            self._make_draft(team)
+            return True
+
+    def update_player_discord(self, player_id: int, discord_username: str, discord_id: str) -> bool:
+        with self._lock:
+            player, team = self._player_with_team(player_id)
+            player['discord_username'] = discord_username
+            player['discord_id'] = discord_id
+            self._make_draft(team)
+            return True
+
+    def update_player_subscription(self, player_id: int, is_subscribed: bool) -> bool:
+        with self._lock:
+            player = self._players.get(player_id)
+            if player is None:
+                return False
+            player['sub'] = "+" if is_subscribed else "-"
+            player['sub_verified_at'] = _now()
+            return True
+
+    def update_players_subscription(self, subscriptions: Dict[int, bool]) -> int:
+        now = _now()
+        with self._lock:
+            updated = 0
+            for player_id, is_subscribed in subscriptions.items():
+                player = self._players.get(player_id)
+                if player is not None:
+                    player['sub'] = "+" if is_subscribed else "-"
+                    player['sub_verified_at'] = now
+                    updated += 1
+            return updated
+
+    def get_players_subscription(self, player_ids: List[int], max_age: float) -> Dict[int, bool]:
+        since = (datetime.now() - timedelta(seconds=max_age)).isoformat(" ")
+        with self._lock:
+            subscriptions = {}
+            for player_id in player_ids:
+                player = self._players.get(player_id)
+                if player is not None and player['sub'] is not None and (player['sub_verified_at'] or '') >= since:
+                    subscriptions[player_id] = player['sub'] == "+"
+            return subscriptions
+
+    def get_stale_subscriptions(self, max_age: float, limit: int = 50, status: str = 'approved') -> List[Dict[str, Any]]:
+        since = (datetime.now() - timedelta(seconds=max_age)).isoformat(" ")
+        with self._lock:
+            stale = [
+                player for player in self._players.values()
+                if player['telegram_id'] is not None
+                and self._teams[player['team_id']]['status'] == status
+                and (player['sub_verified_at'] is None or player['sub_verified_at'] < since)
+            ]
+            # Сначала никогда не проверенные, затем проверенные раньше всех
+            stale.sort(key=lambda player: (player['sub_verified_at'] is not None, player['sub_verified_at'] or '', player['id']))
+            return [
+                {'id': player['id'], 'nickname': player['nickname'], 'telegram_id': player['telegram_id']}
+                for player in stale[:limit]
+            ]
+
+    def delete_player(self, player_id: int) -> bool:
+        with self._lock:
+            player, team = self._player_with_team(player_id)
+            if player['is_captain']:
+                raise ValueError("Нельзя удалить капитана команды")
+            self._remove_player(player_id)
+            self._make_draft(team)
+            return True
+
+    # ----- Справочник username -> Telegram ID -----
+
+    def _forget_username(self, username: str) -> None:
+        telegram_id, _ = self._telegram_users.pop(username)
+        if telegram_id is not None:
+            self._usernames_by_telegram[telegram_id].discard(username)
+
+    def save_telegram_ids(self, entries: Dict[str, Optional[int]]) -> int:
+        entries = {username.lstrip("@").lower(): telegram_id for username, telegram_id in entries.items()}
+        now = _now()
+        with self._lock:
+            for username, telegram_id in entries.items():
+                if telegram_id is not None:
+                    for previous in list(self._usernames_by_telegram.get(telegram_id, ())):
+                        if previous != username:
+                            self._forget_username(previous)
+            for username, telegram_id in entries.items():
+                if username in self._telegram_users:
+                    self._forget_username(username)
+                self._telegram_users[username] = (telegram_id, now)
+                if telegram_id is not None:
+                    self._usernames_by_telegram.setdefault(telegram_id, set()).add(username)
+            return len(entries)
+
+    def get_telegram_ids(self, usernames: List[str], max_age: float,
+                         negative_max_age: float) -> Dict[str, Optional[int]]:
+        now = datetime.now()
+        since = (now - timedelta(seconds=max_age)).isoformat(" ")
+        negative_since = (now - timedelta(seconds=negative_max_age)).isoformat(" ")
+        with self._lock:
+            found = {}
+            for username in usernames:
+                username = username.lstrip("@").lower()
+                entry = self._telegram_users.get(username)
+                if entry is not None and entry[1] >= (negative_since if entry[0] is None else since):
+                    found[username] = entry[0]
+            return found
+
+    def get_stale_usernames(self, max_age: float, limit: int = 100) -> List[str]:
+        since = (datetime.now() - timedelta(seconds=max_age)).isoformat(" ")
+        with self._lock:
+            stale = {}
+            for player in self._players.values():
+                username = _fold(player['telegram_username'])
+                if username == '' or username is None or username in stale:
+                    continue
+                entry = self._telegram_users.get(username)
+                if entry is None or entry[1] < since:
+                    stale[username] = None if entry is None else entry[1]
+            # Сначала отсутствующие в справочнике, затем разрешенные раньше всех
+            ordered = sorted(stale, key=lambda username: (stale[username] is not None, stale[username] or '', username))
+            return ordered[:limit]
+
+    # ----- Администраторы и статистика -----
+
+    def is_admin(self, telegram_id: int) -> bool:
+        return telegram_id in self._admin_ids
+
+    def refresh_admins(self) -> int:
+        with self._lock:
+            self._admin_ids = frozenset(self._admins)
+            return len(self._admin_ids)
+
+    def add_admin(self, telegram_id: int, username: str) -> bool:
+        with self._lock:
+            if telegram_id in self._admins:
+                return False
+            self._admins[telegram_id] = {'telegram_id': telegram_id, 'username': username, 'added_date': _now()}
+            self.refresh_admins()
+            return True
+
+    def remove_admin(self, telegram_id: int) -> bool:
+        with self._lock:
+            removed = self._admins.pop(telegram_id, None) is not None
+            self.refresh_admins()
+            return removed
+
+    def get_all_admins(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(admin) for admin in self._admins.values()]
+
+    def get_stats(self, days: int = 7) -> List[Dict[str, Any]]:
+        since = (datetime.now().date() - timedelta(days=days)).isoformat()
+        with self._lock:
+            return [
+                {'day': day, 'registrations': counters[0], 'approved': counters[1], 'rejected': counters[2]}
+                for day, counters in sorted(self._stats.items(), reverse=True)
+                if day >= since
+            ]
@@ -0,0 +1,264 @@
+import sqlite3
+import logging
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, List, Mapping, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+# Набор вторичных индексов миграции 5: имя -> определение. Набор зафиксирован,
+# как и сама миграция. Чтобы изменить индексы, добавьте новую миграцию, которая
+# вызывает apply_index_set с полным новым набором. В него должны войти и индексы
+# более поздних миграций (например, idx_telegram_users_telegram_id из миграции 7).
+INDEXES_V5: Mapping[str, str] = MappingProxyType({
+    # Поиск команд пользователя и проверка участия в другой команде
+    "idx_players_telegram_id": "CREATE INDEX IF NOT EXISTS idx_players_telegram_id ON players (telegram_id)",
+    # Загрузка игроков команды и проверки внутри команды
+    "idx_players_team_id": "CREATE INDEX IF NOT EXISTS idx_players_team_id ON players (team_id)",
+    # Поиск игрока по username без учета регистра
+    "idx_players_username_lower": "CREATE INDEX IF NOT EXISTS idx_players_username_lower ON players (LOWER(telegram_username))",
+    # Проверка уникальности и поиск команды по названию без учета регистра
+    "idx_teams_name_lower": "CREATE INDEX IF NOT EXISTS idx_teams_name_lower ON teams (LOWER(team_name))",
+    # Постраничный просмотр команд (ключ пагинации - registration_date, id)
+    "idx_teams_registration_date": "CREATE INDEX IF NOT EXISTS idx_teams_registration_date ON teams (registration_date)",
+    # Фильтр команд по общему статусу с сортировкой по дате регистрации
+    "idx_teams_status_date": "CREATE INDEX IF NOT EXISTS idx_teams_status_date ON teams (status, registration_date)",
+    # Покрывающий индекс для фильтра регистраций по турниру и статусу
+    "idx_team_tournaments_status": (
+        "CREATE INDEX IF NOT EXISTS idx_team_tournaments_status "
+        "ON team_tournaments (tournament_id, status, team_id)"
+    ),
+})
+
+
+def apply_index_set(cursor: sqlite3.Cursor, indexes: Mapping[str, str]) -> None:
+    """
+    Привести вторичные индексы (с префиксом idx_) в соответствие с набором.
+
+    Args:
+        cursor: Курсор транзакции миграции
+        indexes: Полный набор индексов: имя -> определение; индексы idx_,
+                 которых нет в наборе, удаляются
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    for name in existing - indexes.keys():
+        logger.info(f"Удаление устаревшего индекса {name}")
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    for name, ddl in indexes.items():
+        if name not in existing:
+            logger.info(f"Создание индекса {name}")
+            cursor.execute(ddl)
+
+    cursor.execute("ANALYZE")
+
+
+def _base_schema(cursor: sqlite3.Cursor) -> None:
+    # Таблица турниров
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            description TEXT,
+            event_date TEXT NOT NULL,
+            registration_open BOOLEAN DEFAULT 1,
+            created_date TIMESTAMP NOT NULL
+        )
+    ''')
+
+    # Таблица команд (tournament_id - устаревшая привязка к одному турниру,
+    # актуальные регистрации хранятся в team_tournaments)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_name TEXT NOT NULL UNIQUE,
+            captain_contact TEXT NOT NULL,
+            registration_date TIMESTAMP NOT NULL,
+            status TEXT DEFAULT 'pending',
+            admin_comment TEXT,
+            tournament_id INTEGER,
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id)
+        )
+    ''')
+
+    # Связь многие-ко-многим между командами и турнирами
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS team_tournaments (
+            team_id INTEGER,
+            tournament_id INTEGER,
+            status TEXT DEFAULT 'pending',
+            PRIMARY KEY (team_id, tournament_id),
+            FOREIGN KEY (team_id) REFERENCES teams (id),
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (id)
+        )
+    ''')
+
+    # Таблица игроков
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team_id INTEGER,
+            nickname TEXT NOT NULL,
+            telegram_username TEXT NOT NULL,
+            telegram_id INTEGER,
+            discord_username TEXT,
+            discord_id TEXT,
+            is_captain BOOLEAN DEFAULT 0,
+            FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Таблица администраторов
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS admins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            username TEXT,
+            added_date TIMESTAMP NOT NULL
+        )
+    ''')
+
+    # Добавляем дефолтного админа, если таблица пуста
+    cursor.execute('SELECT COUNT(*) FROM admins')
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(
+            'INSERT INTO admins (telegram_id, username, added_date) VALUES (?, ?, ?)',
+            (123456789, 'admin', datetime.now())  # Замените на реальный ID администратора
+        )
+
+
+def _player_extra_columns(cursor: sqlite3.Cursor) -> None:
+    # Базы, созданные до появления миграций, могут уже содержать часть столбцов
+    cursor.execute("PRAGMA table_info(players)")
+    columns = {column[1] for column in cursor.fetchall()}
+
+    for column in ("sub", "discord_username", "discord_id"):
+        if column not in columns:
+            logger.info(f"Добавление столбца '{column}' в таблицу players")
+            cursor.execute(f"ALTER TABLE players ADD COLUMN {column} TEXT DEFAULT NULL")
+
+
+def _stats_by_day(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("PRAGMA table_info(stats)")
+    columns = {column[1] for column in cursor.fetchall()}
+
+    if "day" in columns:
+        return
+
+    if columns:
+        cursor.execute("ALTER TABLE stats RENAME TO stats_legacy")
+
+    cursor.execute('''
+        CREATE TABLE stats (
+            day TEXT PRIMARY KEY,
+            registrations_count INTEGER NOT NULL DEFAULT 0,
+            approved_count INTEGER NOT NULL DEFAULT 0,
+            rejected_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    if columns:
+        # Старая схема допускала несколько строк на день - суммируем их
+        cursor.execute('''
+            INSERT INTO stats (day, registrations_count, approved_count, rejected_count)
+            SELECT date(date), SUM(COALESCE(registrations_count, 0)),
+                SUM(COALESCE(approved_count, 0)), SUM(COALESCE(rejected_count, 0))
+            FROM stats_legacy
+            GROUP BY date(date)
+        ''')
+        cursor.execute("DROP TABLE stats_legacy")
+
+
+def _legacy_tournament_links(cursor: sqlite3.Cursor) -> None:
+    # Команды, привязанные к турниру через teams.tournament_id, получают
+    # запись в team_tournaments, с которой работают списки и счетчики
+    cursor.execute('''
+        INSERT OR IGNORE INTO team_tournaments (team_id, tournament_id, status)
+        SELECT t.id, t.tournament_id, COALESCE(t.status, 'pending')
+        FROM teams t
+        JOIN tournaments tr ON tr.id = t.tournament_id
+    ''')
+
+
+def _secondary_indexes(cursor: sqlite3.Cursor) -> None:
+    apply_index_set(cursor, INDEXES_V5)
+
+
+def _subscription_verified_at(cursor: sqlite3.Cursor) -> None:
+    # Время последней проверки подписки: по нему sub служит кэшем с ограниченным сроком жизни
+    cursor.execute("PRAGMA table_info(players)")
+    if "sub_verified_at" not in {column[1] for column in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE players ADD COLUMN sub_verified_at TIMESTAMP DEFAULT NULL")
+
+
+def _telegram_users(cursor: sqlite3.Cursor) -> None:
+    # Справочник username -> Telegram ID (telegram_id NULL - username никому не принадлежит)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS telegram_users (
+            username TEXT PRIMARY KEY,
+            telegram_id INTEGER,
+            resolved_at TIMESTAMP NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    # Удаление прежних username пользователя из справочника при смене username
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_telegram_users_telegram_id ON telegram_users (telegram_id)")
+
+
+# Упорядоченный список миграций. Примененные миграции не изменяются -
+# любое изменение схемы добавляется новой миграцией в конец списка.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "базовая схема", _base_schema),
+    Migration(2, "столбцы sub, discord_username, discord_id в players", _player_extra_columns),
+    Migration(3, "таблица stats с ключом по дню", _stats_by_day),
+    Migration(4, "регистрации из teams.tournament_id в team_tournaments", _legacy_tournament_links),
+    Migration(5, "набор вторичных индексов", _secondary_indexes),
+    Migration(6, "столбец sub_verified_at в players", _subscription_verified_at),
+    Migration(7, "справочник telegram_users", _telegram_users),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Получить версию схемы базы данных (PRAGMA user_version)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Применить миграции, которые еще не применены к базе.
+
+    Вызывается внутри транзакции записи: при ошибке откатываются
+    все миграции этого запуска вместе с номером версии.
+
+    Args:
+        conn: Соединение с открытой транзакцией записи
+
+    Returns:
+        Версия схемы после миграции
+    """
+    current = schema_version(conn)
+    if current > LATEST_VERSION:
+        raise RuntimeError(
+            f"Версия схемы базы данных ({current}) новее, чем поддерживает приложение ({LATEST_VERSION})"
+        )
+
+    cursor = conn.cursor()
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        logger.info(f"Применение миграции {migration.version}: {migration.description}")
+        migration.apply(cursor)
+        cursor.execute(f"PRAGMA user_version = {migration.version}")
+        current = migration.version
+
+    return current
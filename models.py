@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class Player:
+    """Игрок команды."""
+
+    # Порядок столбцов в запросах совпадает с порядком полей (см. from_row)
+    COLUMNS = "id, nickname, telegram_username, telegram_id, discord_username, discord_id, is_captain"
+
+    id: int
+    nickname: str
+    telegram_username: str
+    telegram_id: Optional[int]
+    discord_username: Optional[str]
+    discord_id: Optional[str]
+    is_captain: bool
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Player":
+        """Создать игрока из строки запроса со столбцами COLUMNS."""
+        return cls(row[0], row[1], row[2], row[3], row[4], row[5], bool(row[6]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление в формате словарного API Database."""
+        return {
+            'id': self.id,
+            'nickname': self.nickname,
+            'telegram_username': self.telegram_username,
+            'telegram_id': self.telegram_id,
+            'discord_username': self.discord_username,
+            'discord_id': self.discord_id,
+            'is_captain': int(self.is_captain),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class TeamTournament:
+    """Регистрация команды на турнир."""
+
+    COLUMNS = "t.id, t.name, t.event_date, tt.status"
+
+    id: int
+    name: str
+    event_date: str
+    registration_status: str
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "TeamTournament":
+        """Создать регистрацию из строки запроса со столбцами COLUMNS."""
+        return cls(row[0], row[1], row[2], row[3])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление в формате словарного API Database."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'event_date': self.event_date,
+            'registration_status': self.registration_status,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Tournament:
+    """Турнир."""
+
+    COLUMNS = "id, name, description, event_date, registration_open, created_date"
+
+    id: int
+    name: str
+    description: Optional[str]
+    event_date: str
+    registration_open: bool
+    created_date: str
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Tournament":
+        """Создать турнир из строки запроса со столбцами COLUMNS."""
+        return cls(row[0], row[1], row[2], row[3], bool(row[4]), row[5])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление в формате словарного API Database."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'event_date': self.event_date,
+            'registration_open': int(self.registration_open),
+            'created_date': self.created_date,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Team:
+    """Команда вместе с игроками и регистрациями на турниры."""
+
+    COLUMNS = "t.id, t.team_name, t.status, t.registration_date, t.captain_contact, t.admin_comment"
+
+    id: int
+    team_name: str
+    status: Optional[str]
+    registration_date: str
+    captain_contact: str
+    admin_comment: Optional[str]
+    players: Tuple[Player, ...] = ()
+    tournaments: Tuple[TeamTournament, ...] = ()
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any], players: Tuple[Player, ...] = (),
+                 tournaments: Tuple[TeamTournament, ...] = ()) -> "Team":
+        """Создать команду из строки запроса со столбцами COLUMNS."""
+        return cls(row[0], row[1], row[2], row[3], row[4], row[5], players, tournaments)
+
+    @property
+    def captain(self) -> Optional[Player]:
+        """Капитан команды или None."""
+        for player in self.players:
+            if player.is_captain:
+                return player
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление в формате словарного API Database (как get_all_teams)."""
+        return {
+            'id': self.id,
+            'team_name': self.team_name,
+            'status': self.status,
+            'registration_date': self.registration_date,
+            'captain_contact': self.captain_contact,
+            'admin_comment': self.admin_comment,
+            'players': [player.to_dict() for player in self.players],
+            'tournaments': [tournament.to_dict() for tournament in self.tournaments],
+        }
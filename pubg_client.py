@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import aiohttp
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для внешнего API.
+
+    После failure_threshold ошибок подряд размыкается на reset_timeout
+    секунд: запросы в это время не выполняются. Затем пропускает один
+    пробный запрос (полуоткрытое состояние): успех замыкает предохранитель,
+    ошибка снова размыкает его.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Количество ошибок подряд, после которого предохранитель размыкается
+            reset_timeout: Через сколько секунд пропустить пробный запрос
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Можно ли выполнить запрос (в полуоткрытом состоянии - только один)."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            # Пока идет пробный запрос, остальные отклоняются; если он не завершится
+            # (например, отменен), следующий пробный запрос пройдет через reset_timeout
+            self.opened_at = time.monotonic()
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+
+
+class PubgClient:
+    """
+    Клиент API поиска игроков PUBG (api.pubg.report).
+
+    Одна сессия aiohttp на все время работы бота: соединения с API
+    переиспользуются (keep-alive) вместо нового TCP/TLS-подключения на
+    каждый никнейм. Запросы ограничены таймаутами, результаты хранятся в
+    LRU-кэшах (найденные никнеймы - ttl секунд, ненайденные - negative_ttl),
+    одновременные проверки одного никнейма выполняются одним запросом.
+
+    При ошибках и недоступности API (включая разомкнутый предохранитель)
+    никнейм считается действительным, чтобы сбой API не блокировал
+    регистрацию, - как и прежде.
+    """
+
+    def __init__(self, base_url: str = "https://api.pubg.report", timeout: float = 5.0,
+                 connect_timeout: float = 2.0, max_connections: int = 20, cache_size: int = 2048,
+                 ttl: float = 24 * 60 * 60, negative_ttl: float = 10 * 60,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            base_url: Адрес API
+            timeout: Общий таймаут запроса, секунд
+            connect_timeout: Таймаут подключения, секунд
+            max_connections: Максимум одновременных соединений с API
+            cache_size: Размер каждого из кэшей (0 - без кэша)
+            ttl: Время жизни записи о найденном никнейме, секунд
+            negative_ttl: Время жизни записи о ненайденном никнейме, секунд
+            failure_threshold: Ошибок подряд до размыкания предохранителя
+            reset_timeout: Время до пробного запроса после размыкания, секунд
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_connections = max_connections
+        self.found = TTLCache(maxsize=cache_size, ttl=ttl)
+        self.not_found = TTLCache(maxsize=cache_size, ttl=negative_ttl)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self.requests = 0
+        self.errors = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Сессия создается внутри работающего цикла событий при первом запросе
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(timeout=self.timeout, connector=connector)
+        return self._session
+
+    async def close(self) -> None:
+        """Закрыть сессию и соединения с API."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def check_nickname(self, nickname: str) -> Tuple[bool, str]:
+        """
+        Проверить существование никнейма PUBG.
+
+        Args:
+            nickname: Игровой никнейм
+
+        Returns:
+            Кортеж (существует, никнейм в правильном регистре); при сбое API -
+            (True, nickname)
+        """
+        key = nickname.lower()
+        cached = self.found.get(key)
+        if cached is not None:
+            return True, cached
+        if self.not_found.get(key) is not None:
+            return False, nickname
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await self._fetch(nickname)
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже получил вызывающий: asyncio не должен сообщать о нем, если ожидающих нет
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending[key]
+            if not future.done():
+                # Запрос отменен или прерван - ожидающие получают CancelledError
+                future.cancel()
+
+    async def _fetch(self, nickname: str) -> Tuple[bool, str]:
+        """Запросить никнейм у API с учетом предохранителя и сохранить результат в кэш."""
+        if not self.breaker.allow():
+            logger.debug(f"API PUBG недоступно, никнейм {nickname} не проверяется")
+            return True, nickname
+
+        key = nickname.lower()
+        self.requests += 1
+        try:
+            session = self._get_session()
+            async with session.get(f"{self.base_url}/search/{quote(nickname, safe='')}") as response:
+                if response.status == 429 or response.status >= 500:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status, message=response.reason or ""
+                    )
+                data = await response.json(content_type=None) if response.status == 200 else None
+            correct_nickname = self._parse(data, nickname)
+        except Exception as e:
+            self.errors += 1
+            self.breaker.record_failure()
+            logger.error(f"Ошибка при проверке никнейма PUBG: {e!r}")
+            # В случае ошибки запроса считаем никнейм действительным
+            return True, nickname
+
+        self.breaker.record_success()
+        if correct_nickname is not None:
+            self.found.put(key, correct_nickname)
+            return True, correct_nickname
+
+        self.not_found.put(key, True)
+        return False, nickname
+
+    @staticmethod
+    def _parse(data: Any, nickname: str) -> Optional[str]:
+        """
+        Разобрать ответ API поиска игроков.
+
+        Args:
+            data: Разобранный JSON ответа или None, если игрок не найден
+            nickname: Запрошенный никнейм
+
+        Returns:
+            Никнейм первого найденного игрока в правильном регистре или None,
+            если игроков нет
+
+        Raises:
+            ValueError: Если ответ не является списком игроков
+        """
+        if not data:
+            return None
+        if not isinstance(data, list) or not isinstance(data[0], dict):
+            raise ValueError(f"Неожиданный ответ API PUBG: {data!r:.100}")
+        correct_nickname = data[0].get("nickname", nickname)
+        if not isinstance(correct_nickname, str) or not correct_nickname:
+            raise ValueError(f"Неожиданный никнейм в ответе API PUBG: {correct_nickname!r:.100}")
+        return correct_nickname
+
+    def stats(self) -> Dict[str, object]:
+        """Счетчики клиента: запросы к API, ошибки, кэши и состояние предохранителя."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "found": self.found.stats(),
+            "not_found": self.not_found.stats(),
+            "breaker": self.breaker.state,
+            "trips": self.breaker.trips,
+            "rejected": self.breaker.rejected,
+        }
@@ -0,0 +1,262 @@
+import functools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    """Перцентиль по отсортированной выборке (метод ближайшего ранга)."""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def param_shape(parameters: Any) -> str:
+    """Форма параметров запроса без самих значений: типы и длины строк."""
+    if parameters is None:
+        return "()"
+    if isinstance(parameters, dict):
+        items = [f"{key}: {_value_shape(value)}" for key, value in parameters.items()]
+        return "{" + ", ".join(items) + "}"
+    return "(" + ", ".join(_value_shape(value) for value in parameters) + ")"
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+class _Timing:
+    """Счетчики одного метода или SQL-запроса."""
+
+    __slots__ = ("count", "total", "rows", "samples", "methods")
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.total = 0.0
+        self.rows = 0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+        self.methods: Set[str] = set()
+
+    def add(self, duration: float, rows: int = 0) -> None:
+        self.count += 1
+        self.total += duration
+        self.rows += rows
+        self.samples.append(duration)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": _percentile(ordered, 50),
+            "p95": _percentile(ordered, 95),
+            "p99": _percentile(ordered, 99),
+            "rows": self.rows,
+        }
+
+
+class QueryStats:
+    """
+    Статистика времени выполнения методов Database и SQL-запросов.
+
+    Перцентили считаются по последним sample_size измерениям каждого
+    метода и запроса. Запросы дольше slow_threshold секунд записываются
+    в журнал вместе с формой параметров (без значений).
+    """
+
+    def __init__(self, slow_threshold: float = 0.1, sample_size: int = 1024):
+        """
+        Args:
+            slow_threshold: Порог медленного запроса, секунд
+            sample_size: Количество последних измерений для перцентилей
+        """
+        self.slow_threshold = slow_threshold
+        self.sample_size = sample_size
+        self.slow_count = 0
+        self._methods: Dict[str, _Timing] = {}
+        self._statements: Dict[str, _Timing] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def current_method(self) -> Optional[str]:
+        """Внешний метод Database, выполняющийся в текущем потоке."""
+        return getattr(self._local, "method", None)
+
+    def wrap(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Обернуть метод Database для учета времени его выполнения."""
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            outer = self.current_method
+            if outer is None:
+                self._local.method = name
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - started
+                if outer is None:
+                    self._local.method = None
+                with self._lock:
+                    timing = self._methods.get(name)
+                    if timing is None:
+                        timing = self._methods[name] = _Timing(self.sample_size)
+                    timing.add(duration)
+        return wrapper
+
+    def record_statement(self, sql: str, duration: float, rows: int, shape: str,
+                         method: Optional[str]) -> None:
+        """Учесть выполнение SQL-запроса."""
+        key = " ".join(sql.split())
+        with self._lock:
+            timing = self._statements.get(key)
+            if timing is None:
+                timing = self._statements[key] = _Timing(self.sample_size)
+            timing.add(duration, rows)
+            if method:
+                timing.methods.add(method)
+            slow = duration >= self.slow_threshold
+            if slow:
+                self.slow_count += 1
+
+        if slow:
+            logger.warning(
+                f"Медленный запрос {duration * 1000:.1f} мс в {method or '-'}: {key[:300]} "
+                f"параметры {shape}, строк {rows}"
+            )
+
+    def snapshot(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Получить статистику.
+
+        Args:
+            top: Ограничить списки top самыми затратными (по суммарному времени)
+
+        Returns:
+            Словарь с ключами methods и statements (списки, отсортированные
+            по суммарному времени), slow_threshold и slow_count
+        """
+        with self._lock:
+            methods = [{"method": name, **timing.summary()} for name, timing in self._methods.items()]
+            statements = [
+                {"sql": sql, "methods": sorted(timing.methods), **timing.summary()}
+                for sql, timing in self._statements.items()
+            ]
+            slow_count = self.slow_count
+
+        methods.sort(key=lambda item: item["total"], reverse=True)
+        statements.sort(key=lambda item: item["total"], reverse=True)
+        return {
+            "methods": methods[:top],
+            "statements": statements[:top],
+            "slow_threshold": self.slow_threshold,
+            "slow_count": slow_count,
+        }
+
+    def reset(self) -> None:
+        """Сбросить накопленную статистику."""
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self.slow_count = 0
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Курсор, измеряющий выполнение запросов.
+
+    Время запроса включает выборку строк (fetch*): измерение завершается,
+    когда строки выбраны до конца, при следующем execute или при
+    уничтожении курсора.
+    """
+
+    _pending: Optional[list] = None
+
+    def _start(self, sql: str, shape: str, call: Callable[[], Any]) -> "InstrumentedCursor":
+        self._finish()
+        started = time.perf_counter()
+        try:
+            call()
+        finally:
+            duration = time.perf_counter() - started
+            # Для изменяющих запросов учитываем затронутые строки
+            rows = self.rowcount if self.rowcount > 0 else 0
+            self._pending = [sql, duration, rows, shape, self.connection.query_stats.current_method]
+            if self.description is None:
+                self._finish()
+        return self
+
+    def _fetched(self, started: float, rows: int, exhausted: bool) -> None:
+        pending = self._pending
+        if pending is None:
+            return
+        pending[1] += time.perf_counter() - started
+        pending[2] += rows
+        if exhausted:
+            self._finish()
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self.connection.query_stats.record_statement(*pending)
+
+    def execute(self, sql: str, parameters: Any = ()) -> "InstrumentedCursor":
+        return self._start(sql, param_shape(parameters), lambda: super(InstrumentedCursor, self).execute(sql, parameters))
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "InstrumentedCursor":
+        seq = list(seq_of_parameters)
+        shape = f"{len(seq)} x {param_shape(seq[0]) if seq else '()'}"
+        return self._start(sql, shape, lambda: super(InstrumentedCursor, self).executemany(sql, seq))
+
+    def fetchone(self) -> Any:
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size: int = -1) -> list:
+        started = time.perf_counter()
+        rows = super().fetchmany(size if size >= 0 else self.arraysize)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self) -> list:
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Соединение, все курсоры которого измеряют выполнение запросов."""
+
+    query_stats: QueryStats
+
+    def cursor(self, factory: Any = None) -> sqlite3.Cursor:
+        return super().cursor(factory or InstrumentedCursor)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
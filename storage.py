@@ -0,0 +1,318 @@
+from abc import ABC, abstractmethod
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
+
+from models import Team, Tournament
+
+
+class Storage(ABC):
+    """
+    Интерфейс хранилища данных бота.
+
+    Обработчики (через AsyncDatabase), импорт команд и очередь записи
+    работают только с методами этого класса, поэтому хранилище можно
+    заменить, не меняя их. Реализации:
+    - Database (database.py) - файл SQLite;
+    - MemoryStorage (memory_storage.py) - словари и индексы в памяти процесса.
+
+    Реализации обязаны совпадать по поведению: одинаковые проверки,
+    тексты ValueError и формат возвращаемых словарей. Совпадение
+    проверяется тестом tests/test_storage_contract.py.
+    """
+
+    # Сколько вызовов хранилище может выполнять параллельно
+    # (по нему AsyncDatabase выбирает размер пула потоков)
+    max_readers: int = 1
+
+    @abstractmethod
+    def transaction(self) -> ContextManager[Any]:
+        """
+        Блок записи: вызовы методов внутри блока фиксируются вместе.
+
+        Блоки могут быть вложенными; ошибка во вложенном блоке не отменяет
+        изменения внешнего (используется очередью записи, см. WriteQueue).
+        """
+
+    def close(self) -> None:
+        """Освободить ресурсы хранилища."""
+
+    def get_query_stats(self, top: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Статистика времени выполнения запросов или None, если измерение не поддерживается."""
+        return None
+
+    def reset_query_stats(self) -> None:
+        """Сбросить статистику запросов."""
+
+    def get_team_cache_stats(self) -> Dict[str, Any]:
+        """Счетчики кэша команд (нулевые, если хранилище не кэширует команды)."""
+        return {
+            "size": 0,
+            "maxsize": 0,
+            "ttl": 0.0,
+            "hits": 0,
+            "misses": 0,
+            "hit_rate": 0.0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    # ----- Турниры -----
+
+    @abstractmethod
+    def create_tournament(self, name: str, description: str, event_date: str) -> int:
+        """Создать турнир и вернуть его ID."""
+
+    @abstractmethod
+    def get_all_tournaments(self) -> List[Dict[str, Any]]:
+        """Все турниры с количеством регистраций по статусам, от новых к старым."""
+
+    @abstractmethod
+    def get_tournament_by_id(self, tournament_id: int) -> Optional[Dict[str, Any]]:
+        """Турнир по ID или None."""
+
+    @abstractmethod
+    def update_tournament(self, tournament_id: int, name: str = None, description: str = None,
+                          event_date: str = None, registration_open: bool = None) -> bool:
+        """Изменить переданные поля турнира."""
+
+    def close_tournament_registration(self, tournament_id: int) -> bool:
+        """Закрыть регистрацию на турнир."""
+        return self.update_tournament(tournament_id, registration_open=False)
+
+    @abstractmethod
+    def get_active_tournaments(self) -> List[Dict[str, Any]]:
+        """Турниры с открытой регистрацией, от новых к старым."""
+
+    @abstractmethod
+    def delete_tournament(self, tournament_id: int) -> bool:
+        """Удалить турнир, его регистрации и команды с устаревшей привязкой к нему."""
+
+    @abstractmethod
+    def get_tournament_models(self) -> List[Tournament]:
+        """Все турниры в виде моделей Tournament."""
+
+    # ----- Команды -----
+
+    @abstractmethod
+    def register_team(self, team_name: str, players: List[Dict[str, Any]], captain_contact: str,
+                      tournament_id: Optional[int] = None) -> int:
+        """Зарегистрировать команду вместе с игроками и вернуть ее ID."""
+
+    @abstractmethod
+    def import_teams(self, teams: List[Dict[str, Any]], status: str = 'pending') -> Tuple[List[int], Dict[int, str]]:
+        """Импортировать команды; вернуть (ID добавленных, {индекс: ошибка})."""
+
+    @abstractmethod
+    def create_team(self, team_name: str, captain: Dict[str, Any]) -> int:
+        """Создать команду-черновик с капитаном и вернуть ее ID."""
+
+    @abstractmethod
+    def get_user_teams(self, telegram_id: int) -> List[Dict[str, Any]]:
+        """Команды, в которых участвует пользователь."""
+
+    @abstractmethod
+    def get_team_by_id(self, team_id: int) -> Optional[Dict[str, Any]]:
+        """Команда по ID или None."""
+
+    @abstractmethod
+    def get_team_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Команда игрока с указанным Telegram ID или None."""
+
+    @abstractmethod
+    def get_team_by_name(self, team_name: str) -> Optional[Dict[str, Any]]:
+        """Команда по названию (без учета регистра) или None."""
+
+    @abstractmethod
+    def get_team_tournaments(self, team_id: int) -> List[Dict[str, Any]]:
+        """Турниры, на которые зарегистрирована команда, со статусом регистрации."""
+
+    @abstractmethod
+    def get_all_teams(self, status: Optional[str] = None, tournament_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Команды с игроками и турнирами, отфильтрованные по статусу и турниру."""
+
+    @abstractmethod
+    def get_team_models(self, status: Optional[str] = None, tournament_id: Optional[int] = None) -> List[Team]:
+        """То же, что get_all_teams, в виде моделей Team."""
+
+    @abstractmethod
+    def get_team_model(self, team_id: int) -> Optional[Team]:
+        """Команда по ID в виде модели Team или None."""
+
+    @abstractmethod
+    def get_teams_page(self, status: Optional[str] = None, tournament_id: Optional[int] = None,
+                       cursor: Optional[int] = None, direction: str = "next",
+                       limit: int = 10) -> Dict[str, Any]:
+        """Страница списка команд (keyset-пагинация по registration_date, id)."""
+
+    @abstractmethod
+    def count_teams(self, group_by: Tuple[str, ...] = ('status',), status: Optional[str] = None,
+                    tournament_id: Optional[int] = None) -> Dict[Any, int]:
+        """Количество команд с группировкой по статусу и/или турниру."""
+
+    @abstractmethod
+    def team_name_exists(self, team_name: str) -> bool:
+        """Есть ли команда с таким названием (без учета регистра)."""
+
+    @abstractmethod
+    def update_team_name(self, team_id: int, new_name: str) -> bool:
+        """Переименовать команду (команда возвращается в черновик)."""
+
+    @abstractmethod
+    def delete_team(self, team_id: int) -> bool:
+        """Удалить команду вместе с игроками и регистрациями."""
+
+    # ----- Регистрации на турниры и статусы -----
+
+    @abstractmethod
+    def register_team_for_tournament(self, team_id: int, tournament_id: int) -> bool:
+        """Подать заявку команды-черновика на турнир."""
+
+    @abstractmethod
+    def register_team_for_multiple_tournaments(self, team_id: int, tournament_ids: List[int]) -> bool:
+        """Зарегистрировать команду на несколько турниров (все или ни одного)."""
+
+    @abstractmethod
+    def update_team_status(self, team_id: int, status: str, comment: Optional[str] = None) -> bool:
+        """Изменить общий статус команды и комментарий администратора."""
+
+    def update_team_tournament_status(self, team_id: int, tournament_id: int, status: str) -> bool:
+        """
+        Обновить статус регистрации команды на турнир.
+
+        Args:
+            team_id: ID команды
+            tournament_id: ID турнира
+            status: Новый статус ('pending', 'approved', 'rejected')
+
+        Returns:
+            True, если регистрация найдена, иначе False
+        """
+        return team_id in self.update_registrations_status(tournament_id, status, team_ids=[team_id])
+
+    @abstractmethod
+    def update_registrations_status(self, tournament_id: int, status: str,
+                                    team_ids: Optional[List[int]] = None,
+                                    current_status: Optional[str] = None) -> Dict[int, str]:
+        """Массово изменить статус регистраций; вернуть {ID команды: прежний статус}."""
+
+    # ----- Игроки -----
+
+    @abstractmethod
+    def add_player_to_team(self, team_id: int, player: Dict[str, Any]) -> bool:
+        """Добавить игрока в команду."""
+
+    @abstractmethod
+    def check_username_exists_in_team(self, team_id: int, username: str) -> bool:
+        """Есть ли в команде игрок с таким Telegram username."""
+
+    @abstractmethod
+    def check_discord_exists_in_team(self, team_id: int, discord_username: str,
+                                     exclude_player_id: Optional[int] = None) -> bool:
+        """Есть ли в команде (кроме exclude_player_id) игрок с таким Discord username."""
+
+    @abstractmethod
+    def check_nickname_exists_in_team(self, team_id: int, nickname: str) -> bool:
+        """Есть ли в команде игрок с таким никнеймом."""
+
+    @abstractmethod
+    def update_player_nickname(self, player_id: int, new_nickname: str) -> bool:
+        """Изменить никнейм игрока."""
+
+    @abstractmethod
+    def update_player_username(self, player_id: int, new_username: str) -> bool:
+        """Изменить Telegram username игрока."""
+
+    @abstractmethod
+    def update_player_discord(self, player_id: int, discord_username: str, discord_id: str) -> bool:
+        """Изменить Discord данные игрока."""
+
+    @abstractmethod
+    def update_player_subscription(self, player_id: int, is_subscribed: bool) -> bool:
+        """Сохранить статус подписки игрока на канал."""
+
+    @abstractmethod
+    def update_players_subscription(self, subscriptions: Dict[int, bool]) -> int:
+        """Сохранить статусы подписки {ID игрока: подписан} одной записью; вернуть число обновленных."""
+
+    @abstractmethod
+    def get_players_subscription(self, player_ids: List[int], max_age: float) -> Dict[int, bool]:
+        """Статусы подписки, проверенные не раньше max_age секунд назад: {ID игрока: подписан}."""
+
+    @abstractmethod
+    def get_stale_subscriptions(self, max_age: float, limit: int = 50, status: str = 'approved') -> List[Dict[str, Any]]:
+        """Игроки команд со статусом status, подписка которых не проверялась дольше max_age секунд."""
+
+    @abstractmethod
+    def delete_player(self, player_id: int) -> bool:
+        """Удалить игрока (кроме капитана) из команды."""
+
+    # ----- Справочник username -> Telegram ID -----
+
+    @abstractmethod
+    def save_telegram_ids(self, entries: Dict[str, Optional[int]]) -> int:
+        """Сохранить {username: Telegram ID или None, если username свободен}; вернуть число записей."""
+
+    @abstractmethod
+    def get_telegram_ids(self, usernames: List[str], max_age: float,
+                         negative_max_age: float) -> Dict[str, Optional[int]]:
+        """Актуальные записи справочника: {username в нижнем регистре: Telegram ID или None}."""
+
+    @abstractmethod
+    def get_stale_usernames(self, max_age: float, limit: int = 100) -> List[str]:
+        """Username игроков без записи в справочнике или с записью старше max_age секунд."""
+
+    # ----- Администраторы и статистика -----
+
+    @abstractmethod
+    def is_admin(self, telegram_id: int) -> bool:
+        """Является ли пользователь администратором (без обращения к диску)."""
+
+    @abstractmethod
+    def refresh_admins(self) -> int:
+        """Перечитать список администраторов; вернуть их количество."""
+
+    @abstractmethod
+    def add_admin(self, telegram_id: int, username: str) -> bool:
+        """Добавить администратора (False, если он уже есть)."""
+
+    @abstractmethod
+    def remove_admin(self, telegram_id: int) -> bool:
+        """Удалить администратора."""
+
+    @abstractmethod
+    def get_all_admins(self) -> List[Dict[str, Any]]:
+        """Все администраторы."""
+
+    @abstractmethod
+    def get_stats(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Статистика регистраций по дням за последние days дней."""
+
+    @staticmethod
+    def _page(teams: List[Dict[str, Any]], limit: int, cursor: Optional[int], backwards: bool) -> Dict[str, Any]:
+        """
+        Собрать результат get_teams_page.
+
+        Args:
+            teams: До limit + 1 команд в порядке обхода (лишняя показывает,
+                   есть ли команды дальше в этом направлении)
+            limit: Размер страницы
+            cursor: Курсор, от которого отсчитывалась страница
+            backwards: Страница запрошена в направлении "prev"
+        """
+        has_more = len(teams) > limit
+        teams = teams[:limit]
+        if backwards:
+            teams.reverse()
+
+        if not teams:
+            return {'teams': [], 'next_cursor': None, 'prev_cursor': None}
+
+        if backwards:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, cursor is not None
+
+        return {
+            'teams': teams,
+            'next_cursor': teams[-1]['id'] if has_next else None,
+            'prev_cursor': teams[0]['id'] if has_prev else None,
+        }
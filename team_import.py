@@ -0,0 +1,364 @@
+"""
+Массовый импорт команд из CSV, JSON и JSON Lines.
+
+Форматы:
+    CSV   - одна строка на игрока, команды идут подряд. Столбцы: team_name,
+            nickname, username, telegram_id, discord_username, discord_id,
+            is_captain, tournament_id, captain_contact. Вместо nickname и
+            username можно указать player в виде "Никнейм - @username".
+    JSONL - один объект команды на строку.
+    JSON  - массив объектов команд.
+
+Объект команды: {"team_name": ..., "tournament_id": ..., "captain_contact": ...,
+"players": [{"nickname": ..., "username": ..., ...} или "Никнейм - @username"]}.
+Если капитан не отмечен, капитаном считается первый игрок.
+
+Запуск:
+    python team_import.py teams.csv [--db tournament.db] [--format csv] [--status pending]
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from constants import MAX_PLAYERS, MIN_PLAYERS, PLAYER_PATTERN
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "json", "jsonl")
+TEAM_NAME_PATTERN = r'^[a-zA-Zа-яА-Я0-9\s\-_\.]+$'
+USERNAME_CHARS = r'^[a-zA-Z0-9_]+$'
+TRUE_VALUES = {"1", "true", "yes", "да", "+"}
+
+# Количество команд в одной транзакции
+DEFAULT_CHUNK_SIZE = 200
+
+
+@dataclass
+class ImportReport:
+    """Результат импорта."""
+
+    imported: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+    def add_error(self, location: str, message: str) -> None:
+        self.errors.append((location, message))
+
+    def summary(self, limit: int = 20) -> str:
+        """Текстовый отчет: количество команд и первые limit ошибок."""
+        lines = [f"Импортировано команд: {self.imported}", f"Ошибок: {len(self.errors)}"]
+        for location, message in self.errors[:limit]:
+            lines.append(f"  {location}: {message}")
+        if len(self.errors) > limit:
+            lines.append(f"  ... и еще {len(self.errors) - limit}")
+        return "\n".join(lines)
+
+
+def detect_format(filename: str) -> str:
+    """Определить формат файла по расширению."""
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension == "ndjson":
+        extension = "jsonl"
+    if extension not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат файла: {filename} (ожидается .csv, .json или .jsonl)")
+    return extension
+
+
+def _parse_player(raw: Any) -> Dict[str, Any]:
+    if isinstance(raw, ValueError):
+        raise raw
+    if isinstance(raw, str):
+        match = re.fullmatch(PLAYER_PATTERN, raw.strip())
+        if not match:
+            raise ValueError(f"Неверный формат игрока '{raw}', ожидается 'Никнейм - @username'")
+        return {"nickname": match.group(1).strip(), "username": match.group(2)}
+    if isinstance(raw, dict):
+        return dict(raw)
+    raise ValueError(f"Неверный формат игрока: {raw!r}")
+
+
+def _optional_int(value: Any, name: str) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Поле {name} должно быть числом: {value!r}")
+
+
+def normalize_team(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Проверить команду и привести ее к формату Database.import_teams.
+
+    Проверки совпадают с регистрацией через бота: формат названия команды,
+    формат игроков (PLAYER_PATTERN), количество игроков (MAX_PLAYERS, а при
+    регистрации на турнир и MIN_PLAYERS) и уникальность ников и username
+    внутри команды.
+
+    Args:
+        raw: Команда из файла импорта
+
+    Returns:
+        Нормализованная команда
+
+    Raises:
+        ValueError: Если команда не проходит проверку
+    """
+    team_name = str(raw.get("team_name") or "").strip()
+    if len(team_name) < 2 or len(team_name) > 30:
+        raise ValueError("Название команды должно содержать от 2 до 30 символов")
+    if not re.match(TEAM_NAME_PATTERN, team_name):
+        raise ValueError(f"Недопустимые символы в названии команды '{team_name}'")
+
+    tournament_id = _optional_int(raw.get("tournament_id"), "tournament_id")
+
+    players = []
+    nicknames: Set[str] = set()
+    usernames: Set[str] = set()
+    for raw_player in raw.get("players") or []:
+        player = _parse_player(raw_player)
+
+        nickname = str(player.get("nickname") or "").strip()
+        username = str(player.get("username") or "").strip().lstrip("@")
+        if not nickname:
+            raise ValueError("Не указан никнейм игрока")
+        if not re.match(USERNAME_CHARS, username):
+            raise ValueError(f"Неверный Telegram username игрока {nickname}: '{username}'")
+        if nickname.lower() in nicknames or username.lower() in usernames:
+            raise ValueError(f"Игрок {nickname} (@{username}) указан в команде дважды")
+        nicknames.add(nickname.lower())
+        usernames.add(username.lower())
+
+        is_captain = player.get("is_captain", False)
+        if isinstance(is_captain, str):
+            is_captain = is_captain.strip().lower() in TRUE_VALUES
+
+        players.append({
+            "nickname": nickname,
+            "username": username,
+            "telegram_id": _optional_int(player.get("telegram_id"), "telegram_id"),
+            "discord_username": player.get("discord_username") or None,
+            "discord_id": str(player["discord_id"]) if player.get("discord_id") else None,
+            "is_captain": bool(is_captain),
+        })
+
+    if not players:
+        raise ValueError("В команде нет игроков")
+    if len(players) > MAX_PLAYERS + 1:
+        raise ValueError(f"Превышено максимальное количество игроков ({MAX_PLAYERS + 1}, включая капитана)")
+    if tournament_id and len(players) < MIN_PLAYERS + 1:
+        raise ValueError(f"Для регистрации необходимо минимум {MIN_PLAYERS + 1} игрока (включая капитана)")
+
+    captains = [player for player in players if player["is_captain"]]
+    if len(captains) > 1:
+        raise ValueError("В команде указано несколько капитанов")
+    if not captains:
+        players[0]["is_captain"] = True
+        captains = [players[0]]
+
+    return {
+        "team_name": team_name,
+        "tournament_id": tournament_id,
+        "captain_contact": str(raw.get("captain_contact") or f"@{captains[0]['username']}"),
+        "players": players,
+    }
+
+
+def _read_csv(stream: IO[str]) -> Iterator[Tuple[str, Any]]:
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or "team_name" not in reader.fieldnames:
+        raise ValueError("В CSV-файле нет столбца team_name")
+
+    team: Optional[Dict[str, Any]] = None
+    location = ""
+    finished: Set[str] = set()
+
+    for row in reader:
+        team_name = (row.get("team_name") or "").strip()
+        if team is None or team_name != team["team_name"]:
+            if team is not None:
+                finished.add(team["team_name"].lower())
+                yield location, team
+            if team_name.lower() in finished:
+                # Строки команды должны идти подряд
+                yield f"строка {reader.line_num}", ValueError(f"Строки команды '{team_name}' идут не подряд")
+                team = None
+                continue
+            location = f"строка {reader.line_num}"
+            team = {
+                "team_name": team_name,
+                "tournament_id": row.get("tournament_id"),
+                "captain_contact": row.get("captain_contact"),
+                "players": [],
+            }
+
+        player = {
+            key: row.get(key)
+            for key in ("nickname", "username", "telegram_id", "discord_username", "discord_id", "is_captain")
+        }
+        if row.get("player"):
+            try:
+                player.update(_parse_player(row["player"]))
+            except ValueError as e:
+                # Ошибка игрока относится ко всей команде
+                player = e
+        team["players"].append(player)
+
+    if team is not None:
+        yield location, team
+
+
+def _read_jsonl(stream: IO[str]) -> Iterator[Tuple[str, Any]]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield f"строка {line_number}", json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f"строка {line_number}", ValueError(f"Некорректный JSON: {e}")
+
+
+def _read_json(stream: IO[str]) -> Iterator[Tuple[str, Any]]:
+    # Стандартный json не читает массив по частям - для больших файлов используйте JSONL
+    data = json.load(stream)
+    if not isinstance(data, list):
+        raise ValueError("JSON-файл должен содержать массив команд")
+    for index, team in enumerate(data, start=1):
+        yield f"команда {index}", team
+
+
+READERS = {"csv": _read_csv, "jsonl": _read_jsonl, "json": _read_json}
+
+
+def read_teams(stream: IO[str], fmt: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Последовательно прочитать команды из файла.
+
+    Yields:
+        Пары (место в файле, команда) или (место в файле, ValueError)
+    """
+    if fmt not in READERS:
+        raise ValueError(f"Неподдерживаемый формат: {fmt}")
+    return READERS[fmt](stream)
+
+
+def import_teams(db: Database, stream: IO[str], fmt: str, status: str = "pending",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, dry_run: bool = False) -> ImportReport:
+    """
+    Импортировать команды из потока.
+
+    Команды проверяются по мере чтения и записываются транзакциями по
+    chunk_size команд. Ошибочные команды попадают в отчет и не прерывают импорт.
+
+    Args:
+        db: Экземпляр базы данных
+        stream: Текстовый поток с файлом импорта
+        fmt: Формат файла ('csv', 'json', 'jsonl')
+        status: Статус импортируемых команд
+        chunk_size: Количество команд в одной транзакции
+        dry_run: Только проверить файл, не записывая в базу
+
+    Returns:
+        Отчет об импорте
+    """
+    report = ImportReport()
+    chunk: List[Tuple[str, Dict[str, Any]]] = []
+    seen_names: Set[str] = set()
+    seen_telegram_ids: Set[int] = set()
+
+    def flush() -> None:
+        if not chunk:
+            return
+        if dry_run:
+            report.imported += len(chunk)
+        else:
+            try:
+                team_ids, errors = db.import_teams([team for _, team in chunk], status=status)
+            except sqlite3.Error as e:
+                # Транзакция порции откатилась целиком; следующие порции импортируются
+                logger.error(f"Ошибка базы данных при импорте порции из {len(chunk)} команд: {e}")
+                team_ids, errors = [], {index: f"Ошибка базы данных: {e}" for index in range(len(chunk))}
+            report.imported += len(team_ids)
+            for index, message in sorted(errors.items()):
+                report.add_error(chunk[index][0], message)
+        chunk.clear()
+
+    try:
+        for location, raw in read_teams(stream, fmt):
+            if isinstance(raw, Exception):
+                report.add_error(location, str(raw))
+                continue
+            if not isinstance(raw, dict):
+                report.add_error(location, "Ожидается объект команды")
+                continue
+
+            try:
+                team = normalize_team(raw)
+
+                # Уникальность внутри файла; уникальность по базе проверяет Database.import_teams
+                if team["team_name"].lower() in seen_names:
+                    raise ValueError(f"Команда '{team['team_name']}' уже встречалась в файле")
+                telegram_ids = {p["telegram_id"] for p in team["players"] if p["telegram_id"]}
+                duplicates = telegram_ids & seen_telegram_ids
+                if duplicates:
+                    raise ValueError(f"Telegram ID {', '.join(map(str, duplicates))} уже встречались в файле")
+            except ValueError as e:
+                report.add_error(location, str(e))
+                continue
+
+            seen_names.add(team["team_name"].lower())
+            seen_telegram_ids |= telegram_ids
+            chunk.append((location, team))
+
+            if len(chunk) >= chunk_size:
+                flush()
+    except (ValueError, csv.Error, json.JSONDecodeError, UnicodeDecodeError) as e:
+        report.add_error("файл", str(e))
+
+    flush()
+    logger.info(f"Импорт команд завершен: {report.imported} добавлено, {len(report.errors)} ошибок")
+    return report
+
+
+def import_bytes(db: Database, data: bytes, filename: str, status: str = "pending") -> ImportReport:
+    """Импортировать команды из содержимого загруженного файла (UTF-8, допускается BOM)."""
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+    return import_teams(db, stream, detect_format(filename), status=status)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Импорт команд из CSV/JSON/JSONL")
+    parser.add_argument("file", help="файл с командами")
+    parser.add_argument("--db", default="tournament.db", help="файл базы данных")
+    parser.add_argument("--format", choices=FORMATS, help="формат файла (по умолчанию - по расширению)")
+    parser.add_argument("--status", default="pending", choices=("draft", "pending", "approved"),
+                        help="статус импортируемых команд")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="команд в одной транзакции")
+    parser.add_argument("--dry-run", action="store_true", help="только проверить файл")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+    fmt = args.format or detect_format(args.file)
+    db = Database(args.db)
+    try:
+        with open(args.file, encoding="utf-8-sig", newline="") as stream:
+            report = import_teams(db, stream, fmt, status=args.status,
+                                  chunk_size=args.chunk_size, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    print(report.summary(limit=len(report.errors)))
+    sys.exit(1 if report.errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import os
+import sys
+from typing import Iterator
+
+import pytest
+
+# Модули бота лежат в корне репозитория, а не в пакете
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path) -> Iterator[Database]:
+    """Database во временном каталоге со схемой после всех миграций."""
+    db = Database(str(tmp_path / "test.db"))
+    try:
+        yield db
+    finally:
+        db.close()
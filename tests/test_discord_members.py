@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, List
+
+from discord_members import DiscordMemberIndex
+
+GUILD = SimpleNamespace(id=1)
+
+
+def member(member_id: int, name: str, guild: Any = GUILD) -> SimpleNamespace:
+    return SimpleNamespace(id=member_id, name=name, guild=guild)
+
+
+def assert_matches_rebuild(index: DiscordMemberIndex, members: List[SimpleNamespace]) -> None:
+    """Индекс после событий должен отвечать так же, как построенный заново."""
+    expected = DiscordMemberIndex(GUILD.id)
+    expected.rebuild(members)
+    assert len(index) == len(expected)
+    for item in members:
+        assert item.id in index
+        assert index.get_id(item.name) == expected.get_id(item.name)
+
+
+def test_events_match_rebuild():
+    members = [member(100 + i, f"member_{i}") for i in range(5)]
+    index = DiscordMemberIndex(GUILD.id)
+    index.rebuild(members)
+
+    joined = member(1, "newcomer")
+    renamed = member(members[0].id, "Renamed")
+    stranger = member(2, "stranger", guild=SimpleNamespace(id=2))
+
+    async def replay() -> None:
+        await index.on_member_join(joined)
+        await index.on_member_join(stranger)
+        await index.on_user_update(members[0], renamed)
+        await index.on_user_update(stranger, SimpleNamespace(id=2, name="stranger2"))
+        await index.on_member_update(members[1], member(members[1].id, "member_1"))
+        await index.on_member_remove(members[2])
+
+    asyncio.run(replay())
+    removed = members[2]
+    members[0], members[2] = renamed, joined
+
+    assert_matches_rebuild(index, members)
+    assert stranger.id not in index
+    assert removed.id not in index
+    assert index.get_id("member_0") is None
+    assert index.get_id("RENAMED") == renamed.id
+
+
+def test_remove_member_sharing_username():
+    first, second = member(1, "alice"), member(2, "Alice")
+    index = DiscordMemberIndex(GUILD.id)
+    index.rebuild([first, second])
+    assert index.get_id("alice") == first.id
+
+    asyncio.run(index.on_member_remove(first))
+
+    assert index.get_id("alice") == second.id
+    assert_matches_rebuild(index, [second])
+
+
+def test_rename_member_sharing_username():
+    first, second = member(1, "alice"), member(2, "Alice")
+    index = DiscordMemberIndex(GUILD.id)
+    index.rebuild([first, second])
+
+    asyncio.run(index.on_user_update(first, member(first.id, "bob")))
+
+    assert index.get_id("alice") == second.id
+    assert index.get_id("bob") == first.id
+    assert len(index) == 2
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from benchmark import pubg_stub_server  # noqa: E402
+from pubg_client import PubgClient  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    """Заглушка API PUBG на свободном локальном порту."""
+    with pubg_stub_server() as server:
+        yield server
+
+
+@pytest.fixture
+def url(server) -> str:
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def run(client: PubgClient, scenario):
+    """Выполнить сценарий с клиентом в новом цикле событий и закрыть клиент."""
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+def test_results_and_cache(server, url):
+    client = PubgClient(url)
+
+    async def scenario():
+        return [await client.check_nickname(nickname) for nickname in ("Player_1", "PLAYER_1", "ghost", "ghost")]
+
+    assert run(client, scenario) == [(True, "Player_1"), (True, "Player_1"), (False, "ghost"), (False, "ghost")]
+    assert server.requests == 2
+
+
+def test_concurrent_checks_share_one_request(server, url):
+    client = PubgClient(url)
+
+    async def scenario():
+        return await asyncio.gather(*(client.check_nickname("player_2") for _ in range(10)))
+
+    assert run(client, scenario) == [(True, "Player_2")] * 10
+    assert server.requests == 1
+
+
+def test_breaker_opens_and_probe_closes(server, url):
+    client = PubgClient(url, failure_threshold=3, reset_timeout=0.3)
+
+    async def scenario():
+        server.mode = "error"
+        results = [await client.check_nickname(f"down_{i}") for i in range(20)]
+        assert all(ok for ok, _ in results)
+        assert server.requests == 3
+        assert client.breaker.state == client.breaker.OPEN
+
+        server.mode = "ok"
+        await asyncio.sleep(0.3)
+        return await client.check_nickname("player_3")
+
+    assert run(client, scenario) == (True, "Player_3")
+    assert client.breaker.state == client.breaker.CLOSED
+
+
+def test_request_timeout_fails_open(server, url):
+    client = PubgClient(url, timeout=0.2)
+    server.mode, server.delay = "slow", 1.0
+
+    started = time.perf_counter()
+    assert run(client, lambda: client.check_nickname("player_4")) == (True, "player_4")
+    assert time.perf_counter() - started < 0.5
+    assert client.errors == 1
+
+
+def test_malformed_payload_fails_open(server, url):
+    client = PubgClient(url)
+    server.mode = "malformed"
+
+    async def scenario():
+        return [await client.check_nickname("player_5") for _ in range(2)]
+
+    assert run(client, scenario) == [(True, "player_5")] * 2
+    # Ответ не кэшируется и считается ошибкой API
+    assert server.requests == 2
+    assert client.errors == 2
+    assert client.breaker.failures == 2
+
+
+def test_concurrent_waiters_get_malformed_result(server, url):
+    client = PubgClient(url)
+    server.mode = "malformed"
+
+    async def scenario():
+        calls = asyncio.gather(*(client.check_nickname("player_6") for _ in range(2)))
+        return await asyncio.wait_for(calls, timeout=3)
+
+    assert run(client, scenario) == [(True, "player_6")] * 2
+    assert server.requests == 1
+
+
+def test_concurrent_waiters_get_first_callers_error(url):
+    client = PubgClient(url)
+
+    async def failing_fetch(nickname: str):
+        await asyncio.sleep(0.05)
+        raise RuntimeError("сбой")
+
+    client._fetch = failing_fetch
+
+    async def scenario():
+        calls = asyncio.gather(*(client.check_nickname("player_7") for _ in range(3)), return_exceptions=True)
+        return await asyncio.wait_for(calls, timeout=3)
+
+    results = run(client, scenario)
+    assert [type(result) for result in results] == [RuntimeError] * 3
+    assert not client._pending
@@ -0,0 +1,38 @@
+import pytest
+
+from benchmark import seed
+from database import Database
+
+# Горячие запросы и индекс, который каждый из них должен использовать
+HOT_QUERIES = [
+    ("get_user_teams", "SELECT team_id FROM players WHERE telegram_id = ?", (1,), "idx_players_telegram_id"),
+    ("загрузка игроков", "SELECT id FROM players WHERE team_id = ?", (1,), "idx_players_team_id"),
+    ("поиск по username", "SELECT 1 FROM players WHERE LOWER(telegram_username) = LOWER(?)", ("u",),
+     "idx_players_username_lower"),
+    ("team_name_exists", "SELECT 1 FROM teams WHERE LOWER(team_name) = LOWER(?)", ("x",), "idx_teams_name_lower"),
+    ("get_all_teams(status)", "SELECT id FROM teams WHERE status = ? ORDER BY registration_date DESC",
+     ("pending",), "idx_teams_status_date"),
+    ("команды турнира по статусу",
+     "SELECT team_id FROM team_tournaments WHERE tournament_id = ? AND status = ?", (1, "pending"),
+     "COVERING INDEX idx_team_tournaments_status"),
+    ("telegram_users по ID", "SELECT username FROM telegram_users WHERE telegram_id = ?", (1,),
+     "idx_telegram_users_telegram_id"),
+]
+
+
+@pytest.fixture(scope="module")
+def seeded_database(tmp_path_factory):
+    db = Database(str(tmp_path_factory.mktemp("plans") / "test.db"))
+    seed(db, 200)
+    # Статистика для планировщика, как после инициализации рабочей базы
+    with db.pool.writer() as conn:
+        conn.execute("ANALYZE")
+    yield db
+    db.close()
+
+
+@pytest.mark.parametrize("query, params, expected", [query[1:] for query in HOT_QUERIES],
+                         ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_uses_index(seeded_database, query, params, expected):
+    plan = " | ".join(seeded_database.explain(query, params))
+    assert expected in plan
@@ -0,0 +1,201 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from memory_storage import MemoryStorage
+from storage import Storage
+
+# Поля со временем создания записи: у разных хранилищ значения отличаются
+TIMESTAMP_FIELDS = frozenset({"registration_date", "created_date", "added_date"})
+
+
+def normalize(value: Any) -> Any:
+    """Привести результат метода хранилища к сравнимому виду."""
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {key: "<время>" if key in TIMESTAMP_FIELDS else normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(normalize(item) for item in value)
+    return value
+
+
+def contract_scenario(storage: Storage) -> List[Tuple[str, Any]]:
+    """
+    Выполнить сценарий, затрагивающий все методы Storage.
+
+    Returns:
+        Список (вызов, нормализованный результат или текст ValueError)
+    """
+    results: List[Tuple[str, Any]] = []
+
+    def call(method: str, *args: Any, **kwargs: Any) -> Any:
+        label = f"{method}{args}{kwargs or ''}"
+        try:
+            value = getattr(storage, method)(*args, **kwargs)
+        except ValueError as e:
+            results.append((label, f"ValueError: {e}"))
+            return None
+        results.append((label, normalize(value)))
+        return value
+
+    def player(name: str, telegram_id: Optional[int] = None, **extra: Any) -> Dict[str, Any]:
+        return {"nickname": name, "username": name, "telegram_id": telegram_id, **extra}
+
+    cup = call("create_tournament", "Cup", "Основной турнир", "01.06.2030")
+    league = call("create_tournament", "League", None, "01.07.2030")
+    call("create_tournament", "Cup", "", "01.01.2030")
+    call("update_tournament", league, description="Лига")
+    call("update_tournament", league, name="Cup")
+    call("update_tournament", league)
+    call("update_tournament", 999, name="Other")
+    call("close_tournament_registration", league)
+
+    teams = []
+    for i in range(5):
+        team_id = call("create_team", f"Team {i}", player(f"cap{i}", 100 + i * 10))
+        teams.append(team_id)
+        for j in range(1, 4 if i < 4 else 2):
+            call("add_player_to_team", team_id, player(f"p{i}_{j}", 100 + i * 10 + j, discord_username=f"d{i}{j}"))
+    call("create_team", "team 0", player("someone", 999))
+    call("add_player_to_team", teams[0], player("P0_1", 555))
+    call("add_player_to_team", teams[0], player("new", 101))
+    call("add_player_to_team", 999, player("nobody"))
+    for j in range(4, 8):
+        call("add_player_to_team", teams[1], player(f"extra{j}"))
+
+    call("register_team_for_tournament", teams[4], cup)
+    for team_id in teams[:4]:
+        call("register_team_for_tournament", team_id, cup)
+    call("register_team_for_tournament", teams[0], cup)
+    call("register_team_for_tournament", 999, cup)
+    call("register_team_for_multiple_tournaments", teams[2], [league, 777])
+    call("register_team_for_multiple_tournaments", teams[2], [league])
+
+    call("register_team", "Legacy", [player("l1", 300, is_captain=True), player("l2", 301)], "@l1", cup)
+    call("register_team", "Legacy", [player("l3")], "@l3")
+    call("import_teams", [
+        {"team_name": "Imported A", "captain_contact": "@ia", "tournament_id": cup,
+         "players": [player("ia", 400, is_captain=True), player("ib", 401)]},
+        {"team_name": "team 3", "captain_contact": "@x", "players": [player("x", 402)]},
+        {"team_name": "Imported B", "captain_contact": "@y", "players": [player("y", 100)]},
+        {"team_name": "Imported C", "captain_contact": "@z", "tournament_id": 999, "players": [player("z")]},
+        {"team_name": "Imported D", "captain_contact": "@w", "tournament_id": league,
+         "players": [player("w", 403, is_captain=True)]},
+    ], status="approved")
+    call("import_teams", [
+        {"team_name": "Альфа", "captain_contact": "@a1", "players": [player("a1", 410, is_captain=True)]},
+        {"team_name": "Бета", "captain_contact": "@b1", "players": [player("b1", 411, is_captain=True)]},
+        {"team_name": "Бета", "captain_contact": "@b2", "players": [player("b2", 412, is_captain=True)]},
+    ])
+    call("import_teams", [
+        {"team_name": "альфа", "captain_contact": "@a2", "players": [player("a2", 413, is_captain=True)]},
+        {"team_name": "Альфа", "captain_contact": "@a3", "players": [player("a3", 414, is_captain=True)]},
+    ])
+
+    call("update_team_tournament_status", teams[0], cup, "approved")
+    call("update_team_tournament_status", teams[4], cup, "approved")
+    call("update_registrations_status", cup, "rejected", current_status="pending")
+    call("update_registrations_status", cup, "pending", team_ids=[teams[1], teams[1], 999])
+    call("update_registrations_status", cup, "approved", team_ids=[])
+    call("update_registrations_status", cup, "unknown")
+    call("update_team_status", teams[2], "rejected", "Нет замены")
+    call("update_team_status", 999, "approved")
+
+    call("check_username_exists_in_team", teams[0], "P0_1")
+    call("check_nickname_exists_in_team", teams[0], "CAP0")
+    call("check_discord_exists_in_team", teams[0], "D01")
+    player_ids = [item["id"] for item in storage.get_team_by_id(teams[0])["players"]]
+    call("check_discord_exists_in_team", teams[0], "d01", exclude_player_id=player_ids[1])
+    call("update_player_nickname", player_ids[1], "CAP0")
+    call("update_player_nickname", player_ids[1], "renamed")
+    call("update_player_username", player_ids[2], "p0_3")
+    call("update_player_username", player_ids[2], "new_username")
+    call("update_player_discord", player_ids[2], "disc", "123")
+    call("update_player_nickname", 9999, "ghost")
+    call("update_player_subscription", player_ids[0], True)
+    call("update_player_subscription", 9999, False)
+    call("update_players_subscription", {player_ids[1]: True, player_ids[2]: False, 9999: True})
+    call("update_players_subscription", {})
+    call("get_players_subscription", player_ids + [9999], 3600)
+    call("get_players_subscription", player_ids, 0)
+    call("get_stale_subscriptions", 3600)
+    call("get_stale_subscriptions", 3600, 2, "draft")
+    call("get_stale_usernames", 3600, 5)
+    call("save_telegram_ids", {"@P0_1": 501, "p0_2": None, "cap1": 502})
+    call("save_telegram_ids", {"renamed_p0_1": 501, "ghost": None})
+    call("save_telegram_ids", {})
+    call("get_telegram_ids", ["p0_1", "RENAMED_P0_1", "@p0_2", "cap1", "ghost", "nobody"], 3600, 3600)
+    call("get_telegram_ids", ["renamed_p0_1", "p0_2"], 3600, 0)
+    call("get_telegram_ids", [], 3600, 3600)
+    call("get_stale_usernames", 3600, 5)
+    call("get_stale_usernames", 0, 3)
+    call("delete_player", player_ids[0])
+    call("delete_player", player_ids[3])
+    call("update_team_name", teams[3], "TEAM 2")
+    call("update_team_name", teams[3], "Team Three")
+    call("update_team_name", 999, "Nothing")
+    call("team_name_exists", "team three")
+
+    for status in (None, "draft", "pending", "approved", "rejected"):
+        call("get_all_teams", status)
+        call("get_all_teams", status, cup)
+        call("get_team_models", status, cup)
+    call("get_all_teams", None, league)
+    for team_id in teams + [999]:
+        call("get_team_by_id", team_id)
+        call("get_team_model", team_id)
+        call("get_team_tournaments", team_id)
+    call("get_team_by_name", "LEGACY")
+    call("get_team_by_telegram_id", 300)
+    call("get_team_by_telegram_id", 123)
+    call("get_user_teams", 110)
+
+    for status, tournament_id in ((None, None), ("approved", None), (None, cup), ("pending", cup)):
+        page = call("get_teams_page", status, tournament_id, limit=3)
+        while page and page["next_cursor"]:
+            page = call("get_teams_page", status, tournament_id, page["next_cursor"], limit=3)
+        if page and page["prev_cursor"]:
+            call("get_teams_page", status, tournament_id, page["prev_cursor"], "prev", limit=3)
+    call("get_teams_page", cursor=999)
+    call("get_teams_page", direction="sideways")
+
+    for group_by in (("status",), ("tournament",), ("tournament", "status")):
+        call("count_teams", group_by)
+        call("count_teams", group_by, "approved")
+    call("count_teams", ("status",), None, cup)
+    call("count_teams", ("team",))
+
+    call("get_all_tournaments")
+    call("get_active_tournaments")
+    call("get_tournament_by_id", cup)
+    call("get_tournament_models")
+
+    call("add_admin", 42, "moderator")
+    call("add_admin", 42, "again")
+    call("is_admin", 42)
+    call("remove_admin", 123456789)
+    call("remove_admin", 123456789)
+    call("is_admin", 123456789)
+    call("refresh_admins")
+    call("get_all_admins")
+    call("get_stats")
+
+    call("delete_team", teams[1])
+    call("delete_team", teams[1])
+    call("delete_tournament", cup)
+    call("delete_tournament", cup)
+    call("get_all_teams")
+    call("get_all_tournaments")
+    call("count_teams", ("tournament", "status"))
+    return results
+
+
+def test_memory_storage_matches_database(database, caplog):
+    # Сценарий намеренно вызывает ошибки, их записи в журнал не нужны
+    caplog.set_level(logging.CRITICAL)
+    expected = contract_scenario(database)
+    actual = contract_scenario(MemoryStorage())
+
+    assert len(actual) == len(expected)
+    for (label, sqlite_result), (_, memory_result) in zip(expected, actual):
+        assert memory_result == sqlite_result, label
@@ -0,0 +1,188 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ошибки Telegram, означающие, что username никому не принадлежит
+NOT_FOUND_ERRORS = ("USERNAME_NOT_OCCUPIED", "USERNAME_INVALID")
+
+
+def normalize_username(username: str) -> str:
+    """Username без @ в нижнем регистре (username в Telegram не зависят от регистра)."""
+    return username.strip().lstrip("@").lower()
+
+
+def _is_not_found(error: Exception) -> bool:
+    return any(code in str(error) for code in NOT_FOUND_ERRORS)
+
+
+class UserDirectory:
+    """
+    Справочник username -> Telegram ID поверх хранилища (таблица telegram_users).
+
+    Заполняется пассивно - пользователями всех обновлений, которые получает
+    бот (observe), и активно - запросами userbot.get_users() пачками до
+    batch_size username (resolve_many). Найденные ID актуальны ttl секунд,
+    отметка "username никому не принадлежит" - negative_ttl секунд, поэтому
+    повторные проверки одного и того же username не доходят до Telegram и
+    не расходуют лимиты (FLOOD_WAIT) аккаунта userbot.
+    """
+
+    def __init__(self, db: Any, ttl: float = 7 * 24 * 60 * 60, negative_ttl: float = 60 * 60,
+                 batch_size: int = 100, max_seen: int = 10000):
+        """
+        Args:
+            db: Асинхронная обертка хранилища (AsyncDatabase)
+            ttl: Срок актуальности найденного Telegram ID, секунд
+            negative_ttl: Срок актуальности отметки "username не найден", секунд
+            batch_size: Максимальное количество username в одном запросе get_users
+            max_seen: Сколько пользователей помнить в памяти, чтобы не записывать
+                      одного и того же пользователя на каждое обновление
+        """
+        self.db = db
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.batch_size = batch_size
+        self.max_seen = max_seen
+
+        # Telegram ID -> (username, когда записан в хранилище по time.monotonic())
+        self._seen: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+
+        self.hits = 0
+        self.lookups = 0
+        self.requests = 0
+
+    def observe(self, user: Any) -> None:
+        """
+        Запомнить пользователя, от которого пришло обновление.
+
+        Вызывается из работающего цикла событий; запись ставится в очередь
+        записи без ожидания и повторяется не чаще раза в ttl / 2 секунд,
+        пока username пользователя не меняется.
+
+        Args:
+            user: telegram.User (update.effective_user) или None
+        """
+        if user is None or not user.username or user.is_bot:
+            return
+        username = normalize_username(user.username)
+        now = time.monotonic()
+        seen = self._seen.get(user.id)
+        if seen is not None and seen[0] == username and now - seen[1] < self.ttl / 2:
+            return
+
+        self._seen[user.id] = (username, now)
+        self._seen.move_to_end(user.id)
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+        self.db.enqueue("save_telegram_ids", {username: user.id})
+
+    async def resolve(self, username: str, userbot: Any) -> Optional[int]:
+        """
+        Получить Telegram ID по username.
+
+        Args:
+            username: Username (с @ или без)
+            userbot: Клиент Pyrogram
+
+        Returns:
+            Telegram ID или None, если username никому не принадлежит
+
+        Raises:
+            LookupError: Если справочник не знает username, а запрос к Telegram
+                         не удался (например, FLOOD_WAIT)
+        """
+        username = normalize_username(username)
+        resolved = await self.resolve_many([username], userbot)
+        if username not in resolved:
+            raise LookupError(f"Не удалось получить Telegram ID для @{username}")
+        return resolved[username]
+
+    async def resolve_many(self, usernames: Iterable[str], userbot: Any) -> Dict[str, Optional[int]]:
+        """
+        Получить Telegram ID для нескольких username.
+
+        Сначала используются актуальные записи справочника, остальные
+        username запрашиваются у Telegram пачками и сохраняются.
+
+        Args:
+            usernames: Username (с @ или без, без учета регистра)
+            userbot: Клиент Pyrogram или None (тогда только справочник)
+
+        Returns:
+            Словарь {username в нижнем регистре: Telegram ID или None, если
+            username никому не принадлежит}; username, которые не удалось
+            проверить, в словарь не входят
+        """
+        usernames = list(dict.fromkeys(normalize_username(username) for username in usernames))
+        if not usernames:
+            return {}
+
+        known = await self.db.get_telegram_ids(usernames, self.ttl, self.negative_ttl)
+        self.hits += len(known)
+        missing = [username for username in usernames if username not in known]
+        if not missing or not userbot:
+            return known
+
+        resolved: Dict[str, Optional[int]] = {}
+        for start in range(0, len(missing), self.batch_size):
+            resolved.update(await self._fetch(missing[start:start + self.batch_size], userbot))
+        if resolved:
+            self.db.enqueue("save_telegram_ids", resolved)
+        return {**known, **resolved}
+
+    async def _fetch(self, usernames: List[str], userbot: Any) -> Dict[str, Optional[int]]:
+        """Запросить пачку username одним вызовом get_users."""
+        try:
+            return self._match(usernames, await self._get_users(userbot, usernames))
+        except Exception as e:
+            if not _is_not_found(e):
+                logger.error(f"Ошибка при получении Telegram ID для {len(usernames)} username: {e}")
+                return {}
+            if len(usernames) == 1:
+                return {usernames[0]: None}
+
+        # Один несуществующий username отменяет весь запрос - проверяем пачку по одному
+        resolved: Dict[str, Optional[int]] = {}
+        for username in usernames:
+            try:
+                resolved.update(self._match([username], await self._get_users(userbot, [username])))
+            except Exception as e:
+                if not _is_not_found(e):
+                    # Остальные запросы, скорее всего, получат ту же ошибку (FLOOD_WAIT)
+                    logger.error(f"Ошибка при получении Telegram ID для @{username}: {e}")
+                    break
+                resolved[username] = None
+        return resolved
+
+    async def _get_users(self, userbot: Any, usernames: List[str]) -> List[Any]:
+        self.requests += 1
+        self.lookups += len(usernames)
+        users = await userbot.get_users(usernames)
+        return users if isinstance(users, list) else [users]
+
+    @staticmethod
+    def _match(usernames: List[str], users: List[Any]) -> Dict[str, Optional[int]]:
+        """Сопоставить запрошенные username с полученными пользователями."""
+        found: Dict[str, int] = {}
+        for user in users:
+            if user is None:
+                continue
+            names = [user.username] + [item.username for item in getattr(user, "usernames", None) or []]
+            for name in names:
+                if name:
+                    found[normalize_username(name)] = user.id
+        # Username, которых нет в ответе, никому не принадлежат
+        return {username: found.get(username) for username in usernames}
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики справочника: ответы из хранилища, запрошенные у Telegram username и запросы."""
+        total = self.hits + self.lookups
+        return {
+            "hits": self.hits,
+            "lookups": self.lookups,
+            "requests": self.requests,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
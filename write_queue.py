@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, ContextManager, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Намерение записи: функция, ее аргументы и future для результата
+WriteIntent = Tuple[Callable[..., Any], tuple, dict, asyncio.Future]
+
+
+class WriteQueue:
+    """
+    Очередь записи с групповой фиксацией (group commit).
+
+    Фоновая задача забирает намерения записи из asyncio-очереди и выполняет
+    их пачками в одной транзакции - до max_batch намерений или max_delay
+    секунд ожидания. Каждое намерение выполняется во вложенном блоке
+    записи (в SQLite - SAVEPOINT), поэтому ошибка одного из них не отменяет
+    остальные. Future намерения получает результат только после фиксации
+    всей пачки.
+
+    Все пачки выполняются в одном выделенном потоке, так что обработчики
+    не конкурируют за блокировку записи.
+    """
+
+    def __init__(self, transaction: Callable[[], ContextManager[Any]], max_batch: int = 100,
+                 max_delay: float = 0.01):
+        """
+        Args:
+            transaction: Фабрика блока записи хранилища (Storage.transaction)
+            max_batch: Максимальное количество намерений в одной транзакции
+            max_delay: Сколько секунд собирать пачку после первого намерения
+        """
+        self.transaction = transaction
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._queue: Optional["asyncio.Queue[Optional[WriteIntent]]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+        self.batches = 0
+        self.writes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запустить фоновую задачу (вызывается из работающего цикла событий)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="db-write-queue")
+        logger.info(f"Очередь записи запущена (пачка до {self.max_batch}, ожидание {self.max_delay * 1000:.0f} мс)")
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> asyncio.Future:
+        """
+        Поставить запись в очередь.
+
+        Args:
+            func: Синхронная функция записи (например, метод хранилища)
+
+        Returns:
+            Future с результатом func; ожидать его нужно, только если
+            требуется подтверждение записи
+        """
+        if not self.running:
+            raise RuntimeError("Очередь записи не запущена")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((func, args, kwargs, future))
+        return future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            intent = await self._queue.get()
+            if intent is None:
+                break
+
+            batch = [intent]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                # Уже поставленные намерения забираем сразу, затем ждем до дедлайна
+                try:
+                    intent = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        intent = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if intent is None:
+                    stopping = True
+                    break
+                batch.append(intent)
+
+            outcomes = await loop.run_in_executor(self._executor, self._apply, batch)
+            for (_, _, _, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _apply(self, batch: List[WriteIntent]) -> List[Tuple[bool, Any]]:
+        """Выполнить пачку намерений в одной транзакции (в потоке записи)."""
+        outcomes: List[Tuple[bool, Any]] = []
+        try:
+            with self.transaction():
+                for func, args, kwargs, _ in batch:
+                    try:
+                        with self.transaction():
+                            outcomes.append((True, func(*args, **kwargs)))
+                    except Exception as e:
+                        outcomes.append((False, e))
+        except Exception as e:
+            # Фиксация не удалась - не подтверждаем ни одно намерение пачки
+            logger.error(f"Ошибка при фиксации пачки записей: {e}")
+            return [(False, e)] * len(batch)
+
+        self.batches += 1
+        self.writes += len(batch)
+        return outcomes
+
+    async def stop(self) -> None:
+        """Выполнить оставшиеся в очереди записи и остановить фоновую задачу."""
+        if self.running:
+            self._queue.put_nowait(None)
+            await self._task
+        self._task = None
+        self._executor.shutdown(wait=True)
+        logger.info(f"Очередь записи остановлена: {self.writes} записей в {self.batches} транзакциях")